@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ColumnSnapshot
+import ProjectJournal
+from PointModel import PointModel
+
+#Time to open a project from project_data.json against the binary snapshot
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=1000000, help='Number of points in the project')
+args = parser.parse_args()
+
+app = QApplication(sys.argv)
+
+state = {
+    'ProjectName': 'Benchmark',
+    'Reference': [38.0, -120.0],
+    'Scale': 131.5,
+    'Units': 'km',
+    'Points': [{
+        'Latitude': 38.0 + i * 1e-6,
+        'Longitude': -120.0 - i * 1e-6,
+        'Date': f'01-01-2020 0{i // 3600 % 9 + 1}:{i // 60 % 60:02d}:{i % 60:02d} am',
+        'Description': f'Point {i}',
+        'Distance': i * 1e-3,
+        'Bearing': float(i % 360),
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    } for i in range(args.points)]
+}
+
+directory = tempfile.mkdtemp()
+
+start = time.perf_counter()
+ProjectJournal.atomicWrite(os.path.join(directory, ProjectJournal.SNAPSHOT), json.dumps(state, indent=2))
+jsonWrite = time.perf_counter() - start
+
+start = time.perf_counter()
+path = ColumnSnapshot.write(directory, state, 0)
+binWrite = time.perf_counter() - start
+del state
+
+def openJSON():
+    with open(os.path.join(directory, ProjectJournal.SNAPSHOT), 'r') as f:
+        return json.loads(f.read())
+
+def openSnapshot():
+    return ColumnSnapshot.latest(directory).projectData()
+
+print(f'{args.points:,} points')
+print(f'write:  JSON {jsonWrite:8.3f} s  {os.path.getsize(os.path.join(directory, ProjectJournal.SNAPSHOT)) / 2**20:8.1f} MB')
+print(f'        bin  {binWrite:8.3f} s  {os.path.getsize(path) / 2**20:8.1f} MB')
+
+for name, load in [('JSON', openJSON), ('bin', openSnapshot)]:
+    start = time.perf_counter()
+    data = load()
+    loaded = time.perf_counter() - start
+
+    model = PointModel()
+    model.setPoints(data['Points'])
+    filled = time.perf_counter() - start
+
+    print(f'open:   {name:<4} load {loaded * 1000:10.1f} ms  table model {filled * 1000:10.1f} ms')
+    del data, model
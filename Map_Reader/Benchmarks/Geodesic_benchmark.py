@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Geodesic
+
+#Compare points/second of the batch geodesic engine against one geopy call per point
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=100000, help='Number of points in batch')
+parser.add_argument('--units', type=str, default='km', help='km, mi, m or ft')
+args = parser.parse_args()
+
+ref = (38.0, -120.0)
+rng = np.random.default_rng(0)
+dist = rng.uniform(0, 100, args.points)
+bearing = rng.uniform(0, 360, args.points)
+
+#geopy per-call path is slow, time a sample of it
+sample = min(args.points, 10000)
+kwargs = {'km': 'kilometers', 'mi': 'miles', 'm': 'meters', 'ft': 'feet'}[args.units]
+
+start = time.perf_counter()
+for d, b in zip(dist[:sample], bearing[:sample]):
+    geodesic(**{kwargs: d}).destination(ref, b)
+geopyRate = sample / (time.perf_counter() - start)
+
+start = time.perf_counter()
+Geodesic.destination(ref, dist, bearing, args.units)
+batchRate = args.points / (time.perf_counter() - start)
+
+print(f'geopy per-call: {geopyRate:>14,.0f} points/s')
+print(f'Geodesic batch: {batchRate:>14,.0f} points/s')
+print(f'speedup:        {batchRate / geopyRate:>14,.1f}x')
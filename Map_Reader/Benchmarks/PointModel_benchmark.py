@@ -0,0 +1,119 @@
+import os
+import sys
+import gc
+import time
+import argparse
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import QApplication, QWidget, QTreeView
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Table import Table
+
+#Memory and time to first paint of the points table at different project sizes
+
+#Provides the slots Table connects its buttons to
+class TableParent(QWidget):
+    def referenceWindow(self): pass
+    def scaleTracker(self): pass
+    def locationTracker(self): pass
+    def plotPoints(self): pass
+    def recomputeWindow(self): pass
+    def traverseTracker(self): pass
+    def spatialQueryWindow(self): pass
+
+def makePoints(size):
+    return [{
+        'Latitude': 38.0 + i * 1e-6,
+        'Longitude': -120.0 - i * 1e-6,
+        'Date': f'01-01-2020 12:{i // 60 % 60:02d}:{i % 60:02d} pm',
+        'Description': f'Point {i}',
+        'Distance': i * 1e-3,
+        'Bearing': i % 360,
+        'Units': 'km',
+        'ReferencePoint': (38.0, -120.0),
+        'Scale': 131.5
+    } for i in range(size)]
+
+def rss():
+    '''
+    Resident memory of this process in bytes, None if it can't be read
+    '''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def showTable(app, fill):
+    '''
+    Time fill of a table and its first paint, returns (seconds, bytes)
+    '''
+    gc.collect()
+    before = rss()
+    start = time.perf_counter()
+
+    widget = fill()
+    widget.resize(1080, 768)
+    widget.show()
+    widget.repaint()
+    app.processEvents()
+
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    after = rss()
+    widget.close()
+
+    return elapsed, (after - before) if before is not None else None, widget
+
+def fillStandard(points):
+    '''
+    Previous layout, one QStandardItem per cell behind a QTreeView
+    '''
+    view = QTreeView()
+    model = QStandardItemModel(0, 5, view)
+    for i, data in enumerate(points):
+        values = [i+1, data['Latitude'], data['Longitude'], data['Date'], data['Description']]
+        items = []
+        for value in values:
+            item = QStandardItem()
+            item.setData(value, Qt.DisplayRole)
+            items.append(item)
+        model.appendRow(items)
+    view.setModel(model)
+
+    return view
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--sizes', type=str, default='10000,100000,1000000', help='Comma separated number of points')
+parser.add_argument('--standard', type=int, default=100000, help='Also time QStandardItemModel up to this many points')
+args = parser.parse_args()
+
+app = QApplication(sys.argv)
+parent = TableParent()
+
+for size in map(int, args.sizes.split(',')):
+    points = makePoints(size)
+
+    def fillTable():
+        table = Table(parent)
+        table.setParent(None)
+        table.update(points)
+        return table
+
+    elapsed, memory, widget = showTable(app, fillTable)
+    mb = f'{memory / 2**20:,.1f} MB' if memory is not None else 'n/a'
+    print(f'{size:>9,} points: PointModel         first paint {elapsed:>8.3f} s  memory {mb:>10}')
+    del widget
+
+    if size <= args.standard:
+        elapsed, memory, widget = showTable(app, lambda: fillStandard(points))
+        mb = f'{memory / 2**20:,.1f} MB' if memory is not None else 'n/a'
+        print(f'{"":>16} QStandardItemModel first paint {elapsed:>8.3f} s  memory {mb:>10}')
+        del widget
+
+    del points
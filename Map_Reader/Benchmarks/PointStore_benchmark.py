@@ -0,0 +1,81 @@
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PointStore import PointStore
+
+#Memory and access time of the points as a list of dicts (read from project_data.json)
+#against the same points in a PointStore
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=500000, help='Number of points')
+parser.add_argument('--batch', type=int, default=20000, help='Points added at a time, like ProjectLoader batches')
+args = parser.parse_args()
+
+def makeJSON(count):
+    return json.dumps([{
+        'Latitude': 38.0 + i * 1e-6,
+        'Longitude': -120.0 - i * 1e-6,
+        'Date': f'01-01-2020 0{i // 3600 % 9 + 1}:{i // 60 % 60:02d}:{i % 60:02d} am',
+        'Description': f'Point {i}',
+        'Distance': i * 1e-3,
+        'Bearing': float(i % 360),
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    } for i in range(count)])
+
+def measure(build):
+    '''
+    Returns (result, seconds, bytes still allocated after a second build), the
+    second build is traced with tracemalloc which slows it down so it isn't timed
+    '''
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    traced = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+
+    return result, elapsed, size
+
+def storePoints(points):
+    store = PointStore()
+    for start in range(0, len(points), args.batch):
+        store.extend(points[start:start + args.batch])
+    return store
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+text = makeJSON(args.points)
+points, listTime, listSize = measure(lambda: json.loads(text))
+store, storeTime, storeSize = measure(lambda: storePoints(points))
+del text
+
+assert store == points
+
+print(f'{args.points:,} points')
+print(f'memory: list of dicts {listSize / 2**20:8.1f} MB  {listSize / args.points:6.0f} B/point')
+print(f'        PointStore    {storeSize / 2**20:8.1f} MB  {storeSize / args.points:6.0f} B/point  '
+      f'(columns {store.nbytes() / 2**20:.1f} MB)')
+print(f'build:  json.loads {listTime:7.2f} s  PointStore from dicts {storeTime:7.2f} s')
+
+for name, values in [('list', points), ('store', store)]:
+    iterate = timed(lambda: sum(p['Latitude'] for p in values))
+    #Chunks are dropped once used like the report writers do
+    chunks = timed(lambda: [len(values[i:i + 5000]) for i in range(0, len(values), 5000)])
+    rows = timed(lambda: [values[i]['Description'] for i in range(0, len(values), 7)])
+    copy = timed(lambda: values.copy())
+    print(f'{name:>6}: iterate {iterate:6.3f} s  5000 point slices {chunks:6.3f} s  '
+          f'every 7th description {rows:6.3f} s  copy {copy * 1000:8.1f} ms')
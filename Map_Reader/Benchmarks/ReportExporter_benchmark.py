@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ReportExporter
+
+#Compare time and peak memory of the streaming report writers with the pandas exports they replace
+def makePoints(count):
+    return [{
+        'Latitude': 38.0 + i * 1e-6,
+        'Longitude': -120.0 - i * 1e-6,
+        'Date': '01-01-2020 01:00:00 am',
+        'Description': f'Point {i}',
+        'Distance': i * 0.001,
+        'Bearing': i % 360 + 0.5,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    } for i in range(count)]
+
+def pandasExport(points, filetype, path):
+    '''
+    Previous exports, a DataFrame built for each format (JSON was dumped to one string)
+    '''
+    if filetype == 'JSON':
+        with open(path, 'w+') as f:
+            f.write(json.dumps(list(points), indent=2))
+        return
+
+    df = pd.DataFrame(points)
+    if filetype == 'CSV':
+        df.to_csv(path, index=False)
+    elif filetype == 'Excel':
+        df.to_excel(path, index=False)
+    else:
+        df.to_html(path, index=False)
+
+def measure(export, memory):
+    '''
+    Returns seconds taken and, if memory is True, the peak memory allocated
+    by a second run (tracemalloc slows the run down so it isn't timed)
+    '''
+    start = time.perf_counter()
+    export()
+    elapsed = time.perf_counter() - start
+
+    if not memory:
+        return elapsed, 0
+
+    tracemalloc.start()
+    export()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=100000, help='Number of points')
+parser.add_argument('--formats', type=str, default='CSV,JSON,Excel,HTML', help='Comma separated formats')
+parser.add_argument('--memory', action='store_true', help='Also measure peak memory with tracemalloc')
+parser.add_argument('--all', action='store_true', help='Also compare one pass for every format and incremental reports')
+args = parser.parse_args()
+
+points = makePoints(args.points)
+directory = tempfile.mkdtemp()
+
+for filetype in args.formats.split(','):
+    extension = ReportExporter.WRITERS[filetype].extension
+    old = os.path.join(directory, f'pandas.{extension}')
+    new = os.path.join(directory, f'stream.{extension}')
+
+    oldTime, oldPeak = measure(lambda: pandasExport(points, filetype, old), args.memory)
+    newTime, newPeak = measure(lambda: ReportExporter.export(points, [(filetype, new)]), args.memory)
+
+    same = ''
+    if filetype in ('CSV', 'JSON'):
+        with open(old, 'rb') as a, open(new, 'rb') as b:
+            same = 'identical' if a.read() == b.read() else 'DIFFERENT'
+
+    print(f'{filetype:>5}: pandas {oldTime:>7.2f} s {oldPeak / 2**20:>8.1f} MB   '
+          f'streaming {newTime:>7.2f} s {newPeak / 2**20:>8.1f} MB   {same}')
+
+if args.all:
+    formats = args.formats.split(',')
+    separate = [[(filetype, os.path.join(directory, f'separate.{ReportExporter.WRITERS[filetype].extension}'))] for filetype in formats]
+    together = [(filetype, os.path.join(directory, f'together.{ReportExporter.WRITERS[filetype].extension}')) for filetype in formats]
+
+    oldTime, _ = measure(lambda: [ReportExporter.export(points, targets) for targets in separate], False)
+    newTime, _ = measure(lambda: ReportExporter.export(points, together), False)
+    print(f'  All: one pass per format {oldTime:>7.2f} s   one pass {newTime:>7.2f} s')
+
+    #One point added since the last report
+    state = os.path.join(directory, ReportExporter.STATE)
+    rewrite, incremental = [[(filetype, os.path.join(directory, f'{name}.{ReportExporter.WRITERS[filetype].extension}'))
+                            for filetype in ('CSV', 'JSON Lines')] for name in ('rewrite', 'incremental')]
+    ReportExporter.export(points[:-1], incremental, statePath=state)
+
+    oldTime, _ = measure(lambda: ReportExporter.export(points, rewrite), False)
+    newTime, _ = measure(lambda: ReportExporter.export(points, incremental, statePath=state), False)
+    print(f'  New point, CSV and JSON Lines: rewrite {oldTime:>7.2f} s   append {newTime:>7.2f} s')
@@ -0,0 +1,102 @@
+import os
+import sys
+import math
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Geodesic
+import ColumnSnapshot
+from PointStore import PointStore
+from Reprojection import Reprojection
+
+#Time to recompute every point of a project against a new reference point and scale
+#in one vectorized pass, against locating the points one at a time like Tracker does
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=1000000, help='Number of points')
+parser.add_argument('--sample', type=int, default=20000, help='Points located one at a time to estimate the per point cost')
+parser.add_argument('--legacy', type=float, default=0.1, help='Fraction of points added before pixel offsets were stored')
+parser.add_argument('--snapshot', action='store_true', help='Also time copying the points of a binary snapshot into a PointStore')
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+offsets = rng.integers(-20000, 20000, size=(args.points, 2)).tolist()
+legacy = rng.random(args.points) < args.legacy
+
+def makePoints(start, stop):
+    points = []
+    for i in range(start, stop):
+        point = {
+            'Latitude': 38.0,
+            'Longitude': -120.0,
+            'Date': '01-01-2020 01:00:00 am',
+            'Description': f'Point {i}',
+            'Distance': 1.25,
+            'Bearing': 45.0,
+            'Units': 'km',
+            'ReferencePoint': [38.0, -120.0],
+            'Scale': 131.5
+        }
+        if not legacy[i]:
+            point['PixelDX'], point['PixelDY'] = offsets[i]
+        points.append(point)
+
+    return points
+
+def locate(dx, dy, ref, scale, units):
+    '''
+    Location of one traced offset with the arithmetic of Tracker
+    '''
+    bearing = round((360 + (90 - math.degrees(math.atan2(dy, dx)))) % 360, 4)
+    dist = round(round(math.sqrt(dx**2 + dy**2), 4) / scale, 4)
+    lat, lon = Geodesic.destination(ref, dist, bearing, units)
+
+    return round(float(lat), 5), round(float(lon), 5)
+
+store = PointStore()
+for start in range(0, args.points, 100000):
+    store.extend(makePoints(start, min(args.points, start + 100000)))
+
+start = time.perf_counter()
+result = Reprojection(store, (37.5, -121.25), 97.3, 'mi')
+reproject = time.perf_counter() - start
+
+start = time.perf_counter()
+result.apply(store)
+apply = time.perf_counter() - start
+
+sample = min(args.sample, args.points)
+start = time.perf_counter()
+for dx, dy in offsets[:sample]:
+    locate(dx, dy, (37.5, -121.25), 97.3, 'mi')
+single = (time.perf_counter() - start) / sample
+
+start = time.perf_counter()
+summary = result.summary()
+result.diff(100)
+diff = time.perf_counter() - start
+
+print(f'{args.points:,} points ({summary["Skipped"]:,} skipped, {int((~result.traced).sum()):,} without pixel offsets)')
+print(f'recompute {reproject:6.3f} s  ({reproject / args.points * 1e6:.2f} us/point)')
+print(f'apply     {apply:6.3f} s')
+print(f'diff      {diff * 1000:6.1f} ms  (100 points that moved the most of {summary["Changed"]:,} changed)')
+print(f'one at a time {single * 1e6:.1f} us/point, {single * args.points:.1f} s for every point')
+
+if args.snapshot:
+    with tempfile.TemporaryDirectory() as directory:
+        path = ColumnSnapshot.write(directory, {'Points': store}, 0)
+        points = ColumnSnapshot.Snapshot(path).projectData()['Points']
+
+        start = time.perf_counter()
+        Reprojection(points, (37.5, -121.25), 97.3, 'mi')
+        snapshot = time.perf_counter() - start
+
+        start = time.perf_counter()
+        PointStore.fromSnapshot(points)
+        copy = time.perf_counter() - start
+        del points
+
+    print(f'snapshot: recompute {snapshot:6.3f} s  copy into a PointStore {copy:6.3f} s')
@@ -0,0 +1,136 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PointModel import PointModel, LAT
+from SearchIndex import SYNC
+from ColumnSnapshot import parseDate
+
+#Latency of the points table filter bar: building the indexes, each keystroke of a
+#search and the whole setFilter call, against matching every row with a regex. Then
+#the indexes are built on the worker thread of a second model like the table does,
+#timing how long the GUI thread waits between events while they're built.
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=1000000, help='Number of points')
+parser.add_argument('--words', type=int, default=5000, help='Distinct words descriptions are made of')
+parser.add_argument('--queries', type=int, default=20, help='Searches of each kind')
+args = parser.parse_args()
+
+app = QApplication(sys.argv)
+rng = np.random.default_rng(0)
+
+#Descriptions of 2 to 4 words, short words are common like in field notes
+vocabulary = [''.join(chr(97 + c) for c in rng.integers(0, 26, rng.integers(3, 9))) for _ in range(args.words)]
+weights = 1 / np.arange(1, args.words + 1)
+words = rng.choice(args.words, (args.points, 4), p=weights / weights.sum())
+lengths = rng.integers(2, 5, args.points)
+seconds = rng.integers(0, 86400 * 365, args.points)
+
+def makePoint(i):
+    return {
+        'Latitude': 38.0 + (i % 1000) * 1e-4,
+        'Longitude': -120.0 - (i // 1000) * 1e-4,
+        'Date': time.strftime('%m-%d-%Y %I:%M:%S %p', time.gmtime(1577836800 + int(seconds[i]))).lower(),
+        'Description': ' '.join(vocabulary[w] for w in words[i, :lengths[i]]),
+        'Distance': 1.0,
+        'Bearing': 0.0,
+        'Units': 'km',
+        'ReferencePoint': (38.0, -120.0),
+        'Scale': 131.5
+    }
+
+points = [makePoint(i) for i in range(args.points)]
+model = PointModel()
+model.setPoints(points)
+model.sort(LAT, Qt.AscendingOrder)
+
+def timed(function, values):
+    '''
+    Median and slowest latency in ms of function over values
+    '''
+    times = []
+    for value in values:
+        start = time.perf_counter()
+        function(value)
+        times.append(time.perf_counter() - start)
+
+    return np.percentile(times, 50) * 1000, max(times) * 1000
+
+#Every index is built by the first query that needs it
+builds = []
+for name, criteria in [('text', {'text': vocabulary[0]}),
+                       ('date', {'dates': (parseDate('03-01-2020 00:00:00 am'), None)}),
+                       ('lat', {'lat': (38.01, 38.02)}),
+                       ('lon', {'lon': (-120.05, -120.0)})]:
+    start = time.perf_counter()
+    model.search.query(**criteria)
+    builds.append((name, time.perf_counter() - start))
+model.setFilter()
+
+#Keystrokes of searches for a word of a point and the start of its next word
+searches = [vocabulary[words[i, 0]] + ' ' + vocabulary[words[i, 1]][:2] for i in rng.integers(0, args.points, args.queries)]
+keystrokes = [s[:n] for s in searches for n in range(1, len(s) + 1)]
+day = 86400 * rng.integers(0, 300, args.queries) + parseDate('01-01-2020 00:00:00 am')
+descriptions = model.descriptions(0, len(model.pid))
+
+def regex(text):
+    '''
+    Rows of a search found by matching every description, like a filter proxy model
+    '''
+    patterns = [re.compile(r'\b' + re.escape(t), re.IGNORECASE) for t in text.split()]
+    return [i for i, d in enumerate(descriptions) if all(p.search(d) for p in patterns)]
+
+found = np.mean([model.search.query(s).sum() for s in searches])
+results = [
+    ('query keystroke', timed(lambda s: model.search.query(s), keystrokes)),
+    ('setFilter text', timed(lambda s: model.setFilter(s), keystrokes)),
+    ('setFilter all', timed(lambda d: model.setFilter(vocabulary[1][:2], (d, d + 86400 * 30), (38.0, 38.05), (-120.06, -120.0)), day)),
+    ('regex scan', timed(regex, searches[:3]))
+]
+
+#Rows loaded in batches like ProjectLoader, events are processed between batches and
+#until the worker has indexed every row. Batches are timed without a worker too.
+def load(background):
+    '''
+    Returns the model, batch times and seconds until its rows are indexed
+    '''
+    loading = PointModel(background=background)
+    batches = []
+    start = time.perf_counter()
+    for i in range(0, args.points, 10000):
+        batch = time.perf_counter()
+        loading.appendPoints(points[i:i + 10000])
+        app.processEvents()
+        batches.append(time.perf_counter() - batch)
+
+    while background and (loading.search.building or loading.search.behind(*loading.search.NAMES) > SYNC):
+        time.sleep(0.001)
+        app.processEvents()
+
+    return loading, np.array(batches) * 1000, time.perf_counter() - start
+
+plain = load(False)[1]
+background, batches, ready = load(True)
+
+start = time.perf_counter()
+background.setFilter(searches[0][:1], (day[0], day[0] + 86400 * 30), (38.0, 38.05), (-120.06, -120.0))
+first = time.perf_counter() - start
+
+print(f'{args.points:,} points, {args.words:,} words, searches find {found:,.0f} points on average')
+for name, build in builds:
+    print(f'build {name:5} {build:7.3f} s')
+for name, (p50, worst) in results:
+    print(f'{name:15} p50 {p50:8.2f} ms  max {worst:8.2f} ms')
+print(f'load batch      p50 {np.percentile(plain, 50):8.2f} ms  max {plain.max():8.2f} ms')
+print(f'load + worker   p50 {np.percentile(batches, 50):8.2f} ms  max {batches.max():8.2f} ms')
+print(f'worker indexed every row {ready:.3f} s after the first batch, first setFilter {first * 1000:.2f} ms')
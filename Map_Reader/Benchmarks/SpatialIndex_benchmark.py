@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PointStore import PointStore
+from SpatialIndex import SpatialIndex, EARTH_RADIUS
+
+#Query latency of the spatial index against scanning every point, and the cost of
+#building it and of adding points one at a time like MainWindow.setLocation
+parser = argparse.ArgumentParser()
+parser.add_argument('--points', type=int, default=1000000, help='Number of points')
+parser.add_argument('--extent', type=float, default=100, help='Width in km of the square the points are spread over')
+parser.add_argument('--cell', type=float, default=1000, help='Grid cell edge in meters')
+parser.add_argument('--queries', type=int, default=200, help='Queries of each kind')
+parser.add_argument('--radius', type=float, default=500, help='Radius of radius queries in meters')
+parser.add_argument('--k', type=int, default=10, help='Points of nearest queries')
+parser.add_argument('--geopy', type=int, default=20000, help='Points measured with geopy to estimate a geopy scan, 0 to skip')
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+degrees = args.extent / 111.0
+lat = 38.0 + rng.random(args.points) * degrees
+lon = -120.0 + rng.random(args.points) * degrees / np.cos(np.radians(38.0))
+
+store = PointStore()
+for start in range(0, args.points, 100000):
+    store.extend([{
+        'Latitude': a,
+        'Longitude': b,
+        'Date': '01-01-2020 01:00:00 am',
+        'Description': 'Point',
+        'Distance': 1.0,
+        'Bearing': 0.0,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 100.0
+    } for a, b in zip(lat[start:start + 100000].tolist(), lon[start:start + 100000].tolist())])
+
+queries = np.column_stack((38.0 + rng.random(args.queries) * degrees,
+                           -120.0 + rng.random(args.queries) * degrees / np.cos(np.radians(38.0)))).tolist()
+
+def scan(qlat, qlon):
+    '''
+    Haversine distances of every point, the vectorized way without an index
+    '''
+    a, b, c, d = map(np.radians, (qlat, qlon, lat, lon))
+    h = np.sin((c - a) / 2)**2 + np.cos(a) * np.cos(c) * np.sin((d - b) / 2)**2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(h))
+
+def timed(function):
+    '''
+    Median and 99th percentile latency in ms of function over the queries
+    '''
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        function(*q)
+        times.append(time.perf_counter() - start)
+
+    return np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000
+
+start = time.perf_counter()
+index = SpatialIndex.fromPoints(store, args.cell)
+build = time.perf_counter() - start
+
+start = time.perf_counter()
+for point in store[:1000]:
+    index.addPoints([point])
+add = (time.perf_counter() - start) / 1000
+
+found = np.mean([len(index.radius(a, b, args.radius)[0]) for a, b in queries[:20]])
+side = args.radius / 111320.0
+results = [
+    ('radius', timed(lambda a, b: index.radius(a, b, args.radius))),
+    ('nearest', timed(lambda a, b: index.nearest(a, b, args.k))),
+    ('box', timed(lambda a, b: index.box(a - side, b - side, a + side, b + side))),
+    ('scan radius', timed(lambda a, b: np.flatnonzero(scan(a, b) <= args.radius))),
+    ('scan nearest', timed(lambda a, b: np.argpartition(scan(a, b), args.k)[:args.k]))
+]
+
+print(f'{args.points:,} points over {args.extent:g} km, {len(index.cells):,} cells of {args.cell:g} m')
+print(f'build {build:6.3f} s, add one point {add * 1e6:.1f} us')
+print(f'{args.radius:g} m radius finds {found:,.0f} points on average')
+for name, (p50, p99) in results:
+    print(f'{name:13} p50 {p50:8.3f} ms  p99 {p99:8.3f} ms')
+
+if args.geopy:
+    from geopy.distance import geodesic
+
+    sample = min(args.geopy, args.points)
+    start = time.perf_counter()
+    for a, b in zip(lat[:sample].tolist(), lon[:sample].tolist()):
+        geodesic(queries[0], (a, b)).meters
+    single = (time.perf_counter() - start) / sample
+    print(f'geopy scan    {single * args.points:8.1f} s  ({single * 1e6:.1f} us/point)')
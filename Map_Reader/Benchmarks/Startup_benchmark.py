@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+SOURCE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Modules only needed after a project is opened, the starter window must not load them
+DEFERRED = ['pandas', 'requests', 'geopy', 'PyQt5.QtWebEngineWidgets', 'MainWindow', 'numpy']
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+#Cold start of Starter.py: time to first window and import time of each module
+#Exits with status 1 if the median time to first window is over --budget or a
+#deferred module is loaded before the first window
+def firstWindow():
+    '''
+    Run in a new interpreter, show the starter window and print the time it
+    was shown and the deferred modules loaded
+    '''
+    sys.path.insert(0, SOURCE)
+    os.chdir(tempfile.mkdtemp())
+
+    from PyQt5.QtCore import Qt, QCoreApplication
+    from PyQt5.QtWidgets import QApplication
+    from Starter import StarterWindow
+
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1])
+    window = StarterWindow()
+    app.processEvents()
+
+    print(json.dumps({'Shown': time.time(), 'Loaded': [m for m in DEFERRED if m in sys.modules]}))
+
+def measure():
+    '''
+    Returns seconds from starting the interpreter to the first window and the deferred modules loaded
+    '''
+    start = time.time()
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+
+    return result['Shown'] - start, result['Loaded']
+
+def importTimes():
+    '''
+    Returns (cumulative us, self us, module) of modules imported by Starter and its
+    direct imports, parsed from python -X importtime
+    '''
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import Starter'],
+                         cwd=SOURCE, capture_output=True, text=True).stderr
+
+    times = []
+    for line in err.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match and len(match.group(3)) <= 4:
+            times.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+
+    return times
+
+if __name__ == '__main__':
+    if '--child' in sys.argv:
+        firstWindow()
+        sys.exit()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts')
+    parser.add_argument('--budget', type=float, default=500, help='Maximum median time to first window in ms')
+    parser.add_argument('--top', type=int, default=12, help='Number of modules in the import breakdown')
+    args = parser.parse_args()
+
+    times = importTimes()
+    print('import breakdown (cumulative, self):')
+    for cumulative, own, name in sorted(times, reverse=True)[:args.top]:
+        print(f'  {name:<32} {cumulative / 1000:>8.1f} ms {own / 1000:>8.1f} ms')
+
+    runs = [measure() for _ in range(args.runs)]
+    elapsed = [seconds * 1000 for seconds, _ in runs]
+    loaded = sorted(set(m for _, modules in runs for m in modules))
+    median = statistics.median(elapsed)
+
+    print(f'time to first window: median {median:.0f} ms  min {min(elapsed):.0f} ms  max {max(elapsed):.0f} ms  budget {args.budget:.0f} ms')
+
+    failed = False
+    if median > args.budget:
+        print(f'FAIL: cold start is {median - args.budget:.0f} ms over budget')
+        failed = True
+    if loaded:
+        print(f'FAIL: loaded before the first window: {", ".join(loaded)}')
+        failed = True
+
+    sys.exit(1 if failed else 0)
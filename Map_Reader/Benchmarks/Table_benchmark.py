@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QWidget
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Table import Table
+
+#Time to add one point to a table already holding N points. The median shows the cost of
+#a typical append, the mean also includes the columns growing now and then
+
+#Provides the slots Table connects its buttons to
+class TableParent(QWidget):
+    def referenceWindow(self): pass
+    def scaleTracker(self): pass
+    def locationTracker(self): pass
+    def plotPoints(self): pass
+    def recomputeWindow(self): pass
+    def traverseTracker(self): pass
+    def spatialQueryWindow(self): pass
+
+def makePoint(i):
+    return {
+        'Latitude': 38.0 + i * 1e-5,
+        'Longitude': -120.0 - i * 1e-5,
+        'Date': '01-01-2020 12:00:00 pm',
+        'Description': f'Point {i}'
+    }
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--sizes', type=str, default='1000,10000,50000', help='Comma separated table sizes')
+parser.add_argument('--appends', type=int, default=1000, help='Points appended to each table')
+parser.add_argument('--rebuild', action='store_true', help='Also time the full rebuild of Table.update')
+args = parser.parse_args()
+
+app = QApplication(sys.argv)
+
+for size in map(int, args.sizes.split(',')):
+    parent = TableParent()
+    table = Table(parent)
+    points = [makePoint(i) for i in range(size)]
+    table.update(points)
+
+    times = []
+    for i in range(args.appends):
+        point = makePoint(size + i)
+        points.append(point)
+        start = time.perf_counter()
+        table.appendRow(point)
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    mean = statistics.mean(times)
+    print(f'{size:>9,} rows: appendRow median {median * 1e6:>8,.1f} us  mean {mean * 1e6:>8,.1f} us')
+
+    if args.rebuild:
+        points.append(makePoint(len(points)))
+        start = time.perf_counter()
+        table.update(points)
+        print(f'{"":>15} update           {(time.perf_counter() - start) * 1e6:>10,.1f} us')
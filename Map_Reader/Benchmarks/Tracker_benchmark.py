@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import argparse
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt, QPoint, QEvent
+from PyQt5.QtGui import QMouseEvent, QCursor
+from PyQt5.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Tracker
+
+#Micro-benchmark of motion events/second handled by Tracker.mouseMoveEvent
+parser = argparse.ArgumentParser()
+parser.add_argument('--events', type=int, default=20000, help='Number of motion events')
+parser.add_argument('--coalesce', action='store_true', help='Benchmark coalesce mode')
+parser.add_argument('--baseline', action='store_true', help='Also benchmark the uncached reads for a before/after comparison')
+args = parser.parse_args()
+
+#Tracker reading the window geometry and the cursor for every motion sample, the way
+#it did before the center and boundaries were cached and the event position was used
+class UncachedTracker(Tracker.Tracker):
+    def getCenter(self):
+        self.updateGeometry()
+        return self.center
+
+    def getCursorPos(self):
+        return Tracker.Point(self.cursor.pos().x(), self.cursor.pos().y())
+
+    def trackMotion(self, curPos=None):
+        geo = self.geometry()
+        cur = self.cursor
+        center = self.getCenter()
+
+        #Each distance reads the center and the cursor again
+        self.dx_px = self.getCursorPos().x - self.getCenter().x
+        self.dy_px = self.getCenter().y - self.getCursorPos().y
+        self.dirty = True
+
+        if {cur.pos().x(), cur.pos().y()} & {0, geo.width()-1, geo.height()-1}:
+            self.dx += self.dx_px
+            self.dy += self.dy_px
+            self.dx_px = 0
+            self.dy_px = 0
+            cur.setPos(center.x, center.y)
+
+app = QApplication(sys.argv)
+
+runs = [(mode, Tracker.Tracker, 'cached') for mode in ['scale', 'location']]
+if args.baseline:
+    runs += [(mode, UncachedTracker, 'uncached') for mode in ['scale', 'location']]
+
+for mode, cls, name in runs:
+    tracker = cls(
+        mode,
+        ref=(38.0, -120.0),
+        scale=131.5,
+        units='km',
+        coalesce=args.coalesce)
+    app.processEvents()
+
+    center = tracker.getCenter()
+    events = [
+        QMouseEvent(
+            QEvent.MouseMove,
+            QPoint(i % 200, i % 150),
+            QPoint(center.x + i % 200, center.y - i % 150),
+            Qt.LeftButton,
+            Qt.LeftButton,
+            Qt.NoModifier)
+        for i in range(args.events)]
+
+    #Cursor is moved with each event like a real mouse would
+    cursor = QCursor()
+
+    start = time.perf_counter()
+    for e in events:
+        cursor.setPos(e.globalPos())
+        tracker.mouseMoveEvent(e)
+    elapsed = time.perf_counter() - start
+
+    print(f'{mode:>8} {name:>8}: {args.events / elapsed:>12,.0f} events/s')
+    tracker.close()
@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+import argparse
+
+#Run without a display unless one is requested
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtCore import Qt, QPoint, QEvent
+from PyQt5.QtGui import QMouseEvent, QCursor
+from PyQt5.QtWidgets import QApplication, QWidget
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Tracker
+from TraceRecorder import loadTrace, RECENTRE
+
+#Headless harness replaying motion streams through Tracker to measure throughput and latency
+
+#Receives the values Tracker passes to its parent on release
+class ReplayParent(QWidget):
+    def __init__(self):
+        super(ReplayParent, self).__init__()
+        self.result = {}
+
+    def confirmScale(self, dist_px):
+        self.result = {'Distance_px': dist_px}
+
+    def confirmLocation(self, lat, lon, dist, bearing, units, dx=None, dy=None):
+        self.result = {'Location': (lat, lon), 'Distance': dist, 'Bearing': bearing, 'Units': units, 'Pixels': (dx, dy)}
+
+def syntheticDeltas(events, step=4, drift=(1, 1), seed=0):
+    '''
+    Generate a random walk of relative mouse motion
+
+    Args:
+        events (int): number of motion samples
+        step (int): max random step in pixels in each direction
+        drift (tuple): constant x, y motion added to every sample
+        seed (int): random seed
+
+    Returns:
+        deltas (array): (events, 2) int array of x, y motion with y down
+    '''
+    rng = np.random.default_rng(seed)
+    deltas = rng.integers(-step, step + 1, size=(events, 2))
+
+    return deltas + np.array(drift)
+
+def traceDeltas(path):
+    '''
+    Convert a recorded trace file to relative mouse motion. Local offsets
+    are measured from the center so motion restarts from 0 after a recentre.
+
+    Args:
+        path (str): path of trace file
+
+    Returns:
+        deltas (array): (events, 2) int array of x, y motion with y down
+    '''
+    _, records = loadTrace(path)
+
+    local = np.stack([records['DX'], -records['DY'].astype(np.int64)], axis=1)
+    previous = np.zeros_like(local)
+    previous[1:] = local[:-1]
+
+    #Samples following a recentre start again from the center
+    recentred = (records['Flags'][:-1] & RECENTRE).astype(bool)
+    previous[1:][recentred] = 0
+
+    return local - previous
+
+def mouseEvent(eventType, pos):
+    return QMouseEvent(eventType, pos, pos, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+def replay(app, mode, deltas, coalesce=False, asyncPreview=False):
+    '''
+    Replay motion through a Tracker between a press and release event. The
+    cursor is moved like the OS would, clamped to the screen and warped back
+    to the center whenever Tracker recentres it.
+
+    Returns:
+        report (dict): throughput, latency percentiles and final values
+    '''
+    parent = ReplayParent()
+    tracker = Tracker.Tracker(
+        mode,
+        parent,
+        ref=(38.0, -120.0),
+        scale=131.5,
+        units='km',
+        coalesce=coalesce,
+        asyncPreview=asyncPreview)
+    app.processEvents()
+
+    cursor = QCursor()
+    geo = tracker.geometry()
+    center = tracker.getCenter()
+    latency = np.empty(len(deltas), dtype=np.int64)
+
+    pos = QPoint(center.x, center.y)
+    QApplication.sendEvent(tracker, mouseEvent(QEvent.MouseButtonPress, pos))
+
+    start = time.perf_counter()
+    for i, (dx, dy) in enumerate(deltas):
+        #Move from wherever the cursor is, Tracker may have warped it to the center
+        pos = cursor.pos() + QPoint(int(dx), int(dy))
+        pos.setX(min(max(pos.x(), geo.x()), geo.x() + geo.width() - 1))
+        pos.setY(min(max(pos.y(), geo.y()), geo.y() + geo.height() - 1))
+        cursor.setPos(pos)
+
+        t = time.perf_counter_ns()
+        QApplication.sendEvent(tracker, mouseEvent(QEvent.MouseMove, pos))
+        latency[i] = time.perf_counter_ns() - t
+
+        #Let frame timer and worker results through
+        if coalesce or asyncPreview:
+            app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    totals = (tracker.dx + tracker.dx_px, tracker.dy + tracker.dy_px)
+    cache = tracker.offsetCache.stats()
+    QApplication.sendEvent(tracker, mouseEvent(QEvent.MouseButtonRelease, cursor.pos()))
+    tracker.close()
+
+    report = {
+        'Mode': mode,
+        'Events': len(deltas),
+        'EventsPerSecond': len(deltas) / elapsed if elapsed else 0,
+        'LatencyUs': {p: np.percentile(latency, p) / 1000 for p in (50, 90, 99, 100)} if len(deltas) else {},
+        'DX': totals[0],
+        'DY': totals[1],
+        'Cache': cache
+    }
+    report.update(parent.result)
+
+    return report
+
+def printReport(report):
+    print(f"{report['Mode']}:")
+    print(f"\tevents:      {report['Events']}")
+    print(f"\tevents/s:    {report['EventsPerSecond']:,.0f}")
+    for p, us in report['LatencyUs'].items():
+        print(f"\tp{p:<3} (us):   {us:,.1f}")
+    print(f"\tdx, dy (px): {report['DX']}, {report['DY']}")
+    for key in ['Distance_px', 'Distance', 'Bearing', 'Location']:
+        if key in report:
+            print(f"\t{key}: {report[key]}")
+    if report['Mode'] == 'location':
+        print(f"\tcache:       {report['Cache']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trace', type=str, help='Replay a recorded trace file instead of synthetic motion')
+    parser.add_argument('--events', type=int, default=5000, help='Number of synthetic motion events')
+    parser.add_argument('--step', type=int, default=4, help='Max random step of synthetic motion in pixels')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of synthetic motion')
+    parser.add_argument('--modes', type=str, default='scale,location', help='Comma separated Tracker modes')
+    parser.add_argument('--coalesce', action='store_true', help='Replay in coalesce mode')
+    parser.add_argument('--async', dest='asyncPreview', action='store_true', help='Replay with async preview')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    if args.trace:
+        deltas = traceDeltas(args.trace)
+    else:
+        deltas = syntheticDeltas(args.events, args.step, seed=args.seed)
+
+    for mode in args.modes.split(','):
+        printReport(replay(app, mode, deltas, args.coalesce, args.asyncPreview))
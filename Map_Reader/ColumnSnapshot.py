@@ -0,0 +1,522 @@
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import ProjectJournal
+
+#Header: magic, version, flags, metadata length, point count, string heap length
+HEADER = struct.Struct('<8sHHIQQ')
+MAGIC = b'MRSNAP\0\0'
+VERSION = 2
+
+#Snapshots written before the pixel offset columns were added are still read
+VERSIONS = (1, 2)
+
+#Snapshots are named project_data.{JournalSeq}.bin, a new name per compaction so
+#a snapshot mapped by an open project is never overwritten
+SNAPSHOT = re.compile(r'project_data\.(\d+)\.bin$')
+
+#Fixed width columns in file order, followed by offsets of the strings in the heap
+FLOATS = ['Latitude', 'Longitude', 'Distance', 'Bearing', 'Scale', 'RefLat', 'RefLon']
+PIXELS = ['PixelDX', 'PixelDY']
+STRINGS = ['Description', 'Units']
+FIELDS = frozenset(['Latitude', 'Longitude', 'Date', 'Description', 'Distance', 'Bearing', 'Units', 'ReferencePoint', 'Scale',
+                    'PixelDX', 'PixelDY'])
+
+#Dates written by QDateTime.toString('MM-dd-yyyy hh:mm:ss ap')
+DATE = re.compile(r'(\d\d-\d\d-\d{4}) (0[1-9]|1[0-2]):([0-5]\d):([0-5]\d) ([ap]m)$')
+
+#Timestamp of a Date that isn't in the MM-dd-yyyy hh:mm:ss ap format, the Date is kept in Extras
+NO_TIME = np.iinfo(np.int64).min
+
+#Pixel offset of a point without a traced offset (added before offsets were stored) or
+#with an offset that isn't an int, an offset that isn't an int is kept in Extras
+NO_PIXEL = np.iinfo(np.int64).min
+EPOCH = datetime(1970, 1, 1)
+
+#Days since 1970 of the MM-dd-yyyy dates already parsed
+DAYS = {}
+
+def align(n):
+    return (n + 7) & ~7
+
+def parseDay(day):
+    '''
+    Days since 1970 of MM-dd-yyyy, None if it isn't a valid date
+    '''
+    try:
+        return (datetime(int(day[6:10]), int(day[0:2]), int(day[3:5])) - EPOCH).days
+    except ValueError:
+        return None
+
+def parseDate(date):
+    '''
+    Seconds since 1970 of a point date (MM-dd-yyyy hh:mm:ss ap), NO_TIME if
+    the date isn't in that exact format. Days are cached, points of a project
+    are dated on few different days.
+    '''
+    match = DATE.match(date) if isinstance(date, str) else None
+    if not match:
+        return NO_TIME
+
+    day, hour, minute, second, ap = match.groups()
+    if day not in DAYS:
+        DAYS[day] = parseDay(day)
+    if DAYS[day] is None:
+        return NO_TIME
+
+    return DAYS[day] * 86400 + (int(hour) % 12 + (12 if ap == 'pm' else 0)) * 3600 + int(minute) * 60 + int(second)
+
+def parseDates(dates):
+    '''
+    parseDate of many dates as an int64 array. Dates are read as one block of
+    characters with NumPy when they all have the length of the format, dates
+    that don't pass the checks are parsed one by one.
+    '''
+    count = len(dates)
+    try:
+        text = '\n'.join(dates).encode('utf-8') + b'\n'
+    except TypeError:
+        text = b''
+
+    width = len('MM-dd-yyyy hh:mm:ss ap\n')
+    if not count or len(text) != count * width:
+        return np.fromiter(map(parseDate, dates), dtype=np.int64, count=count)
+
+    chars = np.frombuffer(text, dtype=np.uint8).reshape(count, width)
+    if not (chars[:, -1] == ord('\n')).all():
+        return np.fromiter(map(parseDate, dates), dtype=np.int64, count=count)
+
+    def number(start, stop):
+        value = np.zeros(count, dtype=np.int64)
+        for i in range(start, stop):
+            value = value * 10 + chars[:, i] - ord('0')
+        return value
+
+    valid = np.ones(count, dtype=bool)
+    for i in [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]:
+        valid &= (chars[:, i] >= ord('0')) & (chars[:, i] <= ord('9'))
+    for i, c in [(2, '-'), (5, '-'), (10, ' '), (13, ':'), (16, ':'), (19, ' '), (21, 'm')]:
+        valid &= chars[:, i] == ord(c)
+    pm = chars[:, 20] == ord('p')
+    valid &= pm | (chars[:, 20] == ord('a'))
+
+    month, day, year = number(0, 2), number(3, 5), number(6, 10)
+    hour, minute, second = number(11, 13), number(14, 16), number(17, 19)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (year >= 1)
+    valid &= (hour >= 1) & (hour <= 12) & (minute <= 59) & (second <= 59)
+
+    #Days since 1970 of the first day of the month, the day must be in the month
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0)
+    first = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    valid &= day <= (months + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) - first
+
+    seconds = (first + day - 1) * 86400 + (hour % 12 + 12 * pm) * 3600 + minute * 60 + second
+    for i in np.flatnonzero(~valid).tolist():
+        seconds[i] = parseDate(dates[i])
+
+    return seconds
+
+def formatDate(seconds):
+    '''
+    Point date text (MM-dd-yyyy hh:mm:ss ap) of seconds since 1970
+    '''
+    time = EPOCH + timedelta(seconds=int(seconds))
+    return time.strftime('%m-%d-%Y %I:%M:%S ') + ('pm' if time.hour >= 12 else 'am')
+
+def isNumber(value):
+    return type(value) is float
+
+def toFloat(value):
+    '''
+    Float of a numeric point value, NaN for None and values that aren't numbers
+    '''
+    return float(value) if type(value) in (float, int) else np.nan
+
+def floatColumn(values, field, extra):
+    '''
+    Float64 array of values, values that aren't floats are NaN and kept with extra()
+    '''
+    if set(map(type, values)) - {float}:
+        values = list(values)
+        for i, value in enumerate(values):
+            if not isNumber(value):
+                extra(i, field, value)
+                values[i] = np.nan
+
+    return np.array(values, dtype=np.float64)
+
+def pixelColumn(points, field, extra):
+    '''
+    Int64 array of the pixel offsets of points, NO_PIXEL if a point has none. Offsets
+    that aren't ints are NO_PIXEL and kept with extra().
+    '''
+    values = [p.get(field, NO_PIXEL) for p in points]
+    for i, value in enumerate(values):
+        if value is not NO_PIXEL and not (type(value) is int and NO_PIXEL < value < 2**63):
+            extra(i, field, value)
+            values[i] = NO_PIXEL
+
+    return np.array(values, dtype=np.int64)
+
+def write(directory, state, seq):
+    '''
+    Write the binary snapshot of state to project_data.{seq}.bin through a
+    temporary file and remove older snapshots
+
+    Args:
+        directory (str): project directory
+        state (dict): project data in the project_data.json layout
+        seq (int): last journal Seq contained in state
+
+    Returns:
+        path (str): path of the snapshot
+    '''
+    points = list(state.get('Points') or [])
+    count = len(points)
+    extras = {}
+
+    def extra(i, field, value):
+        extras.setdefault(str(i), {})[field] = value
+
+    #Values that don't fit their column exactly (None, int, unknown fields, ...) go to Extras
+    columns = {}
+    for field in ['Latitude', 'Longitude', 'Distance', 'Bearing', 'Scale']:
+        columns[field] = floatColumn([p.get(field) for p in points], field, extra)
+
+    refs = [p.get('ReferencePoint') for p in points]
+    for i, ref in enumerate(refs):
+        if not (isinstance(ref, (list, tuple)) and len(ref) == 2 and isNumber(ref[0]) and isNumber(ref[1])):
+            extra(i, 'ReferencePoint', ref)
+            refs[i] = (np.nan, np.nan)
+    refs = np.array(refs, dtype=np.float64).reshape(count, 2)
+    columns['RefLat'] = np.ascontiguousarray(refs[:, 0])
+    columns['RefLon'] = np.ascontiguousarray(refs[:, 1])
+
+    timestamps = np.array([parseDate(p.get('Date')) for p in points], dtype=np.int64)
+    for i in np.flatnonzero(timestamps == NO_TIME):
+        extra(int(i), 'Date', points[i].get('Date'))
+
+    for field in PIXELS:
+        columns[field] = pixelColumn(points, field, extra)
+
+    heap = []
+    offsets = {}
+    size = 0
+    for field in STRINGS:
+        values = [p.get(field) for p in points]
+        if set(map(type, values)) - {str}:
+            for i, value in enumerate(values):
+                if not isinstance(value, str):
+                    extra(i, field, value)
+                    values[i] = ''
+
+        encoded = [value.encode('utf-8') for value in values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.uint64, count=count)
+        offsets[field] = np.concatenate((np.zeros(1, dtype=np.uint64), np.cumsum(lengths, dtype=np.uint64))) + np.uint64(size)
+        size += int(lengths.sum())
+        heap.extend(encoded)
+
+    for i, p in enumerate(points):
+        if not p.keys() <= FIELDS:
+            for field in p.keys() - FIELDS:
+                extra(i, field, p[field])
+
+    meta = {k: v for k, v in state.items() if k != 'Points'}
+    meta['JournalSeq'] = seq
+    meta['Extras'] = extras
+    meta = json.dumps(meta).encode('utf-8')
+
+    path = os.path.join(directory, f'project_data.{seq}.bin')
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(meta), count, size))
+        f.write(meta.ljust(align(len(meta)), b'\0'))
+        for field in FLOATS:
+            f.write(columns[field].tobytes())
+        f.write(timestamps.tobytes())
+        for field in PIXELS:
+            f.write(columns[field].tobytes())
+        for field in STRINGS:
+            f.write(offsets[field].tobytes())
+        f.write(b''.join(heap))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+    #An older snapshot may still be mapped by an open project, it is removed next time
+    for name, snapSeq in snapshots(directory):
+        if snapSeq < seq:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    return path
+
+def snapshots(directory):
+    '''
+    Return (filename, seq) of binary snapshots sorted by seq
+    '''
+    found = []
+    for name in os.listdir(directory):
+        match = SNAPSHOT.match(name)
+        if match:
+            found.append((name, int(match.group(1))))
+
+    return sorted(found, key=lambda s: s[1])
+
+def latest(directory):
+    '''
+    Open the newest binary snapshot of a project, None if there is none or
+    project_data.json was written after it (e.g. by an older version)
+    '''
+    found = snapshots(directory)
+    if not found:
+        return None
+
+    path = os.path.join(directory, found[-1][0])
+    jsonPath = os.path.join(directory, ProjectJournal.SNAPSHOT)
+    if os.path.exists(jsonPath) and os.path.getmtime(jsonPath) > os.path.getmtime(path):
+        return None
+
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError):
+        return None
+
+#Read only view of a binary snapshot, columns are NumPy views of the mapped file
+class Snapshot():
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, metaLen, self.count, heapLen = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version not in VERSIONS:
+            raise ValueError(f'{path} is not a project snapshot')
+
+        offset = HEADER.size
+        self.meta = json.loads(self.map[offset:offset + metaLen].decode('utf-8'))
+        self.extras = {int(i): e for i, e in self.meta.pop('Extras', {}).items()}
+        offset += align(metaLen)
+
+        n = self.count
+        self.columns = {}
+        for field in FLOATS:
+            self.columns[field] = np.frombuffer(self.map, dtype=np.float64, count=n, offset=offset)
+            offset += n * 8
+        self.columns['Timestamp'] = np.frombuffer(self.map, dtype=np.int64, count=n, offset=offset)
+        offset += n * 8
+        for field in PIXELS:
+            if version < 2:
+                self.columns[field] = np.full(n, NO_PIXEL, dtype=np.int64)
+                continue
+            self.columns[field] = np.frombuffer(self.map, dtype=np.int64, count=n, offset=offset)
+            offset += n * 8
+        for field in STRINGS:
+            self.columns[field] = np.frombuffer(self.map, dtype=np.uint64, count=n + 1, offset=offset)
+            offset += (n + 1) * 8
+
+        self.heap = memoryview(self.map)[offset:offset + heapLen]
+
+    def string(self, field, i):
+        if i in self.extras and field in self.extras[i]:
+            return self.extras[i][field]
+
+        offsets = self.columns[field]
+        return bytes(self.heap[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def number(self, field, i):
+        if i in self.extras and field in self.extras[i]:
+            return self.extras[i][field]
+
+        return float(self.columns[field][i])
+
+    def date(self, i):
+        if i in self.extras and 'Date' in self.extras[i]:
+            return self.extras[i]['Date']
+
+        return formatDate(self.columns['Timestamp'][i])
+
+    def reference(self, i):
+        if i in self.extras and 'ReferencePoint' in self.extras[i]:
+            return self.extras[i]['ReferencePoint']
+
+        return [float(self.columns['RefLat'][i]), float(self.columns['RefLon'][i])]
+
+    def point(self, i):
+        '''
+        Point i as a dict in the project_data.json layout
+        '''
+        point = {
+            'Latitude': self.number('Latitude', i),
+            'Longitude': self.number('Longitude', i),
+            'Date': self.date(i),
+            'Description': self.string('Description', i),
+            'Distance': self.number('Distance', i),
+            'Bearing': self.number('Bearing', i),
+            'Units': self.string('Units', i),
+            'ReferencePoint': self.reference(i),
+            'Scale': self.number('Scale', i)
+        }
+        for field in PIXELS:
+            if i in self.extras and field in self.extras[i]:
+                point[field] = self.extras[i][field]
+            elif self.columns[field][i] != NO_PIXEL:
+                point[field] = int(self.columns[field][i])
+        for field, value in self.extras.get(i, {}).items():
+            if field not in point:
+                point[field] = value
+
+        return point
+
+    def projectData(self):
+        '''
+        Returns the project in the project_data.json layout, points are
+        read from the snapshot when used (see SnapshotPoints)
+        '''
+        data = dict(self.meta)
+        data['Points'] = SnapshotPoints(self)
+
+        return data
+
+#Column of a snapshot read on demand, values set, appended or deleted later are kept in memory
+class LazyColumn():
+    def __init__(self, count, getter):
+        self.count = count
+        self.getter = getter
+        self.changed = {}
+        self.tail = []
+        self.items = None
+
+    def __len__(self):
+        return len(self.items) if self.items is not None else self.count + len(self.tail)
+
+    def __getitem__(self, i):
+        if self.items is not None:
+            return self.items[i]
+        if i < 0:
+            i += len(self)
+        if i >= self.count:
+            return self.tail[i - self.count]
+        if i in self.changed:
+            return self.changed[i]
+
+        return self.getter(i)
+
+    def __setitem__(self, i, value):
+        if self.items is not None:
+            self.items[i] = value
+        elif i >= self.count:
+            self.tail[i - self.count] = value
+        else:
+            self.changed[i] = value
+
+    def __delitem__(self, i):
+        #Rows are rarely removed, read the whole column once
+        if self.items is None:
+            self.items = [self[j] for j in range(len(self))]
+        del self.items[i]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def append(self, value):
+        if self.items is not None:
+            self.items.append(value)
+        else:
+            self.tail.append(value)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+#Points list of a project opened from a binary snapshot, point dicts are built when used
+class SnapshotPoints(Sequence):
+    def __init__(self, snapshot, tail=None):
+        self.snapshot = snapshot
+        self.tail = tail if tail is not None else []
+
+    def __len__(self):
+        return self.snapshot.count + len(self.tail)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('point index out of range')
+        if i >= self.snapshot.count:
+            return self.tail[i - self.snapshot.count]
+
+        return self.snapshot.point(i)
+
+    def append(self, point):
+        self.tail.append(point)
+
+    def extend(self, points):
+        self.tail.extend(points)
+
+    def copy(self):
+        '''
+        Copy sharing the snapshot, only points added since opening are copied
+        '''
+        return SnapshotPoints(self.snapshot, list(self.tail))
+
+    def column(self, field):
+        '''
+        Float64 array of a numeric field (Latitude, Distance, PixelDX, ...) of every
+        point, NaN where a point has no number. Copied from the mapped columns.
+        '''
+        snapshot = self.snapshot
+        values = snapshot.columns[field].astype(np.float64)
+        if field in PIXELS:
+            values[snapshot.columns[field] == NO_PIXEL] = np.nan
+
+        for i, extra in snapshot.extras.items():
+            if field in extra:
+                values[i] = toFloat(extra[field])
+
+        tail = np.array([toFloat(p.get(field)) for p in self.tail], dtype=np.float64)
+
+        return np.concatenate((values, tail))
+
+def toJSON(path, jsonPath):
+    '''
+    Regenerate a project_data.json file from a binary snapshot
+    '''
+    data = Snapshot(path).projectData()
+    data['Points'] = list(data['Points'])
+    ProjectJournal.atomicWrite(jsonPath, json.dumps(data, indent=2))
+
+def fromJSON(directory):
+    '''
+    Write the binary snapshot of a project from project_data.json
+
+    Returns:
+        path (str): path of the snapshot
+    '''
+    with open(os.path.join(directory, ProjectJournal.SNAPSHOT), 'r') as f:
+        data = json.loads(f.read())
+
+    return write(directory, data, data.get('JournalSeq', 0))
+
+if __name__ == '__main__':
+    #Convert a project: python ColumnSnapshot.py tojson|fromjson ./Projects/{Project_Name}
+    if len(sys.argv) != 3 or sys.argv[1] not in ('tojson', 'fromjson'):
+        sys.exit('usage: ColumnSnapshot.py tojson|fromjson PROJECT_DIRECTORY')
+
+    if sys.argv[1] == 'fromjson':
+        print(fromJSON(sys.argv[2]))
+    else:
+        found = snapshots(sys.argv[2])
+        if not found:
+            sys.exit(f'{sys.argv[2]} has no binary snapshot')
+        toJSON(os.path.join(sys.argv[2], found[-1][0]), os.path.join(sys.argv[2], 'project_data.json'))
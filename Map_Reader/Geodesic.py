@@ -0,0 +1,165 @@
+import numpy as np
+
+#Dependencies
+#numpy: conda install -c anaconda numpy
+
+#WGS84 ellipsoid used by geopy.distance.geodesic
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+#Length of each supported unit in meters (same definitions as geopy)
+UNITS = {
+    'km': 1000.0,
+    'mi': 1609.344,
+    'm': 1.0,
+    'ft': 0.3048
+}
+
+def toMeters(dist, units):
+    '''
+    Convert distances in given units to meters
+
+    Args:
+        dist (float or array): distances in units
+        units (str): one of km, mi, m, ft
+
+    Returns:
+        distances in meters (float or array)
+    '''
+    try:
+        return np.asarray(dist, dtype=np.float64) * UNITS[units]
+    except KeyError:
+        raise ValueError(units)
+
+def destination(ref, dist, bearing, units='km', tol=1e-12, maxIter=200):
+    '''
+    Solve the direct geodesic problem on the WGS84 ellipsoid for many points
+    at once using Vincenty's formulae. Results agree with
+    geopy.distance.geodesic(...).destination() to well under a millimetre.
+
+    Args:
+        ref (tuple): latitude and longitude of the reference point
+        dist (float or array): distances from the reference point in units
+        bearing (float or array): bearings in degrees from north
+        units (str): unit of dist, one of km, mi, m, ft
+        tol (float): convergence tolerance of sigma in radians
+        maxIter (int): max number of iterations
+
+    Returns:
+        lat (array): latitudes of destination points
+        lon (array): longitudes of destination points in [-180, 180)
+    '''
+    s = toMeters(dist, units)
+    alpha1 = np.radians(np.asarray(bearing, dtype=np.float64))
+    s, alpha1 = np.broadcast_arrays(s, alpha1)
+
+    phi1 = np.radians(ref[0])
+    lambda1 = np.radians(ref[1])
+
+    a, b, f = WGS84_A, WGS84_B, WGS84_F
+
+    #Reduced latitude of reference point
+    U1 = np.arctan((1 - f) * np.tan(phi1))
+    sinU1 = np.sin(U1)
+    cosU1 = np.cos(U1)
+
+    sinAlpha1 = np.sin(alpha1)
+    cosAlpha1 = np.cos(alpha1)
+
+    sigma1 = np.arctan2(np.tan(U1), cosAlpha1)
+    sinAlpha = cosU1 * sinAlpha1
+    cosSqAlpha = 1 - sinAlpha**2
+    uSq = cosSqAlpha * (a**2 - b**2) / b**2
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+
+    #Iterate sigma until every point has converged
+    sigma0 = s / (b * A)
+    sigma = sigma0
+    for _ in range(maxIter):
+        cos2SigmaM = np.cos(2 * sigma1 + sigma)
+        sinSigma = np.sin(sigma)
+        cosSigma = np.cos(sigma)
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (
+            cosSigma * (-1 + 2 * cos2SigmaM**2) -
+            B / 6 * cos2SigmaM * (-3 + 4 * sinSigma**2) * (-3 + 4 * cos2SigmaM**2)))
+        sigmaNext = sigma0 + deltaSigma
+        done = np.all(np.abs(sigmaNext - sigma) < tol)
+        sigma = sigmaNext
+        if done:
+            break
+
+    cos2SigmaM = np.cos(2 * sigma1 + sigma)
+    sinSigma = np.sin(sigma)
+    cosSigma = np.cos(sigma)
+
+    tmp = sinU1 * sinSigma - cosU1 * cosSigma * cosAlpha1
+    phi2 = np.arctan2(
+        sinU1 * cosSigma + cosU1 * sinSigma * cosAlpha1,
+        (1 - f) * np.sqrt(sinAlpha**2 + tmp**2))
+
+    lam = np.arctan2(sinSigma * sinAlpha1, cosU1 * cosSigma - sinU1 * sinSigma * cosAlpha1)
+    C = f / 16 * cosSqAlpha * (4 + f * (4 - 3 * cosSqAlpha))
+    L = lam - (1 - C) * f * sinAlpha * (sigma + C * sinSigma * (
+        cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM**2)))
+
+    lat = np.degrees(phi2)
+    lon = (np.degrees(lambda1 + L) + 180) % 360 - 180
+
+    return lat, lon
+
+#Class to approximate destinations on a local tangent plane around a reference point
+class LocalProjection():
+    def __init__(self, ref):
+        self.ref = ref
+
+        #Precompute radii of curvature of the ellipsoid at the reference latitude
+        phi = np.radians(ref[0])
+        e2 = WGS84_F * (2 - WGS84_F)
+        w = np.sqrt(1 - e2 * np.sin(phi)**2)
+
+        self.M = WGS84_A * (1 - e2) / w**3
+        self.N = WGS84_A / w
+        self.cosLat = np.cos(phi)
+        self.tanLat = abs(np.tan(phi))
+
+    def errorBound(self, dist):
+        '''
+        Estimate an upper bound of the position error in meters of the plane
+        approximation. The error grows with the square of the distance and
+        with meridian convergence towards the poles. Beyond 1% of the earth
+        radius higher order terms dominate and the bound is infinite.
+
+        Args:
+            dist (float or array): distances from the reference point in meters
+
+        Returns:
+            error bound in meters (float or array)
+        '''
+        dist = np.asarray(dist, dtype=np.float64)
+        bound = dist**2 * (self.tanLat + 1) / self.N
+
+        return np.where(dist > 0.01 * self.N, np.inf, bound)
+
+    def destination(self, dist, bearing, units='km'):
+        '''
+        Approximate destination of points from the reference point by walking
+        north and east on the local tangent plane.
+
+        Args:
+            dist (float or array): distances from the reference point in units
+            bearing (float or array): bearings in degrees from north
+            units (str): unit of dist, one of km, mi, m, ft
+
+        Returns:
+            lat (array): latitudes of destination points
+            lon (array): longitudes of destination points in [-180, 180)
+        '''
+        s = toMeters(dist, units)
+        alpha = np.radians(np.asarray(bearing, dtype=np.float64))
+
+        lat = self.ref[0] + np.degrees(s * np.cos(alpha) / self.M)
+        lon = self.ref[1] + np.degrees(s * np.sin(alpha) / (self.N * self.cosLat))
+
+        return lat, (lon + 180) % 360 - 180
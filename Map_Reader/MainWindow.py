@@ -1,14 +1,25 @@
 import sys
 import os
 
-from PyQt5.QtWidgets import QAction, QMainWindow, QMessageBox, QMenu
+from PyQt5.QtWidgets import QAction, QMainWindow, QMessageBox, QMenu, QProgressBar, QPushButton
 from PyQt5.QtCore import QDateTime, QDate
-import pandas as pd
 import json
 from functools import partial
-import requests
+
+import numpy as np
 
 import Tracker
+from OffsetCache import OffsetCache
+from TraceRecorder import TraceRecorder
+import ProjectJournal
+import ProjectStore
+import ColumnSnapshot
+from SaveScheduler import SaveScheduler
+from ProjectLoader import ProjectLoader
+from PointStore import PointStore
+from Reprojection import Reprojection
+from SpatialIndex import SpatialIndex
+import ReportExporter
 from Table import Table
 from Windows import *
 
@@ -21,10 +32,28 @@ class MainWindow(QMainWindow):
         self.scale = None
         self.reference = reference
         self.units = None
-        self.points = []
+        self.points = PointStore()
         self.savedPoints = []
         self.createdDate = createdDate
         self.api = None
+        self.offsetCache = OffsetCache()
+        self.spatialIndex = None
+        self.traceRecorder = None
+        self.journal = None
+        self.journalSeq = None
+        self.store = None
+        self.pager = None
+        self.loader = None
+        self.pendingMeta = {}
+        self.pendingPoints = []
+
+        #Reports are written on a worker thread created by the first export
+        self.exporter = None
+        self.exports = 0
+
+        #Snapshot writes requested in bursts are merged and done off the GUI thread
+        self.saveScheduler = SaveScheduler(self.captureState, self.writeState, parent=self)
+        self.saveScheduler.failed.connect(self.saveFailed)
         
         menubar = self.menuBar()
         self.fileMenu = menubar.addMenu('File')
@@ -73,6 +102,16 @@ class MainWindow(QMainWindow):
         self.menuExport.addAction(self.exportHTML)
         self.exportHTML.triggered.connect(self.exportToHTML)
 
+        self.exportJSONLines = QAction('JSON Lines', self)
+        self.menuExport.addAction(self.exportJSONLines)
+        self.exportJSONLines.triggered.connect(self.exportToJSONLines)
+
+        self.menuExport.addSeparator()
+
+        self.exportAll = QAction('All...', self)
+        self.menuExport.addAction(self.exportAll)
+        self.exportAll.triggered.connect(self.launchExportWindow)
+
         self.settingsMenu = menubar.addMenu('Settings')
 
         self.menuMouseSettings = QAction("Mouse Settings", self)
@@ -87,7 +126,12 @@ class MainWindow(QMainWindow):
         self.fileMenu.addAction(self.menuClose)
         self.fileMenu.addAction(self.menuExit)
 
+        self.menuRecordTraces = QAction("Record Traces", self)
+        self.menuRecordTraces.setCheckable(True)
+        self.menuRecordTraces.setStatusTip('Save every traced mouse movement to the project Traces folder')
+
         self.settingsMenu.addAction(self.menuMouseSettings)
+        self.settingsMenu.addAction(self.menuRecordTraces)
 
         self.setCentralWidget(self.table)
 
@@ -95,6 +139,8 @@ class MainWindow(QMainWindow):
         if openExisting:
             self.openExistingProject(self.projectName)
 
+        self.journal = self.openJournal()
+
         self.show()
     
     def setProjectName(self, name):
@@ -113,11 +159,27 @@ class MainWindow(QMainWindow):
         '''
         self.reference = point
 
+        self.setMeta(Reference=point)
+
+    def getTraceRecorder(self):
+        '''
+        Returns recorder for the project Traces folder if recording is enabled in settings
+        '''
+        if not self.menuRecordTraces.isChecked():
+            return None
+
+        directory = f'./Projects/{self.projectName}/Traces'
+
+        if not self.traceRecorder or self.traceRecorder.directory != directory:
+            self.traceRecorder = TraceRecorder(directory)
+
+        return self.traceRecorder
+
     def scaleTracker(self):
         '''
         Launches window to trace scale
         '''
-        self.scaleTracker = Tracker.Tracker('scale', self)
+        self.scaleTracker = Tracker.Tracker('scale', self, coalesce=True, recorder=self.getTraceRecorder())
 
     def confirmScale(self, dist_px):
         '''
@@ -133,6 +195,8 @@ class MainWindow(QMainWindow):
         self.units = units
         self.scaleTracker.close()
 
+        self.setMeta(Scale=scale, Units=units)
+
     def locationTracker(self):
         '''
         Launches window to locate new point from reference point
@@ -143,19 +207,92 @@ class MainWindow(QMainWindow):
                 self,
                 ref=self.reference, 
                 scale=self.scale, 
-                units=self.units)
+                units=self.units,
+                coalesce=True,
+                cache=self.offsetCache,
+                recorder=self.getTraceRecorder())
+
+    def traverseTracker(self):
+        '''
+        Launches window to trace a traverse, legs chained from the reference point
+        '''
+        if self.reference and self.scale and self.units:
+            self.traverseTracker = Tracker.Tracker(
+                'traverse',
+                self,
+                ref=self.reference,
+                scale=self.scale,
+                units=self.units,
+                coalesce=True,
+                cache=self.offsetCache,
+                recorder=self.getTraceRecorder())
+
+    def confirmTraverse(self, legs):
+        '''
+        Launches window to confirm every leg of a traverse
+        '''
+        self.traverseConfirm = TraverseWindow(legs, self)
+
+    def addTraverse(self, legs, descs):
+        '''
+        Adds the legs of a traverse as new points in one batch. The project is
+        written once for all of them instead of once a point.
+        '''
+        self.traverseTracker.close()
+
+        date = QDateTime().currentDateTime().toString('MM-dd-yyyy hh:mm:ss ap')
+        points = [{
+            'Latitude': leg['Latitude'],
+            'Longitude': leg['Longitude'],
+            'Date': date,
+            'Description': desc,
+            'Distance': leg['Distance'],
+            'Bearing': leg['Bearing'],
+            'Units': leg['Units'],
+            'ReferencePoint': self.reference,
+            'Scale': self.scale,
+            'PixelDX': leg['PixelDX'],
+            'PixelDY': leg['PixelDY']
+        } for leg, desc in zip(legs, descs)]
+
+        if self.loader:
+            self.holdPoints(points)
+            return
 
-    def confirmLocation(self, lat, lon, dist, bearing, units):
+        self.menuExport.setEnabled(True)
+
+        #Points of a SQLite project are shown now if every page is loaded, else with the last page
+        if self.store:
+            if self.pager.added(self.store.addPoints(points), points):
+                self.indexPoints(points)
+                self.table.appendRows(points)
+            return
+
+        self.points.extend(points)
+        self.indexPoints(points)
+        self.table.appendRows(points)
+
+        if self.journal:
+            self.journal.addPoints(points)
+            if self.journal.needsCompaction():
+                self.saveFile()
+        else:
+            self.saveFile()
+
+    def confirmLocation(self, lat, lon, dist, bearing, units, dx=None, dy=None):
         '''
         Launches window to confirm new point data
         '''
-        self.locationConfirm = LocationWindow(lat, lon, dist, bearing, units, self)
+        self.locationConfirm = LocationWindow(lat, lon, dist, bearing, units, self, dx=dx, dy=dy)
 
-    def setLocation(self, lat, lon, desc, dist, bearing, units):
+    def setLocation(self, lat, lon, desc, dist, bearing, units, dx=None, dy=None):
         '''
-        Adds location to points list and passes list to Table class to update table data
+        Adds location to points list and passes list to Table class to update table data.
+        The traced pixel offset (dx, dy) is stored with the point so it can be recomputed
+        against another reference point or scale, see recomputeLocations.
         '''
         self.locationTracker.close()
+
         data = {
             'Latitude': lat,
             'Longitude': lon,
@@ -167,18 +304,162 @@ class MainWindow(QMainWindow):
             'ReferencePoint': self.reference,
             'Scale': self.scale
         }
-        self.points.append(data)
-        self.table.update(self.points)
+        if dx is not None and dy is not None:
+            data['PixelDX'] = dx
+            data['PixelDY'] = dy
+
+        if self.loader:
+            self.holdPoints([data])
+            return
+
         self.menuExport.setEnabled(True)
+
+        #Points of a SQLite project are shown now if every page is loaded, else with the last page
+        if self.store:
+            if self.pager.added([self.store.addPoint(data)], [data]):
+                self.indexPoints([data])
+                self.table.appendRow(data)
+            return
+
+        self.points.append(data)
+        self.indexPoints([data])
+        self.table.appendRow(data)
+
+        #Only the new point is written, the snapshot is rewritten in the background now and then
+        if self.journal:
+            self.journal.addPoint(data)
+            if self.journal.needsCompaction():
+                self.saveFile()
+        else:
+            self.saveFile()
+
+    def holdPoints(self, points):
+        '''
+        Keeps points confirmed while the project loads, they're added after
+        the loaded points when loading finishes (see finishLoading)
+        '''
+        self.pendingPoints.extend(points)
+        self.statusBar().showMessage(f'Loading project... {len(self.pendingPoints):,} new points are added when loading finishes')
+
+    def recomputeWindow(self):
+        '''
+        Launches window to recompute point locations against a new reference point, scale or units
+        '''
+        self.loadAllPoints()
+        self.recomputeConfirm = RecomputeWindow(self.reference, self.scale, self.units, self.table.selectedRows(), self)
+
+    def previewRecompute(self, reference, scale, units, rows=None):
+        '''
+        Returns the locations of the points (all points or the ones at rows)
+        recomputed against reference, scale and units, nothing is changed yet
+        '''
+        return Reprojection(self.points, reference, scale, units, rows)
+
+    def applyRecompute(self, reprojection):
+        '''
+        Writes recomputed locations to the points, the table and the project.
+        When every point was recomputed its reference point, scale and units
+        become the ones of the project.
+        '''
+        #Points of a snapshot are read only, they are copied into a PointStore once
+        if isinstance(self.points, ColumnSnapshot.SnapshotPoints):
+            self.points = PointStore.fromSnapshot(self.points)
+
+        reprojection.apply(self.points)
+        self.spatialIndex = None
+        after = reprojection.after
+        self.table.setLocations(reprojection.rows, after['Latitude'], after['Longitude'],
+                                after['Distance'], after['Bearing'], reprojection.scale)
+
+        if len(reprojection.rows) + len(reprojection.skipped) == len(self.points):
+            self.reference = reprojection.reference
+            self.scale = reprojection.scale
+            self.units = reprojection.units
+            self.setMeta(Reference=self.reference, Scale=self.scale, Units=self.units)
+
+        #SQLite projects update the points in place, other projects write a new snapshot
+        if self.store:
+            ids = np.frombuffer(self.pager.ids, dtype=np.int64)[reprojection.rows]
+            self.store.updateLocations(ids.tolist(), *(after[field].tolist() for field in ('Latitude', 'Longitude', 'Distance', 'Bearing')),
+                                       reprojection.reference, reprojection.scale, reprojection.units)
+
+        #Reports hold the locations before they were recomputed, the next incremental
+        #export writes them again instead of only adding the new points
+        statePath = f'./Projects/{self.projectName}/Reports/{ReportExporter.STATE}'
+        if self.exporter:
+            self.exporter.forget(statePath)
+        else:
+            ReportExporter.removeState(statePath)
+
         self.saveFile()
 
+    def getSpatialIndex(self):
+        '''
+        Returns the spatial index of the points, built when first needed and
+        built again if the points were replaced since
+        '''
+        self.loadAllPoints()
+
+        if self.spatialIndex is None or len(self.spatialIndex) != len(self.points):
+            self.spatialIndex = SpatialIndex.fromPoints(self.points)
+
+        return self.spatialIndex
+
+    def indexPoints(self, points):
+        '''
+        Adds points just appended to the points list to the spatial index, if it was built
+        '''
+        if self.spatialIndex is not None and len(self.spatialIndex) + len(points) == len(self.points):
+            self.spatialIndex.addPoints(points)
+
+    def pointsNear(self, lat, lon, meters):
+        '''
+        Returns indexes and distances in meters of the points within meters of lat, lon, nearest first
+        '''
+        return self.getSpatialIndex().radius(lat, lon, meters)
+
+    def nearestPoints(self, lat, lon, k=1):
+        '''
+        Returns indexes and distances in meters of the k points nearest to lat, lon
+        '''
+        return self.getSpatialIndex().nearest(lat, lon, k)
+
+    def pointsInBox(self, south, west, north, east):
+        '''
+        Returns indexes of the points inside a latitude/longitude box
+        '''
+        return self.getSpatialIndex().box(south, west, north, east)
+
+    def spatialQueryWindow(self):
+        '''
+        Launches window to find points near a location or inside a box, centered
+        on the first selected point or the reference point
+        '''
+        selected = self.table.selectedRows()
+        if selected:
+            point = self.points[selected[0]]
+            center = (point['Latitude'], point['Longitude'])
+        else:
+            center = self.reference
+
+        self.spatialQuery = SpatialQueryWindow(center, self)
+
+    def selectPoints(self, rows):
+        '''
+        Selects the points at rows (indexes in points list) in the table
+        '''
+        self.table.selectRows(rows)
+
     def setAPI(self, api_key):
         '''
         Set api key with key provided from APIKeyWindow
         '''
         self.api = api_key
-    
-        self.saveFile()
+        self.setMeta(APIKey=api_key)
+        if not self.store and not self.journal:
+            self.saveFile()
+
+        self.loadAllPoints()
         self.mapWindow = MapWindow(self.api, self.reference, self.points)
 
     def plotPoints(self):
@@ -186,6 +467,7 @@ class MainWindow(QMainWindow):
         Launch instance of MapWindow to plot point on google maps
         '''
         #Test if network is connected before prompting for api key or launching mapwindow
+        import requests
         try:
             requests.get('https://developers.google.com/maps/documentation/javascript/get-api-key', timeout=1)
         except:
@@ -197,6 +479,7 @@ class MainWindow(QMainWindow):
             return
 
         if self.api:
+            self.loadAllPoints()
             self.mapWindow = MapWindow(self.api, self.reference, self.points)
         else:
             self.apiKeyWindow = APIKeyWindow(self)
@@ -207,49 +490,348 @@ class MainWindow(QMainWindow):
         '''
         self.mouseSettingsWindow = MouseSettingsWindow()
 
-    def saveFile(self):
+    def setMeta(self, **values):
+        '''
+        Save changed project metadata (Reference, Scale, Units, APIKey, ...)
+        to the store or journal of the project
+        '''
+        #The journal is opened when loading finishes
+        if self.loader:
+            self.pendingMeta.update(values)
+            return
+
+        for key, value in values.items():
+            if self.store:
+                self.store.setMeta(key, value)
+            elif self.journal:
+                self.journal.setMeta(key, value)
+
+    def loadAllPoints(self):
         '''
-        Saves the project data in json format and writes to a file
+        Load points of a SQLite project not paged into the table yet, needed
+        before using every point (export, plot)
         '''
-        savestate = {
+        if self.pager:
+            self.table.fetchAll()
+
+    def saveState(self):
+        '''
+        Returns a copy of the project data saved in project_data.json
+        '''
+        return {
             'ProjectName': self.projectName,
             'Created': self.createdDate,
             'LastAccessed': QDateTime().currentDateTime().toString('MM-dd-yyyy hh:mm:ss ap'),
             'Reference': self.reference,
             'Scale': self.scale,
             'Units': self.units,
-            'Points': self.points,
+            'Points': self.points.copy(),
             'APIKey': self.api
         }
 
-        with open(f'./Projects/{self.projectName}/project_data.json', 'w+') as f:
-            f.write(json.dumps(savestate, indent=2))
+    def saveFile(self):
+        '''
+        Schedules a save of the project data. Requests made in a burst are
+        written once, in the background, see SaveScheduler. SQLite projects
+        are saved on every change, only the access date is updated.
+        The project's catalog entry is updated either way.
+        '''
+        accessed = QDateTime().currentDateTime().toString('MM-dd-yyyy hh:mm:ss ap')
+
+        if self.store:
+            self.store.setMeta('LastAccessed', accessed)
+        else:
+            self.saveScheduler.schedule()
+
+        #Keep the starter window's project list current without reading the project again
+        self.parent().updateCatalog(self.projectName, {
+            'Created': self.createdDate,
+            'LastAccessed': accessed,
+            'Points': self.pager.total if self.pager else len(self.points),
+            'Reference': self.reference
+        })
+
+    def captureState(self):
+        '''
+        Called by saveScheduler on the GUI thread when a save starts
+
+        Returns:
+            (state, path, journal, seq): copy of the project data, snapshot path,
+            open journal and the last Seq the data contains (None without a journal)
+        '''
+        seq = self.journal.rotate() if self.journal else None
+
+        return self.saveState(), f'./Projects/{self.projectName}/project_data.json', self.journal, seq
+
+    def writeState(self, captured):
+        '''
+        Called by saveScheduler on its worker thread, serializes the captured
+        project data and atomically replaces project_data.json
+        '''
+        state, path, journal, seq = captured
+
+        if journal:
+            journal.writeSnapshot(state, seq)
+        else:
+            state = dict(state, Points=list(state['Points']))
+            ProjectJournal.atomicWrite(path, json.dumps(state, indent=2))
+
+    def saveFailed(self, error):
+        '''
+        Alert user when a background save fails
+        '''
+        QMessageBox.critical(
+            self,
+            'Error Saving Project',
+            f'Project data could not be saved\n{error}')
+
+    def openJournal(self):
+        '''
+        Opens the append-only journal of the project, None if the project directory doesn't exist
+        '''
+        directory = f'./Projects/{self.projectName}'
+
+        if self.store or self.loader or not os.path.isdir(directory):
+            return None
+
+        return ProjectJournal.ProjectJournal(directory, seq=self.journalSeq)
+
+    def closeProject(self):
+        '''
+        Compacts the journal into the snapshot and closes it. Waits for
+        scheduled saves so nothing is lost when the application exits.
+        '''
+        if self.loader:
+            self.stopLoading()
+
+        if self.journal:
+            self.saveFile()
+            self.saveScheduler.flush()
+            self.journal.close()
+            self.journal = None
+        else:
+            self.saveScheduler.flush()
+
+        #Let queued exports finish writing their reports
+        if self.exporter:
+            self.exporter.stop()
+            self.exporter = None
+
+        if self.store:
+            self.saveFile()
+            self.store.close()
+            self.store = None
+            self.pager = None
+
+    def closeEvent(self, e):
+        '''
+        Compact project data when the window is closed
+        '''
+        self.closeProject()
+        super(MainWindow, self).closeEvent(e)
 
     def openExistingProject(self, projectName):
         '''
         Populates table with existing project data from given project
         '''
+        if ProjectStore.exists(projectName):
+            self.openStore(projectName)
+            return
+
+        #Binary snapshot maps the point columns instead of parsing every point
+        snapshot = ColumnSnapshot.latest(projectName)
+        if not snapshot:
+            self.loadProject(projectName)
+            return
+
         try:
-            with open(f'{projectName}/project_data.json', 'r') as f:
-                data = json.loads(f.read())
+            #Apply changes journaled since the snapshot was written
+            data = ProjectJournal.replay(projectName, snapshot.projectData())
         except:
             QMessageBox.critical(
                 self,
                 'File Not Found',
                 f'{projectName} is not supported')
         else:
-            self.projectName = data.get('ProjectName')
-            self.createdDate = data.get('Created')
-            self.reference = data.get('Reference')
-            self.scale = data.get('Scale')
-            self.units = data.get('Units')
+            self.setProjectData(data)
             self.points = data.get('Points')
-            self.api = data.get('APIKey')
 
         if self.points:
             self.menuExport.setEnabled(True)
             self.table.update(self.points)
 
+    def setProjectData(self, data):
+        '''
+        Sets instance variables from project metadata, values changed while
+        the project was loading are kept
+        '''
+        for key, name in [('ProjectName', 'projectName'), ('Created', 'createdDate'), ('Reference', 'reference'),
+                          ('Scale', 'scale'), ('Units', 'units'), ('APIKey', 'api'), ('JournalSeq', 'journalSeq')]:
+            if key not in self.pendingMeta:
+                setattr(self, name, data.get(key))
+
+    def loadProject(self, projectName):
+        '''
+        Streams project_data.json and the journal on a worker thread. Points
+        are added to the table in batches, the reference and scale can be
+        set as soon as the metadata is loaded.
+        '''
+        self.loader = ProjectLoader(projectName)
+        self.loader.metadataLoaded.connect(self.loadedMetadata)
+        self.loader.pointsLoaded.connect(self.loadedPoints)
+        self.loader.finished.connect(self.finishLoading)
+        self.loader.failed.connect(self.loadingFailed)
+        self.loader.cancelled.connect(self.loadingCancelled)
+
+        #Progress and cancel button shown in the status bar while loading
+        self.loadProgress = QProgressBar()
+        self.loadProgress.setRange(0, 1000)
+        self.loader.progress.connect(self.loadProgress.setValue)
+        self.cancelLoadButton = QPushButton('Cancel')
+        self.cancelLoadButton.clicked.connect(self.cancelLoading)
+        self.statusBar().showMessage('Loading project...')
+        self.statusBar().addPermanentWidget(self.loadProgress)
+        self.statusBar().addPermanentWidget(self.cancelLoadButton)
+
+        self.setLoading(True, metadata=False)
+        self.loader.start()
+
+    def setLoading(self, loading, metadata=True):
+        '''
+        Enables actions available while loading. Points can be traced once the
+        metadata is loaded, plotting, saving and exporting need every point.
+        '''
+        self.table.addRefButton.setEnabled(metadata)
+        self.table.setScaleButton.setEnabled(metadata)
+        self.table.locateButton.setEnabled(metadata)
+        self.table.traverseButton.setEnabled(metadata)
+        self.table.plotButton.setEnabled(not loading)
+        self.table.recomputeButton.setEnabled(not loading)
+        self.table.nearbyButton.setEnabled(not loading)
+        self.menuSave.setEnabled(not loading)
+        self.menuExport.setEnabled(not loading and bool(self.points))
+
+    def loadedMetadata(self, data):
+        '''
+        Called when the metadata written before the points is loaded
+        '''
+        if not self.loader:
+            return
+
+        self.setProjectData(data)
+        self.setLoading(True)
+
+    def loadedPoints(self, points):
+        '''
+        Called with each batch of loaded points
+        '''
+        if not self.loader:
+            return
+
+        self.points.extend(points)
+        self.table.appendRows(points)
+        held = f', {len(self.pendingPoints):,} new points are added when loading finishes' if self.pendingPoints else ''
+        self.statusBar().showMessage(f'Loading project... {len(self.points):,} points{held}')
+
+    def finishLoading(self, data):
+        '''
+        Called when every point and journal record is loaded, opens the
+        journal and saves metadata changed while loading
+        '''
+        if not self.loader:
+            return
+
+        self.setProjectData(data)
+        self.stopLoading()
+
+        self.journal = self.openJournal()
+        self.setMeta(**self.pendingMeta)
+        self.pendingMeta = {}
+
+        #Points traced while loading go after the loaded points
+        points, self.pendingPoints = self.pendingPoints, []
+        if points:
+            self.points.extend(points)
+            self.indexPoints(points)
+            self.table.appendRows(points)
+            self.menuExport.setEnabled(True)
+
+            if self.journal:
+                self.journal.addPoints(points)
+                if self.journal.needsCompaction():
+                    self.saveFile()
+            else:
+                self.saveFile()
+
+    def loadingFailed(self, error):
+        '''
+        Alert user the project can't be read and return to the starter screen
+        '''
+        if not self.loader:
+            return
+
+        self.stopLoading()
+        QMessageBox.critical(
+            self,
+            'File Not Found',
+            f'{self.projectName} is not supported\n{error}')
+        self.parent().starterScreen(closeMW=True)
+
+    def cancelLoading(self):
+        '''
+        Ask the loader to stop, it can't be stopped with a queued call while it's loading
+        '''
+        self.loader.cancel()
+
+    def loadingCancelled(self):
+        '''
+        Close the partially loaded project without saving it
+        '''
+        if not self.loader:
+            return
+
+        self.stopLoading()
+        self.pendingMeta = {}
+        self.pendingPoints = []
+        self.parent().starterScreen(closeMW=True)
+
+    def stopLoading(self):
+        '''
+        Stop the loader thread and remove the progress from the status bar
+        '''
+        self.loader.stop()
+        self.loader = None
+
+        self.statusBar().removeWidget(self.loadProgress)
+        self.statusBar().removeWidget(self.cancelLoadButton)
+        self.statusBar().clearMessage()
+        self.setLoading(False)
+
+    def openStore(self, projectName):
+        '''
+        Opens a project using the SQLite backend. Metadata is read at once,
+        points are paged into the table as it is scrolled.
+        '''
+        try:
+            self.store = ProjectStore.ProjectStore(projectName)
+            data = self.store.meta()
+        except Exception:
+            self.store = None
+            QMessageBox.critical(
+                self,
+                'File Not Found',
+                f'{projectName} is not supported')
+            return
+
+        self.setProjectData(data)
+
+        self.pager = self.store.pager()
+        self.points = self.pager.points
+        self.table.setPager(self.pager)
+
+        if self.pager.total:
+            self.menuExport.setEnabled(True)
+
     def closeApplication(self):
         '''
         Prompt user when exiting
@@ -262,74 +844,122 @@ class MainWindow(QMainWindow):
         )
 
         if choice == QMessageBox.Yes:
+            self.closeProject()
             sys.exit()
 
     def exportToCSV(self):
         '''
         Export table data to csv file
         '''
-        df = pd.DataFrame(self.points)
-        
-        try:
-            df.to_csv(f'./Projects/{self.projectName}/Reports/{QDate.currentDate().toString("MM-dd-yy")}_Report.csv', index=False)   
-        except:
-            self.fileCreatedAlert('CSV', True)	
-        else:
-            self.fileCreatedAlert('CSV')
+        self.exportReport('CSV')
 
     def exportToJSON(self):
         '''
         Export table data to json file
         '''
-        json_data = json.dumps(self.points, indent=2)
-        
-        try:
-            with open(f'./Projects/{self.projectName}/Reports/{QDate.currentDate().toString("MM-dd-yy")}_Report.json', 'w+') as f:
-                f.write(json_data)
-        except:
-            self.fileCreatedAlert('JSON', True)	
-        else:
-            self.fileCreatedAlert('JSON')
+        self.exportReport('JSON')
 
     def exportToExcel(self):
         '''
         Export table data to excel file
         '''
-        df = pd.DataFrame(self.points)
-        
-        try:
-            df.to_excel(f'./Projects/{self.projectName}/Reports/{QDate.currentDate().toString("MM-dd-yy")}_Report.xlsx', index=False)
-        except:
-            self.fileCreatedAlert('Excel', True)
-        else:
-            self.fileCreatedAlert('Excel')
+        self.exportReport('Excel')
 
     def exportToHTML(self):
         '''
         Export table data to html file
         '''
-        df = pd.DataFrame(self.points)
-        
-        try:
-            df.to_html(f'./Projects/{self.projectName}/Reports/{QDate.currentDate().toString("MM-dd-yy")}_Report.html', index=False)	
-        except:
-            self.fileCreatedAlert('HTML', True)
-        else:
-            self.fileCreatedAlert('HTML')
-		
-    def fileCreatedAlert(self, filetype, error=False):
+        self.exportReport('HTML')
+
+    def exportToJSONLines(self):
+        '''
+        Export table data to json lines file
+        '''
+        self.exportReport('JSON Lines')
+
+    def launchExportWindow(self):
+        '''
+        Launches instance of ExportWindow from export menu
+        '''
+        self.exportWindow = ExportWindow(self)
+
+    def exportReport(self, filetype):
+        '''
+        Write the dated report of a format (CSV, JSON, JSON Lines, Excel, HTML)
+        '''
+        self.exportReports([filetype])
+
+    def exportReports(self, filetypes, incremental=False):
+        '''
+        Write the dated reports of formats to ./Projects/{Project_Name}/Reports/
+        on the exporter's worker thread, the points are read once for every
+        format. Reports hold the points of the project when the export was started.
+
+        Args:
+            filetypes (list): formats of the reports
+            incremental (bool): only add the points added since the last incremental
+                export to CSV and JSON Lines reports (see ReportExporter.export)
         '''
-        Display alert box to inform user export file was created
+        self.loadAllPoints()
+
+        reports = f'./Projects/{self.projectName}/Reports'
+        date = QDate.currentDate().toString("MM-dd-yy")
+        targets = [(filetype, f'{reports}/{date}_Report.{ReportExporter.WRITERS[filetype].extension}') for filetype in filetypes]
+        statePath = f'{reports}/{ReportExporter.STATE}' if incremental else None
+
+        if not self.exporter:
+            self.exporter = ReportExporter.ReportExporter()
+            self.exportProgress = QProgressBar()
+            self.exportProgress.setRange(0, 1000)
+            self.exporter.progress.connect(self.exportProgress.setValue)
+            self.exporter.finished.connect(self.exportFinished)
+            self.exporter.failed.connect(self.exportFailed)
+
+        #Progress is shown in the status bar until every queued export is written
+        if not self.exports:
+            self.exportProgress.setValue(0)
+            self.statusBar().addPermanentWidget(self.exportProgress)
+            self.exportProgress.show()
+        self.exports += 1
+        self.statusBar().showMessage(f'Exporting {", ".join(filetypes)}...')
+
+        self.exporter.start(self.points.copy(), targets, statePath)
+
+    def exportDone(self):
+        self.exports -= 1
+        if not self.exports:
+            self.statusBar().removeWidget(self.exportProgress)
+            self.statusBar().clearMessage()
+
+    def exportFinished(self, targets):
         '''
+        Called when the reports of an export were written
+        '''
+        self.exportDone()
+        self.fileCreatedAlert([filetype for filetype, _ in targets])
+
+    def exportFailed(self, targets, error):
+        '''
+        Called when an export failed, unfinished reports are removed
+        '''
+        self.exportDone()
+        self.fileCreatedAlert([filetype for filetype, _ in targets], True)
+
+    def fileCreatedAlert(self, filetypes, error=False):
+        '''
+        Display alert box to inform user export files were created
+        '''
+        files = f'{filetypes[0]} file' if len(filetypes) == 1 else f'{", ".join(filetypes[:-1])} and {filetypes[-1]} files'
+
         if error:
             QMessageBox.critical(
                 self,
                 'Export File',
-                f'{filetype} file failed to be created'
-            )	
+                f'{files} failed to be created'
+            )
         else:
             QMessageBox.information(
                 self,
                 'Export File',
-                f'{filetype} file was successfully created'
+                f'{files} {"was" if len(filetypes) == 1 else "were"} successfully created'
             )
\ No newline at end of file
@@ -1,10 +1,14 @@
 import ctypes as ct
-import ctypes.wintypes as cw
-from win32api import LOWORD
 
-#https://docs.microsoft.com/en-us/windows/win32/api/winuser/nf-winuser-systemparametersinfoa            
+#https://docs.microsoft.com/en-us/windows/win32/api/winuser/nf-winuser-systemparametersinfoa
+
+#Mouse settings can only be changed through the Windows API. On other platforms
+#(e.g. headless benchmarks) settings are kept in memory and the system is untouched
+windll = getattr(ct, 'windll', None)
 
 class MouseController():
+    settings = {'speed': 10, 'acceleration': True}
+
     def setSpeed(self, speed):
         #   1 - slow
         #   10 - standard
@@ -12,26 +16,40 @@ class MouseController():
 
         if speed not in range(1, 21):
             raise ValueError
-        
+
+        if windll is None:
+            self.settings['speed'] = speed
+            return
+
         set_mouse_speed = 113   # 0x0071 for SPI_SETMOUSESPEED
-        ct.windll.user32.SystemParametersInfoA(set_mouse_speed, 0, speed, 0)
+        windll.user32.SystemParametersInfoA(set_mouse_speed, 0, speed, 0)
 
     def getSpeed(self):
+        if windll is None:
+            return self.settings['speed']
+
         get_mouse_speed = 112   # 0x0070 for SPI_GETMOUSESPEED
         speed = ct.c_int()
-        ct.windll.user32.SystemParametersInfoA(get_mouse_speed, 0, ct.byref(speed), 0)
+        windll.user32.SystemParametersInfoA(get_mouse_speed, 0, ct.byref(speed), 0)
 
-        return speed.value 
+        return speed.value
 
     def setAcceleration(self, b):
+        if windll is None:
+            self.settings['acceleration'] = bool(b)
+            return
+
         arr = [0, 0, int(b)]
         mouse_params = (ct.c_int * len(arr))(*arr)
         set_mouse = 4   # 0x0004 for SPI_SETMOUSE
-        ct.windll.user32.SystemParametersInfoA(set_mouse, 0, mouse_params, 0)
+        windll.user32.SystemParametersInfoA(set_mouse, 0, mouse_params, 0)
 
     def getAcceleration(self):
+        if windll is None:
+            return self.settings['acceleration']
+
         mouse_params = (ct.c_int * 3)()
         get_mouse = 3   # 0x0003 for SPI_GETMOUSE
-        ct.windll.user32.SystemParametersInfoA(get_mouse, 0, mouse_params, 0)
-        
-        return bool(mouse_params[2])
\ No newline at end of file
+        windll.user32.SystemParametersInfoA(get_mouse, 0, mouse_params, 0)
+
+        return bool(mouse_params[2])
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+#Bounded LRU cache of values computed from integer pixel offsets (dx, dy)
+#Entries are only valid for one (ref, scale, units) context and are dropped when it changes.
+#Every method holds a lock, a cache shared by Trackers can be used from a PreviewWorker
+#thread and the GUI thread at once.
+class OffsetCache():
+    def __init__(self, maxSize=4096):
+        if maxSize < 1:
+            raise ValueError(maxSize)
+
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.context = None
+        self.hits = 0
+        self.misses = 0
+
+    def setContext(self, ref, scale, units):
+        '''
+        Set the reference point, scale and units cached values are computed
+        with. All entries are dropped if any of them changed.
+
+        Returns:
+            context (tuple): pass it to get and put, another thread may set
+                another context in between
+        '''
+        context = (tuple(ref) if ref is not None else None, scale, units)
+
+        with self.lock:
+            if context != self.context:
+                self.entries.clear()
+                self.context = context
+
+        return context
+
+    def get(self, dx, dy, context=None):
+        '''
+        Return cached value for pixel offset or None if not cached
+
+        Args:
+            dx (int): total distance in pixels traveled in x direction
+            dy (int): total distance in pixels traveled in y direction
+            context (tuple): context returned by setContext, nothing is found
+                if the context changed since
+        '''
+        key = (dx, dy)
+
+        with self.lock:
+            if context is not None and context != self.context:
+                self.misses += 1
+                return None
+
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        return value
+
+    def put(self, dx, dy, value, context=None):
+        '''
+        Store value for pixel offset, evicting the least recently used entry
+        when the cache is full. A value computed with a context that isn't the
+        current one anymore isn't stored.
+        '''
+        with self.lock:
+            if context is not None and context != self.context:
+                return
+
+            self.entries[(dx, dy)] = value
+            self.entries.move_to_end((dx, dy))
+
+            if len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        '''
+        Drop all entries and reset hit/miss counts
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        '''
+        Return hit/miss counts, current size and hit rate of the cache
+        '''
+        with self.lock:
+            size = len(self.entries)
+        lookups = self.hits + self.misses
+
+        return {
+            'Hits': self.hits,
+            'Misses': self.misses,
+            'Size': size,
+            'HitRate': round(self.hits / lookups, 4) if lookups else 0
+        }
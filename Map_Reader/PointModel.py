@@ -0,0 +1,580 @@
+from array import array
+
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from ColumnSnapshot import SnapshotPoints, LazyColumn, parseDate, parseDates, toFloat
+from SearchIndex import SearchIndex, IndexWorker
+
+#Define constants for table columns
+PID, LAT, LON, DATE, DESC = range(5)
+HEADERS = ['Point', 'Latitude', 'Longitude', 'Date', 'Description']
+
+def textKey(value):
+    '''
+    Sort key of a text cell, None sorts like an empty text and other values by their text
+    '''
+    return value if isinstance(value, str) else ('' if value is None else str(value))
+
+def numberKey(value):
+    '''
+    Sort key of a float cell, NaN sorts after every number like in NumPy
+    '''
+    return (True, 0.0) if value != value else (False, value)
+
+def withoutRow(order, row):
+    '''
+    Copy of an order without storage row, rows after it move up by one
+    '''
+    order = np.frombuffer(order, dtype=np.int64)
+    order = order[order != row]
+    order[order > row] -= 1
+
+    return array('q', order.tobytes())
+
+#Table model backed by columnar arrays, cell data is only produced for rows the view asks for
+class PointModel(QAbstractTableModel):
+    #A filter waiting for the indexes was applied (see setFilter)
+    filterApplied = pyqtSignal()
+
+    def __init__(self, parent=None, background=False):
+        '''
+        Args:
+            background (bool): build the search indexes on a worker thread as points are added
+        '''
+        super(PointModel, self).__init__(parent)
+
+        self.sortColumn = PID
+        self.sortOrder = Qt.AscendingOrder
+        self.pager = None
+
+        self.worker = None
+        if background:
+            #Not a child of the model, a build still running keeps the worker alive
+            self.worker = IndexWorker()
+            self.worker.built.connect(self.indexesBuilt)
+
+        #Criteria of the filter bar (see setFilter), None shows every row. pendingFilter
+        #is the filter to apply once the indexes it needs are built.
+        self.filter = None
+        self.pendingFilter = None
+        self.clearColumns()
+
+    def clearColumns(self):
+        '''
+        Create empty columns. Numeric fields are stored in typed arrays,
+        text fields in lists. order maps view rows to storage rows, unfiltered
+        is the sorted order of every row while a filter hides some of them.
+        '''
+        self.pid = array('q')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.date = []
+        self.desc = []
+        self.dist = array('d')
+        self.bearing = array('d')
+        self.units = []
+        self.ref = []
+        self.scale = array('d')
+        self.order = array('q')
+        self.unfiltered = None
+        self.snapshot = None
+        self.search = SearchIndex(self, self.worker)
+
+        #Columns of the table by column number
+        self.columns = [self.pid, self.lat, self.lon, self.date, self.desc]
+
+    def index(self, row, column, parent=QModelIndex()):
+        '''
+        Create index without the rowCount and columnCount calls of the base
+        class, item views may ask for an index of every row when laying out.
+        '''
+        if parent.isValid() or not (0 <= row < len(self.order) and 0 <= column < 5):
+            return QModelIndex()
+
+        return self.createIndex(row, column)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        '''
+        Produce cell data on demand for the view
+        '''
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+
+        value = self.columns[index.column()][self.order[index.row()]]
+
+        #Coordinates that aren't numbers are stored as NaN and shown empty
+        return None if value != value else value
+
+    def storeRow(self, pid, data):
+        '''
+        Append point fields to the end of every column, numbers that are
+        missing or aren't numbers are stored as NaN
+        '''
+        self.pid.append(pid)
+        self.lat.append(toFloat(data['Latitude']))
+        self.lon.append(toFloat(data['Longitude']))
+        self.date.append(data['Date'])
+        self.desc.append(data['Description'])
+        self.dist.append(toFloat(data.get('Distance') or 0))
+        self.bearing.append(toFloat(data.get('Bearing') or 0))
+        self.units.append(data.get('Units'))
+        self.ref.append(data.get('ReferencePoint'))
+        self.scale.append(toFloat(data.get('Scale') or 0))
+
+    def storeRows(self, pid, points):
+        '''
+        Append fields of many points to the end of every column, each column
+        is extended in one pass instead of appending row by row
+        '''
+        self.pid.extend(range(pid, pid+len(points)))
+        self.lat.extend([toFloat(p['Latitude']) for p in points])
+        self.lon.extend([toFloat(p['Longitude']) for p in points])
+        self.date.extend([p['Date'] for p in points])
+        self.desc.extend([p['Description'] for p in points])
+        self.dist.extend([toFloat(p.get('Distance') or 0) for p in points])
+        self.bearing.extend([toFloat(p.get('Bearing') or 0) for p in points])
+        self.units.extend([p.get('Units') for p in points])
+        self.ref.extend([p.get('ReferencePoint') for p in points])
+        self.scale.extend([toFloat(p.get('Scale') or 0) for p in points])
+
+    def sortedPosition(self, row, order=None):
+        '''
+        Find view position of storage row in the current sort order, or its
+        position in order if given (storage rows sorted the same way)
+        '''
+        order = self.order if order is None else order
+        column = self.columns[self.sortColumn]
+        if isinstance(column, array):
+            value = column.__getitem__ if column.typecode == 'q' else lambda i: numberKey(column[i])
+        else:
+            value = lambda i: textKey(column[i])
+        key = value(row)
+        ascending = self.sortOrder == Qt.AscendingOrder
+
+        #Ascending order puts the new row after equal keys, descending order keeps
+        #equal keys in reverse point order so the new row goes first
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (value(order[mid]) > key) if ascending else (value(order[mid]) <= key):
+                hi = mid
+            else:
+                lo = mid + 1
+
+        return lo
+
+    def setPoints(self, points):
+        '''
+        Replace all points in the model
+        '''
+        self.beginResetModel()
+        self.clearColumns()
+        self.pager = None
+
+        if isinstance(points, SnapshotPoints):
+            self.setSnapshotColumns(points)
+        else:
+            self.storeRows(1, points)
+
+        self.setOrder(self.sortedOrder(self.sortColumn, self.sortOrder))
+        self.endResetModel()
+        self.search.schedule()
+
+    def setSnapshotColumns(self, points):
+        '''
+        Fill columns from a binary snapshot (see ColumnSnapshot) without
+        building point dicts. Numeric columns are copied from the mapped
+        file, text columns are read when the view asks for them.
+        '''
+        snapshot = points.snapshot
+        count = snapshot.count
+        self.snapshot = snapshot
+
+        self.pid.frombytes(np.arange(1, count+1, dtype=np.int64).tobytes())
+        for column, field in [(self.lat, 'Latitude'), (self.lon, 'Longitude'), (self.dist, 'Distance'),
+                              (self.bearing, 'Bearing'), (self.scale, 'Scale')]:
+            column.frombytes(snapshot.columns[field].tobytes())
+
+            #Values kept outside the columns (None, int, ...), coordinates that
+            #aren't numbers stay NaN
+            for i, extra in snapshot.extras.items():
+                if field in extra:
+                    column[i] = toFloat(extra[field] if field in ('Latitude', 'Longitude') else extra[field] or 0)
+
+        self.date = LazyColumn(count, snapshot.date)
+        self.desc = LazyColumn(count, lambda i: snapshot.string('Description', i))
+        self.units = LazyColumn(count, lambda i: snapshot.string('Units', i))
+        self.ref = LazyColumn(count, snapshot.reference)
+        self.columns = [self.pid, self.lat, self.lon, self.date, self.desc]
+
+        #Points added after the snapshot was written
+        self.storeRows(count + 1, points.tail)
+
+    def appendPoints(self, points):
+        '''
+        Add points after the existing ones, re-sorting the view if it isn't
+        sorted by point id
+        '''
+        if not points:
+            return
+
+        row = len(self.pid)
+        self.storeRows(self.pid[-1] + 1 if row else 1, points)
+        rows = range(row, row + len(points))
+        self.search.schedule()
+
+        #Only rows matching the filter are shown, they stay hidden until the
+        #indexes have them if there are too many to check now
+        if self.filter is not None:
+            self.unfiltered.extend(rows)
+            if self.search.ready(**self.filter):
+                rows = (np.flatnonzero(self.search.query(**self.filter)[row:]) + row).tolist()
+            else:
+                rows = []
+                self.pendingFilter = self.pendingFilter or self.filter
+
+        if rows:
+            pos = len(self.order)
+            self.beginInsertRows(QModelIndex(), pos, pos + len(rows) - 1)
+            self.order.extend(rows)
+            self.endInsertRows()
+
+        if (self.sortColumn, self.sortOrder) != (PID, Qt.AscendingOrder):
+            self.sort(self.sortColumn, self.sortOrder)
+
+    def setPager(self, pager):
+        '''
+        Replace all points with the points of a pager (see ProjectStore.PointPager),
+        pages are loaded when the view needs more rows
+        '''
+        self.setPoints([])
+        self.pager = pager
+        self.appendPoints(pager.fetch())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        '''
+        Whether the pager has more points to show. While filtered only pages with
+        a matching point are loaded, and none while the filter waits for the indexes.
+        '''
+        if parent.isValid() or self.pager is None or self.pager.done():
+            return False
+        if self.filter is None:
+            return True
+
+        return self.pendingFilter is None and self.pager.nextMatch(**self.filter) is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        '''
+        Load the next page of the pager, called by the view when scrolled to the last rows.
+        While filtered pages are loaded up to the next matching point.
+        '''
+        if not self.canFetchMore(parent):
+            return
+
+        last = self.pager.nextMatch(**self.filter) if self.filter is not None else None
+        self.appendPoints(self.pager.fetch())
+        while last is not None and self.pager.lastId < last and not self.pager.done():
+            self.appendPoints(self.pager.fetch())
+
+    def fetchAll(self):
+        '''
+        Load every remaining page of the pager
+        '''
+        while self.pager is not None and not self.pager.done():
+            self.appendPoints(self.pager.fetch())
+
+    def appendPoint(self, data):
+        '''
+        Add a single point, inserting only its row at the sorted position
+        '''
+        row = len(self.pid)
+        pid = self.pid[-1] + 1 if row else 1
+        self.storeRow(pid, data)
+
+        if self.filter is not None:
+            self.unfiltered.insert(self.sortedPosition(row, self.unfiltered), row)
+            if not self.search.matches(row, **self.filter):
+                return
+
+        pos = self.sortedPosition(row)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self.order.insert(pos, row)
+        self.endInsertRows()
+
+    def updatePoint(self, row, data):
+        '''
+        Replace displayed data of the point at storage row and move it if
+        its sort key changed
+        '''
+        self.lat[row] = toFloat(data['Latitude'])
+        self.lon[row] = toFloat(data['Longitude'])
+        self.date[row] = data['Date']
+        self.desc[row] = data['Description']
+        self.search.changed(row)
+        pos = self.position(row)
+
+        #The point may be shown or hidden by the filter now
+        if self.filter is not None:
+            del self.unfiltered[self.unfiltered.index(row)]
+            self.unfiltered.insert(self.sortedPosition(row, self.unfiltered), row)
+            shown = self.search.matches(row, **self.filter)
+
+            if pos < 0 and shown:
+                pos = self.sortedPosition(row)
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self.order.insert(pos, row)
+                self.endInsertRows()
+            elif pos >= 0 and not shown:
+                self.beginRemoveRows(QModelIndex(), pos, pos)
+                del self.order[pos]
+                self.endRemoveRows()
+            if pos < 0 or not shown:
+                return
+
+        self.dataChanged.emit(self.index(pos, 0), self.index(pos, len(HEADERS)-1))
+
+        #Find new position with the row taken out of the order
+        del self.order[pos]
+        newPos = self.sortedPosition(row)
+        self.order.insert(pos, row)
+
+        if newPos != pos:
+            dest = newPos if newPos < pos else newPos + 1
+            self.beginMoveRows(QModelIndex(), pos, pos, QModelIndex(), dest)
+            del self.order[pos]
+            self.order.insert(newPos, row)
+            self.endMoveRows()
+
+    def setLocations(self, rows, lat, lon, dist, bearing, scale):
+        '''
+        Replace latitude, longitude, distance, bearing and scale of many storage
+        rows at once, e.g. after the points were recomputed (see Reprojection)
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        for column, values in [(self.lat, lat), (self.lon, lon), (self.dist, dist), (self.bearing, bearing), (self.scale, scale)]:
+            np.frombuffer(column, dtype=np.float64)[rows] = values
+        self.search.reset('lat', 'lon')
+
+        #Rows shown by a location filter change, the view is rebuilt
+        if self.filter is not None and (self.filter['lat'] or self.filter['lon']):
+            self.beginResetModel()
+            self.setOrder(self.sortedOrder(self.sortColumn, self.sortOrder) if self.sortColumn in (LAT, LON) else self.unfiltered)
+            self.endResetModel()
+        elif self.sortColumn in (LAT, LON):
+            self.sort(self.sortColumn, self.sortOrder)
+        elif len(self.order):
+            self.dataChanged.emit(self.index(0, LAT), self.index(len(self.order)-1, LON))
+
+    def removePoint(self, row):
+        '''
+        Remove the point at storage row. Point IDs of the other rows are kept.
+        '''
+        pos = self.position(row)
+        if pos >= 0:
+            self.beginRemoveRows(QModelIndex(), pos, pos)
+
+        for column in [self.pid, self.lat, self.lon, self.date, self.desc,
+                       self.dist, self.bearing, self.units, self.ref, self.scale]:
+            del column[row]
+
+        #Rows after the removed one moved, the indexes are built again when queried
+        self.search.reset()
+        self.order = withoutRow(self.order, row)
+        if self.unfiltered is not None:
+            self.unfiltered = withoutRow(self.unfiltered, row)
+
+        if pos >= 0:
+            self.endRemoveRows()
+
+    def position(self, row):
+        '''
+        Return the view position of storage row, -1 if the filter hides it
+        '''
+        try:
+            return self.order.index(row)
+        except ValueError:
+            return -1
+
+    def inverse(self):
+        '''
+        Return the view position of every storage row as an array, -1 for
+        rows hidden by the filter
+        '''
+        inverse = np.full(len(self.pid), -1, dtype=np.int64)
+        inverse[np.frombuffer(self.order, dtype=np.int64)] = np.arange(len(self.order))
+
+        return inverse
+
+    def positions(self, rows):
+        '''
+        Return the sorted view positions of storage rows as an array, rows
+        hidden by the filter are left out
+        '''
+        positions = self.inverse()[np.asarray(rows, dtype=np.int64)]
+
+        return np.sort(positions[positions >= 0])
+
+    def sortedOrder(self, column, order):
+        '''
+        Return storage rows sorted by column as an array. Numeric columns are
+        sorted with NumPy, stable so equal keys keep point order.
+        '''
+        values = self.columns[column]
+
+        if isinstance(values, array):
+            keys = np.frombuffer(values, dtype=np.int64 if values.typecode == 'q' else np.float64)
+            rows = np.argsort(keys, kind='stable')
+        else:
+            rows = np.array(sorted(range(len(values)), key=lambda i: textKey(values[i])), dtype=np.int64)
+
+        #Descending order is the reverse of the ascending order
+        if order == Qt.DescendingOrder:
+            rows = rows[::-1]
+
+        return array('q', np.ascontiguousarray(rows, dtype=np.int64).tobytes())
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        '''
+        Sort the view by column, called by the view when a header is clicked
+        '''
+        self.layoutAboutToBeChanged.emit()
+
+        #Remember storage rows of persistent indexes (selection, current row)
+        persistent = self.persistentIndexList()
+        rows = [(self.order[i.row()], i.column()) for i in persistent]
+
+        self.sortColumn = column
+        self.sortOrder = order
+        self.setOrder(self.sortedOrder(column, order))
+
+        if persistent:
+            inverse = self.inverse()
+            self.changePersistentIndexList(
+                persistent,
+                [self.index(int(inverse[r]), c) for r, c in rows])
+
+        self.layoutChanged.emit()
+
+    def setOrder(self, order):
+        '''
+        Show the rows of order (every storage row, sorted) that match the filter
+        '''
+        if self.filter is None:
+            self.unfiltered = None
+            self.order = order
+        else:
+            self.unfiltered = order
+            self.order = self.filtered(order)
+
+    def filtered(self, order, mask=None):
+        '''
+        Return the rows of order matching the filter (or mask), in the same order
+        '''
+        if mask is None and self.search.ready(**self.filter):
+            mask = self.search.query(**self.filter)
+        elif mask is None:
+            #Only rows shown already stay shown until the indexes are built (see indexesBuilt)
+            mask = np.zeros(len(self.pid), dtype=bool)
+            mask[np.frombuffer(self.order, dtype=np.int64)] = True
+            self.pendingFilter = self.pendingFilter or self.filter
+        rows = np.frombuffer(order, dtype=np.int64)
+
+        return array('q', rows[mask[rows]].tobytes())
+
+    def setFilter(self, text='', dates=None, lat=None, lon=None):
+        '''
+        Show only the rows matching every criterion in the current sort order,
+        every row if none is given. Rows are found with the indexes of SearchIndex
+        instead of reading every row.
+
+        Args:
+            text (str): words the description must have words starting with
+            dates (tuple): first and last date in seconds since 1970, either can be None
+            lat (tuple): smallest and largest latitude, either can be None
+            lon (tuple): west and east longitude, either can be None
+        '''
+        bounds = [None if b is None or tuple(b) == (None, None) else tuple(b) for b in (dates, lat, lon)]
+        criteria = dict(zip(['dates', 'lat', 'lon'], bounds), text=text or '')
+
+        #The filter is applied again if rows were hidden while the indexes were behind
+        if criteria == self.filter and self.pendingFilter is None:
+            return
+
+        #Indexes are still built by the worker, the filter is applied when they're
+        #ready (see indexesBuilt) so the GUI thread doesn't build them
+        if not self.search.ready(**criteria):
+            self.pendingFilter = criteria
+            return
+
+        self.pendingFilter = None
+        mask = self.search.query(**criteria)
+        order = self.order if self.unfiltered is None else self.unfiltered
+
+        self.beginResetModel()
+        if mask is None:
+            self.filter = None
+            self.unfiltered = None
+            self.order = order
+        else:
+            self.filter = criteria
+            self.unfiltered = order
+            self.order = self.filtered(order, mask)
+        self.endResetModel()
+
+    def indexesBuilt(self, search, generation, indexes):
+        '''
+        Install indexes built by the worker and apply the filter waiting for them
+        '''
+        #A failed build leaves the indexes to the GUI thread, the filter can be applied then
+        if search is not self.search or (not search.install(generation, indexes) and search.worker is not None):
+            return
+
+        pending = self.pendingFilter
+        if pending is not None and self.search.ready(**pending):
+            self.setFilter(**pending)
+            self.filterApplied.emit()
+
+    def descriptions(self, start, stop):
+        '''
+        Return the descriptions of storage rows start to stop as text, used to
+        build the description index
+        '''
+        column = self.desc
+        texts = column[start:stop] if isinstance(column, list) else [column[i] for i in range(start, stop)]
+
+        return [t if isinstance(t, str) else ('' if t is None else str(t)) for t in texts]
+
+    def timestamps(self, start, stop):
+        '''
+        Return the dates of storage rows start to stop in seconds since 1970
+        (NO_TIME if a date can't be read), used to build the date index. Rows of
+        a snapshot are read from its timestamp column.
+        '''
+        column = self.date
+        if not isinstance(column, LazyColumn) or column.items is not None:
+            dates = column[start:stop] if isinstance(column, list) else [column[i] for i in range(start, stop)]
+            return parseDates(dates)
+
+        end = max(start, min(stop, column.count))
+        values = self.snapshot.columns['Timestamp'][start:end].copy()
+        #Rows can be edited on the GUI thread while a worker reads them
+        for i, date in list(column.changed.items()):
+            if start <= i < end:
+                values[i - start] = parseDate(date)
+
+        tail = column.tail[max(start, column.count) - column.count:max(stop - column.count, 0)]
+
+        return np.concatenate((values, parseDates(tail)))
@@ -0,0 +1,455 @@
+from array import array
+from itertools import accumulate, islice
+from collections.abc import Mapping, Sequence
+from datetime import timedelta
+
+import numpy as np
+
+import ColumnSnapshot
+from ColumnSnapshot import NO_TIME, NO_PIXEL, EPOCH, toFloat
+
+#Fields of a point in the order setLocation writes them, traced points also have the pixel offset of the trace
+LAYOUT = ('Latitude', 'Longitude', 'Date', 'Description', 'Distance', 'Bearing', 'Units', 'ReferencePoint', 'Scale')
+PIXELS = ('PixelDX', 'PixelDY')
+TRACED = LAYOUT + PIXELS
+FLOATS = ('Latitude', 'Longitude', 'Distance', 'Bearing', 'Scale')
+
+#Points built at a time when iterating or slicing
+BATCH = 1000
+
+#Text of the days and times of day already formatted, points of a project are dated on few different days
+DAYS = {}
+TIMES = {}
+
+def formatDate(seconds):
+    '''
+    Point date text (MM-dd-yyyy hh:mm:ss ap) of seconds since 1970
+    '''
+    day, second = divmod(seconds, 86400)
+    if day not in DAYS:
+        date = EPOCH + timedelta(days=day)
+        DAYS[day] = f'{date.month:02d}-{date.day:02d}-{date.year:04d}'
+    if second not in TIMES:
+        hour, rest = divmod(second, 3600)
+        TIMES[second] = f' {hour % 12 or 12:02d}:{rest // 60:02d}:{rest % 60:02d} {"pm" if hour >= 12 else "am"}'
+
+    return DAYS[day] + TIMES[second]
+
+#Seconds since 1970 of the MM-dd-yyyy hh am/pm hours already parsed
+HOURS = {}
+
+def parseDate(date):
+    '''
+    Seconds since 1970 of a point date (MM-dd-yyyy hh:mm:ss ap), NO_TIME if
+    formatDate wouldn't give the same text back. Hours are parsed once by
+    ColumnSnapshot.parseDate, minutes and seconds are added to them.
+    '''
+    if type(date) is not str or len(date) != 22:
+        return NO_TIME
+
+    hour = date[:13] + date[19:]
+    if hour not in HOURS:
+        HOURS[hour] = ColumnSnapshot.parseDate(date[:13] + ':00:00' + date[19:])
+    if HOURS[hour] == NO_TIME:
+        return NO_TIME
+
+    try:
+        seconds = HOURS[hour] + int(date[14:16]) * 60 + int(date[17:19])
+    except ValueError:
+        return NO_TIME
+
+    return seconds if formatDate(seconds) == date else NO_TIME
+
+#Points of a project in typed columns instead of a list of dicts. Coordinates, distance,
+#bearing and scale are float64 arrays, dates int64 seconds since 1970, units and reference
+#points indexes in tables of their distinct values and descriptions UTF-8 text in one
+#buffer, pixel offsets of traced points int64 with NO_PIXEL for points without one.
+#Values that don't fit their column (None, int, a Date in another format) are kept in
+#extras and points with other fields are kept as they are, so every point reads back
+#exactly as it was added. Points are only added, like MainWindow.points, and only
+#their locations are changed (see setLocations).
+class PointStore(Sequence):
+    def __init__(self, points=()):
+        self.columns = {field: array('d') for field in FLOATS}
+        self.pixels = {field: array('q') for field in PIXELS}
+        self.dates = array('q')
+        self.units = array('i')
+        self.refs = array('i')
+
+        #End of each description in text
+        self.ends = array('Q')
+        self.text = bytearray()
+
+        #Distinct units and reference points, values are shared by the points using them
+        self.unitValues = []
+        self.refValues = []
+        self.unitIds = {}
+        self.refIds = {}
+
+        #{point index: {field: value}} of values outside the columns
+        self.extras = {}
+
+        #{point index: point} of points without exactly the LAYOUT or TRACED fields
+        self.irregular = {}
+
+        self.extend(points)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, i):
+        '''
+        Returns a PointRow view of point i, a slice returns a list of point dicts
+        '''
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return self.points(start, stop)
+            return [self.point(j) for j in range(start, stop, step)]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('point index out of range')
+
+        return PointRow(self, i)
+
+    def __iter__(self):
+        '''
+        Iterate over point dicts, built in batches
+        '''
+        for start in range(0, len(self), BATCH):
+            yield from self.points(start, min(len(self), start + BATCH))
+
+    def __eq__(self, other):
+        '''
+        Equal to a sequence of equal points, like a list of dicts
+        '''
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def append(self, point):
+        self.extend([point])
+
+    def extend(self, points):
+        '''
+        Add points, each column is extended in one pass
+        '''
+        points = points if isinstance(points, list) else list(points)
+        start = len(self)
+
+        for i, point in enumerate(points):
+            fields = tuple(point)
+            if fields != LAYOUT and fields != TRACED:
+                self.irregular[start + i] = dict(point)
+
+        def extra(i, field, value):
+            if start + i not in self.irregular:
+                self.extras.setdefault(start + i, {})[field] = value
+
+        for field in FLOATS:
+            values = [p.get(field) for p in points]
+            if set(map(type, values)) - {float}:
+                for i, value in enumerate(values):
+                    if type(value) is not float:
+                        extra(i, field, value)
+                        values[i] = float('nan')
+            self.columns[field].extend(values)
+
+        for field in PIXELS:
+            values = [p.get(field, NO_PIXEL) for p in points]
+            for i, value in enumerate(values):
+                if value is not NO_PIXEL and not (type(value) is int and NO_PIXEL < value < 2**63):
+                    extra(i, field, value)
+                    values[i] = NO_PIXEL
+            self.pixels[field].extend(values)
+
+        dates = [parseDate(p.get('Date')) for p in points]
+        for i, date in enumerate(dates):
+            if date == NO_TIME:
+                extra(i, 'Date', points[i].get('Date'))
+
+        descriptions = [p.get('Description') for p in points]
+        if set(map(type, descriptions)) - {str}:
+            for i, description in enumerate(descriptions):
+                if type(description) is not str:
+                    extra(i, 'Description', description)
+                    descriptions[i] = ''
+        encoded = [description.encode('utf-8') for description in descriptions]
+        self.ends.extend(islice(accumulate(map(len, encoded), initial=len(self.text)), 1, None))
+        self.text += b''.join(encoded)
+
+        self.units.extend(encode([p.get('Units') for p in points], self.unitValues, self.unitIds))
+        self.refs.extend(encode([p.get('ReferencePoint') for p in points], self.refValues, self.refIds))
+
+        #Dates are added last, the length of the store is the length of dates
+        self.dates.extend(dates)
+
+    def description(self, i):
+        return self.text[self.ends[i - 1] if i else 0:self.ends[i]].decode('utf-8')
+
+    def value(self, i, field):
+        '''
+        Value of a field of point i
+        '''
+        if i in self.irregular:
+            return self.irregular[i][field]
+        if i in self.extras and field in self.extras[i]:
+            return self.extras[i][field]
+
+        if field in self.columns:
+            return self.columns[field][i]
+        if field in self.pixels and self.pixels[field][i] != NO_PIXEL:
+            return self.pixels[field][i]
+        if field == 'Date':
+            return formatDate(self.dates[i])
+        if field == 'Description':
+            return self.description(i)
+        if field == 'Units':
+            return self.unitValues[self.units[i]]
+        if field == 'ReferencePoint':
+            return self.refValues[self.refs[i]]
+
+        raise KeyError(field)
+
+    def traced(self, i):
+        return self.pixels['PixelDX'][i] != NO_PIXEL or 'PixelDX' in self.extras.get(i, ())
+
+    def fields(self, i):
+        if i in self.irregular:
+            return tuple(self.irregular[i])
+
+        return TRACED if self.traced(i) else LAYOUT
+
+    def point(self, i):
+        '''
+        Point i as a dict in the project_data.json layout
+        '''
+        if i in self.irregular:
+            return dict(self.irregular[i])
+
+        return {field: self.value(i, field) for field in self.fields(i)}
+
+    def points(self, start, stop):
+        '''
+        Points start to stop as dicts, built column by column
+        '''
+        if start >= stop:
+            return []
+
+        columns = [self.columns[field][start:stop] for field in FLOATS]
+        text = self.text
+        ends = self.ends
+        first = ends[start - 1] if start else 0
+        descriptions = [text[a:b].decode('utf-8') for a, b in zip([first] + list(ends[start:stop - 1]), ends[start:stop])]
+        units = [self.unitValues[u] for u in self.units[start:stop]]
+        refs = [self.refValues[r] for r in self.refs[start:stop]]
+        dates = [formatDate(d) if d != NO_TIME else None for d in self.dates[start:stop]]
+
+        points = [{
+            'Latitude': lat,
+            'Longitude': lon,
+            'Date': date,
+            'Description': description,
+            'Distance': dist,
+            'Bearing': bearing,
+            'Units': unit,
+            'ReferencePoint': ref,
+            'Scale': scale
+        } for lat, lon, dist, bearing, scale, date, description, unit, ref in zip(*columns, dates, descriptions, units, refs)]
+
+        #Offsets of traced points, extras below replace offsets that aren't ints keeping the field order
+        dxs = self.pixels['PixelDX'][start:stop]
+        dys = self.pixels['PixelDY'][start:stop]
+        if dxs.count(NO_PIXEL) != len(dxs) or dys.count(NO_PIXEL) != len(dys):
+            for point, dx, dy in zip(points, dxs, dys):
+                if dx != NO_PIXEL or dy != NO_PIXEL:
+                    point['PixelDX'] = dx
+                    point['PixelDY'] = dy
+
+        #Values outside the columns, few points have any
+        if self.extras or self.irregular:
+            for i in range(start, stop):
+                if i in self.irregular:
+                    points[i - start] = dict(self.irregular[i])
+                elif i in self.extras:
+                    points[i - start].update(self.extras[i])
+
+        return points
+
+    def copy(self):
+        '''
+        Copy of the store, the columns are copied in one piece each
+        '''
+        store = PointStore()
+        store.columns = {field: array('d', column) for field, column in self.columns.items()}
+        store.pixels = {field: array('q', column) for field, column in self.pixels.items()}
+        store.dates = array('q', self.dates)
+        store.units = array('i', self.units)
+        store.refs = array('i', self.refs)
+        store.ends = array('Q', self.ends)
+        store.text = bytearray(self.text)
+        store.unitValues = list(self.unitValues)
+        store.refValues = list(self.refValues)
+        store.unitIds = dict(self.unitIds)
+        store.refIds = dict(self.refIds)
+        store.extras = {i: dict(extra) for i, extra in self.extras.items()}
+        store.irregular = dict(self.irregular)
+
+        return store
+
+    def nbytes(self):
+        '''
+        Bytes used by the columns, the value tables and extras aren't counted
+        '''
+        arrays = list(self.columns.values()) + list(self.pixels.values()) + [self.dates, self.units, self.refs, self.ends]
+
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.text)
+
+    def column(self, field):
+        '''
+        Float64 array of a numeric field (Latitude, Distance, PixelDX, ...) of every
+        point, NaN where a point has no number
+        '''
+        if field in self.pixels:
+            values = np.frombuffer(self.pixels[field], dtype=np.int64)
+            values = np.where(values == NO_PIXEL, np.nan, values)
+        else:
+            values = np.array(self.columns[field], dtype=np.float64)
+
+        for i, extra in self.extras.items():
+            if field in extra:
+                values[i] = toFloat(extra[field])
+        for i, point in self.irregular.items():
+            values[i] = toFloat(point.get(field))
+
+        return values
+
+    def setLocations(self, rows, lat, lon, dist, bearing, reference, scale, units):
+        '''
+        Replace the location of points, e.g. with locations traced again against
+        another reference point and scale (see Reprojection)
+
+        Args:
+            rows (array): indexes of the points
+            lat, lon, dist, bearing (array): new values of the points
+            reference (list): latitude and longitude of the reference point
+            scale (float): scale of the points
+            units (str): units of dist
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        for field, values in [('Latitude', lat), ('Longitude', lon), ('Distance', dist), ('Bearing', bearing)]:
+            np.frombuffer(self.columns[field], dtype=np.float64)[rows] = values
+        np.frombuffer(self.columns['Scale'], dtype=np.float64)[rows] = scale
+        np.frombuffer(self.units, dtype=np.int32)[rows] = encode([units], self.unitValues, self.unitIds)[0]
+        np.frombuffer(self.refs, dtype=np.int32)[rows] = encode([reference], self.refValues, self.refIds)[0]
+
+        #Values replaced above aren't kept outside the columns any more
+        fields = {'Latitude', 'Longitude', 'Distance', 'Bearing', 'Units', 'ReferencePoint', 'Scale'}
+        changed = set(rows.tolist()) if self.extras or self.irregular else ()
+        for i in changed & self.extras.keys():
+            extra = {field: value for field, value in self.extras[i].items() if field not in fields}
+            if extra:
+                self.extras[i] = extra
+            else:
+                del self.extras[i]
+
+        for j in np.flatnonzero(np.isin(rows, list(self.irregular))) if changed else ():
+            i = int(rows[j])
+            self.irregular[i] = dict(self.irregular[i], Latitude=float(lat[j]), Longitude=float(lon[j]),
+                                     Distance=float(dist[j]), Bearing=float(bearing[j]), Units=units,
+                                     ReferencePoint=reference, Scale=scale)
+
+    @classmethod
+    def fromSnapshot(cls, points):
+        '''
+        Store of the points of a project opened from a binary snapshot (see
+        ColumnSnapshot.SnapshotPoints), columns are copied from the mapped file
+        '''
+        snapshot = points.snapshot
+        n = snapshot.count
+        store = cls()
+
+        for field in FLOATS:
+            store.columns[field].frombytes(snapshot.columns[field].tobytes())
+        for field in PIXELS:
+            store.pixels[field].frombytes(snapshot.columns[field].tobytes())
+        store.dates.frombytes(snapshot.columns['Timestamp'].tobytes())
+
+        offsets = snapshot.columns['Description']
+        store.text = bytearray(snapshot.heap[int(offsets[0]):int(offsets[n])])
+        store.ends.frombytes((offsets[1:] - offsets[0]).astype(np.uint64).tobytes())
+
+        #Units are few distinct strings, each is decoded once
+        offsets = snapshot.columns['Units']
+        heap = snapshot.heap
+        units = {}
+        codes = []
+        for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+            text = bytes(heap[a:b])
+            code = units.get(text)
+            if code is None:
+                code = units[text] = encode([text.decode('utf-8')], store.unitValues, store.unitIds)[0]
+            codes.append(code)
+        store.units.extend(codes)
+
+        #Reference points with the same bits share an index
+        refs = np.stack((snapshot.columns['RefLat'], snapshot.columns['RefLon']), axis=1)
+        distinct, inverse = np.unique(np.ascontiguousarray(refs).view('V16').ravel(), return_inverse=True)
+        codes = encode([np.frombuffer(ref, dtype=np.float64).tolist() for ref in distinct.tolist()], store.refValues, store.refIds)
+        store.refs.frombytes(np.asarray(codes, dtype=np.int32)[inverse.ravel()].tobytes())
+
+        for i, extra in snapshot.extras.items():
+            if extra.keys() <= set(TRACED):
+                store.extras[i] = dict(extra)
+            else:
+                store.irregular[i] = snapshot.point(i)
+
+        store.extend(points.tail)
+
+        return store
+
+def encode(values, table, ids):
+    '''
+    Indexes of values in a table of distinct values, values are JSON data so
+    equal values have the same type and repr
+
+    Args:
+        values (list): values to encode
+        table (list): distinct values, new values are added to it
+        ids (dict): index in table of the key of each value
+    '''
+    codes = []
+    for value in values:
+        key = value if type(value) is str else (type(value), repr(value))
+        code = ids.get(key)
+        if code is None:
+            code = ids[key] = len(table)
+            table.append(value)
+        codes.append(code)
+
+    return codes
+
+#Read only dict-like view of a point of a PointStore, fields are read when used
+class PointRow(Mapping):
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, field):
+        return self.store.value(self.index, field)
+
+    def __iter__(self):
+        return iter(self.store.fields(self.index))
+
+    def __len__(self):
+        return len(self.store.fields(self.index))
+
+    def __repr__(self):
+        return repr(self.store.point(self.index))
@@ -0,0 +1,70 @@
+import threading
+
+from PyQt5.QtCore import QObject, QThread, QMetaObject, Qt, pyqtSignal, pyqtSlot
+
+#Worker to compute Tracker location previews on a background thread
+#Only the most recent request is kept, requests replaced before they are processed are dropped
+class PreviewWorker(QObject):
+    finished = pyqtSignal(int, object)
+
+    def __init__(self, compute):
+        '''
+        Args:
+            compute (callable): function of total dx, dy returning the preview result,
+                or None when there is nothing to show anymore
+        '''
+        super(PreviewWorker, self).__init__()
+
+        self.compute = compute
+        self.lock = threading.Lock()
+        self.pending = None
+        self.dropped = 0
+
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self.thread.start()
+
+    def submit(self, seq, dx, dy):
+        '''
+        Request a preview for total pixel offset. Called from the GUI thread,
+        replaces any request that hasn't been started yet.
+
+        Args:
+            seq (int): increasing request number passed back with the result
+            dx (int): total distance in pixels traveled in x direction
+            dy (int): total distance in pixels traveled in y direction
+        '''
+        with self.lock:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (seq, dx, dy)
+
+        QMetaObject.invokeMethod(self, 'process', Qt.QueuedConnection)
+
+    @pyqtSlot()
+    def process(self):
+        '''
+        Compute the latest pending request on the worker thread
+        '''
+        with self.lock:
+            request = self.pending
+            self.pending = None
+
+        #Already handled by an earlier wake up
+        if request is None:
+            return
+
+        seq, dx, dy = request
+        result = self.compute(dx, dy)
+        if result is not None:
+            self.finished.emit(seq, result)
+
+    def stop(self):
+        '''
+        Stop worker thread and wait for the current request to finish
+        '''
+        with self.lock:
+            self.pending = None
+
+        self.thread.quit()
+        self.thread.wait()
@@ -0,0 +1,244 @@
+import os
+import json
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+import ProjectJournal
+import ProjectStore
+from ProjectLoader import JSONStream
+
+CATALOG = 'catalog.json'
+
+#Metadata shown for each project in the starter window
+FIELDS = ['Created', 'LastAccessed', 'Points', 'Reference']
+
+#Index of the projects in ./Projects stored in ./Projects/catalog.json
+#Each entry keeps the metadata of a project and the mtime and size of each of its data
+#files when the entry was read, only projects whose files changed are read again.
+#Appending to a journal or writing to a database doesn't change the mtime of the
+#project directory, so the files are compared instead of the directory.
+class ProjectCatalog(QObject):
+    changed = pyqtSignal(str)
+    removed = pyqtSignal(str)
+
+    def __init__(self, directory='./Projects', watch=True, delay=200):
+        '''
+        Args:
+            directory (str): directory containing the projects
+            watch (bool): refresh entries when project directories change
+            delay (int): ms to wait for a burst of file changes to end before refreshing
+        '''
+        super(ProjectCatalog, self).__init__()
+
+        self.directory = directory
+        self.path = os.path.join(directory, CATALOG)
+        self.entries = {}
+        self.dirty = set()
+
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.loads(f.read())
+        except (OSError, ValueError):
+            pass
+
+        self.validate()
+
+        self.watcher = None
+        if watch:
+            self.timer = QTimer(self)
+            self.timer.setSingleShot(True)
+            self.timer.setInterval(delay)
+            self.timer.timeout.connect(self.refreshDirty)
+
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.directoryChanged)
+            self.watcher.addPath(directory)
+            if self.entries:
+                self.watcher.addPaths([self.projectPath(name) for name in self.entries])
+
+    def projectPath(self, name):
+        return os.path.join(self.directory, name)
+
+    def scan(self):
+        '''
+        Returns {name: data files (see dataFiles)} of every project directory
+        '''
+        return {e.name: dataFiles(e.path) for e in os.scandir(self.directory) if e.is_dir()}
+
+    def validate(self):
+        '''
+        Compare the catalog with the project directories, read the projects
+        that were added or changed and drop the ones that were removed
+        '''
+        found = self.scan()
+        changed = False
+
+        for name in list(self.entries):
+            if name not in found:
+                del self.entries[name]
+                changed = True
+
+        for name, files in found.items():
+            if self.entries.get(name, {}).get('Files') != files:
+                self.entries[name] = readEntry(self.projectPath(name))
+                changed = True
+
+        if changed:
+            self.save()
+
+    def names(self):
+        return sorted(self.entries)
+
+    def entry(self, name):
+        return self.entries.get(name)
+
+    def update(self, name, values):
+        '''
+        Store metadata of a project created or saved by this application
+        without reading the project again
+
+        Args:
+            name (str): project name
+            values (dict): Created, LastAccessed, Points and Reference of the project
+        '''
+        files = dataFiles(self.projectPath(name))
+        if files is None:
+            return
+
+        entry = {key: values.get(key) for key in FIELDS}
+        entry['Files'] = files
+        if self.entries.get(name) == entry:
+            return
+
+        self.entries[name] = entry
+        self.save()
+        self.watch(name)
+        self.changed.emit(name)
+
+    def refresh(self, name):
+        '''
+        Read the entry of a project again if its data files changed
+        '''
+        path = self.projectPath(name)
+        files = dataFiles(path) if os.path.isdir(path) else None
+
+        if files is None:
+            if self.entries.pop(name, None) is not None:
+                self.save()
+                self.removed.emit(name)
+            return
+
+        if self.entries.get(name, {}).get('Files') == files:
+            return
+
+        self.entries[name] = readEntry(path)
+        self.save()
+        self.watch(name)
+        self.changed.emit(name)
+
+    def watch(self, name):
+        if self.watcher and self.projectPath(name) not in self.watcher.directories():
+            self.watcher.addPath(self.projectPath(name))
+
+    def directoryChanged(self, path):
+        '''
+        Called by the watcher, a project is refreshed once its files stop changing
+        '''
+        if os.path.normpath(path) == os.path.normpath(self.directory):
+            #Projects added or removed
+            current = set(self.scan())
+            self.dirty.update(current.symmetric_difference(self.entries))
+        else:
+            self.dirty.add(os.path.basename(os.path.normpath(path)))
+
+        self.timer.start()
+
+    def refreshDirty(self):
+        dirty, self.dirty = self.dirty, set()
+        for name in sorted(dirty):
+            self.refresh(name)
+
+    def save(self):
+        '''
+        Write the catalog, it is only an index so failing to write it is ignored
+        '''
+        try:
+            ProjectJournal.atomicWrite(self.path, json.dumps(self.entries, indent=2))
+        except OSError:
+            pass
+
+def isDataFile(name):
+    '''
+    Check if a project is read from a file: project_data.json, its binary snapshots,
+    the journal and its segments or the database and its WAL. Temporary files and
+    the shared memory index of the database aren't project data.
+    '''
+    return name.startswith(('project_data.', 'project_journal.')) and not name.endswith(('.tmp', '-shm', '-journal'))
+
+def dataFiles(directory):
+    '''
+    Returns [name, mtime, size] of every data file of a project sorted by name,
+    None if the directory can't be read
+    '''
+    try:
+        files = []
+        for e in os.scandir(directory):
+            if isDataFile(e.name) and e.is_file():
+                stat = e.stat()
+                files.append([e.name, stat.st_mtime_ns, stat.st_size])
+    except OSError:
+        return None
+
+    return sorted(files)
+
+def readEntry(directory):
+    '''
+    Read the catalog entry of a project from its database, binary snapshot or
+    project_data.json, in that order, including changes in the journal.
+    The data files are listed after reading, opening a database can create files.
+
+    Returns:
+        entry (dict): Created, LastAccessed, Points, Reference and Files,
+            values are None if the project can't be read
+    '''
+    try:
+        if ProjectStore.exists(directory):
+            store = ProjectStore.ProjectStore(directory)
+            meta = store.meta()
+            meta['Points'] = store.count()
+            store.close()
+        else:
+            meta = readSnapshot(directory)
+    except Exception:
+        meta = {}
+
+    entry = {key: meta.get(key) for key in FIELDS}
+    entry['Files'] = dataFiles(directory)
+
+    return entry
+
+def readSnapshot(directory):
+    '''
+    Returns project metadata and point count, journaled records are applied
+    '''
+    #Only needed for changed projects, NumPy isn't loaded on a normal start
+    import ColumnSnapshot
+    snapshot = ColumnSnapshot.latest(directory)
+    if snapshot:
+        meta = dict(snapshot.meta)
+        count = snapshot.count
+    else:
+        meta = {}
+        count = 0
+        with open(os.path.join(directory, ProjectJournal.SNAPSHOT), 'r') as f:
+            stream = JSONStream(f)
+            for key, value in stream.items():
+                if key == 'Points':
+                    count = sum(1 for _ in value.elements())
+                else:
+                    meta[key] = value.value()
+
+    data = ProjectJournal.replay(directory, dict(meta, Points=[]))
+    data['Points'] = count + len(data['Points'])
+
+    return data
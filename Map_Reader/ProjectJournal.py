@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import threading
+
+SNAPSHOT = 'project_data.json'
+JOURNAL = 'project_journal.jsonl'
+
+#Rotated journal segments are named project_journal.{last seq}.jsonl
+SEGMENT = re.compile(r'project_journal\.(\d+)\.jsonl$')
+
+#Append-only journal of project changes stored next to the project_data.json snapshot
+#Every record has an increasing Seq number, the snapshot stores the last Seq it contains
+#(JournalSeq) so records are never applied twice even if compaction is interrupted
+class ProjectJournal():
+    def __init__(self, directory, seq=None, compactEvery=500):
+        self.directory = directory
+        self.compactEvery = compactEvery
+        self.lock = threading.Lock()
+
+        #Continue numbering after the last record already stored for the project
+        self.seq = lastSeq(directory) if seq is None else seq
+        self.records = 0
+        self.file = open(os.path.join(directory, JOURNAL), 'a')
+
+        #Terminate a line left partially written by a crash so new records stay readable
+        if self.file.tell() and not endsWithNewline(os.path.join(directory, JOURNAL)):
+            self.file.write('\n')
+
+    def append(self, op, **fields):
+        '''
+        Append one record to the journal and flush it to disk
+
+        Args:
+            op (str): AddPoint or SetMeta
+            fields: values of the record
+        '''
+        self.write([self.record(op, **fields)])
+
+    def record(self, op, **fields):
+        '''
+        Returns a new record numbered after the last one
+        '''
+        self.seq += 1
+        record = {'Seq': self.seq, 'Op': op}
+        record.update(fields)
+
+        return record
+
+    def write(self, records):
+        '''
+        Append records to the journal with a single flush
+        '''
+        self.file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self.file.flush()
+        self.records += len(records)
+
+    def addPoint(self, point):
+        '''
+        Journal a new point
+        '''
+        self.append('AddPoint', Point=point)
+
+    def addPoints(self, points):
+        '''
+        Journal new points together, e.g. the legs of a traverse
+        '''
+        self.write([self.record('AddPoint', Point=point) for point in points])
+
+    def setMeta(self, key, value):
+        '''
+        Journal a change of project metadata (Reference, Scale, Units, APIKey, ...)
+        '''
+        self.append('SetMeta', Key=key, Value=value)
+
+    def needsCompaction(self):
+        '''
+        Check if enough records were journaled since the last compaction
+        '''
+        return self.records >= self.compactEvery
+
+    def rotate(self):
+        '''
+        Close the active journal and rename it to a segment so new records
+        go to a fresh file while the snapshot is written.
+
+        Returns:
+            seq (int): last Seq contained in the closed segments
+        '''
+        self.file.close()
+        path = os.path.join(self.directory, JOURNAL)
+
+        if os.path.getsize(path):
+            os.replace(path, os.path.join(self.directory, f'project_journal.{self.seq}.jsonl'))
+
+        self.file = open(path, 'a')
+        self.records = 0
+
+        return self.seq
+
+    def compact(self, state):
+        '''
+        Write state as the new snapshot and remove the journal it contains.
+        state must contain every record journaled so far.
+        '''
+        seq = self.rotate()
+        self.writeSnapshot(state, seq)
+
+    def writeSnapshot(self, state, seq):
+        '''
+        Atomically replace the snapshot with state and delete segments up to seq.
+        Safe to call from a worker thread (see SaveScheduler) once rotate() returned seq.
+        The binary snapshot used to open the project is written after project_data.json.
+        '''
+        with self.lock:
+            state = dict(state, Points=list(state.get('Points') or []), JournalSeq=seq)
+            atomicWrite(os.path.join(self.directory, SNAPSHOT), json.dumps(state, indent=2))
+
+            #project_data.json stays valid if the binary snapshot can't be written
+            #ColumnSnapshot needs NumPy, it is imported here to keep startup fast
+            import ColumnSnapshot
+            try:
+                ColumnSnapshot.write(self.directory, state, seq)
+            except OSError:
+                pass
+
+            for name, segSeq in segments(self.directory):
+                if segSeq <= seq:
+                    os.remove(os.path.join(self.directory, name))
+
+    def close(self):
+        '''
+        Close the journal file
+        '''
+        self.file.close()
+
+def atomicWrite(path, text):
+    '''
+    Write text to a temporary file next to path and rename it over path so
+    readers see either the old or the new file, never a partial one
+    '''
+    tmp = path + '.tmp'
+
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def endsWithNewline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+def segments(directory):
+    '''
+    Return (filename, seq) of rotated journal segments sorted by seq
+    '''
+    found = []
+    for name in os.listdir(directory):
+        match = SEGMENT.match(name)
+        if match:
+            found.append((name, int(match.group(1))))
+
+    return sorted(found, key=lambda s: s[1])
+
+def readRecords(directory):
+    '''
+    Yield journal records of rotated segments then of the active journal.
+    A partially written last line (e.g. after a crash) is skipped.
+    '''
+    paths = [os.path.join(directory, name) for name, _ in segments(directory)]
+    paths.append(os.path.join(directory, JOURNAL))
+
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+def lastSeq(directory):
+    '''
+    Return the last Seq stored in the snapshot or journal of a project
+    '''
+    seq = 0
+    try:
+        with open(os.path.join(directory, SNAPSHOT), 'r') as f:
+            seq = json.loads(f.read()).get('JournalSeq', 0)
+    except (OSError, ValueError):
+        pass
+
+    for record in readRecords(directory):
+        seq = max(seq, record['Seq'])
+
+    return seq
+
+def replay(directory, data):
+    '''
+    Apply journal records newer than the snapshot to the snapshot data
+
+    Args:
+        directory (str): project directory
+        data (dict): project data read from project_data.json
+
+    Returns:
+        data (dict): project data with all journaled changes
+    '''
+    covered = data.get('JournalSeq', 0)
+
+    for record in readRecords(directory):
+        if record['Seq'] <= covered:
+            continue
+
+        if record['Op'] == 'AddPoint':
+            data.setdefault('Points', []).append(record['Point'])
+        elif record['Op'] == 'SetMeta':
+            data[record['Key']] = record['Value']
+
+        covered = record['Seq']
+
+    data['JournalSeq'] = covered
+
+    return data
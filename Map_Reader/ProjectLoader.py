@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import threading
+
+from PyQt5.QtCore import QObject, QThread, QMetaObject, Qt, pyqtSignal, pyqtSlot
+
+import ProjectJournal
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER = '0123456789.eE+-'
+
+#Parses a JSON object read in chunks, values are decoded one at a time so the
+#elements of a large array can be used before the rest of the file is read
+class JSONStream():
+    def __init__(self, f, chunkSize=1 << 20):
+        self.file = f
+        self.chunkSize = chunkSize
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.read = 0
+        self.eof = False
+
+    def fill(self):
+        '''
+        Read the next chunk, dropping the part of the buffer already parsed
+
+        Returns:
+            (bool): False at the end of the file
+        '''
+        data = self.file.read(self.chunkSize)
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        self.read += len(data)
+        self.eof = not data
+
+        return bool(data)
+
+    def peek(self):
+        '''
+        Skip whitespace and return the next character, '' at the end of the file
+        '''
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f'Expected {chars!r} at character {self.read - len(self.buffer) + self.pos}')
+
+        self.pos += 1
+        return ch
+
+    def value(self):
+        '''
+        Decode the next complete value
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            #A number at the end of the buffer may continue in the next chunk
+            if not self.eof and (end == len(self.buffer) or self.buffer[end] in NUMBER):
+                self.fill()
+                continue
+
+            self.pos = end
+            return value
+
+    def items(self):
+        '''
+        Yield (key, stream) for every member of the top level object, the
+        value of each member must be read from the stream before the next
+        '''
+        self.expect('{')
+        if self.peek() == '}':
+            return
+
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key, self
+
+            if self.expect(',}') == '}':
+                return
+
+    def elements(self):
+        '''
+        Yield the elements of the array starting at the current position
+        '''
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.value()
+
+            if self.expect(',]') == ']':
+                return
+
+#Worker opening project_data.json and the journal on a background thread
+#Metadata is passed back before the points, points are passed back in batches
+class ProjectLoader(QObject):
+    metadataLoaded = pyqtSignal(object)
+    pointsLoaded = pyqtSignal(object)
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, directory, batchSize=1000, maxBatchSize=20000):
+        '''
+        Args:
+            directory (str): project directory
+            batchSize (int): points in the first batch, each batch is twice
+                as large as the previous one up to maxBatchSize
+        '''
+        super(ProjectLoader, self).__init__()
+
+        self.directory = directory
+        self.batchSize = batchSize
+        self.maxBatchSize = maxBatchSize
+        self.cancelEvent = threading.Event()
+
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self.thread.start()
+
+    def start(self):
+        QMetaObject.invokeMethod(self, 'load', Qt.QueuedConnection)
+
+    @pyqtSlot()
+    def load(self):
+        '''
+        Parse the project on the worker thread
+        '''
+        try:
+            self.stream()
+        except Cancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(f'{e.__class__.__name__}: {e}')
+
+    def stream(self):
+        path = os.path.join(self.directory, ProjectJournal.SNAPSHOT)
+        size = max(os.path.getsize(path), 1)
+        meta = {}
+        metaSent = False
+        batchSize = self.batchSize
+
+        with open(path, 'r') as f:
+            stream = JSONStream(f)
+
+            for key, value in stream.items():
+                if key != 'Points':
+                    meta[key] = value.value()
+                    continue
+
+                #Everything written before Points (Reference, Scale, Units, ...) is usable now
+                self.metadataLoaded.emit(dict(meta))
+                metaSent = True
+
+                batch = []
+                for point in value.elements():
+                    batch.append(point)
+                    if len(batch) >= batchSize:
+                        self.sendBatch(batch, stream.read, size)
+                        batch = []
+                        batchSize = min(batchSize * 2, self.maxBatchSize)
+
+                self.sendBatch(batch, stream.read, size)
+
+        if not metaSent:
+            self.metadataLoaded.emit(dict(meta))
+
+        #Apply records journaled since the snapshot was written
+        journaled = ProjectJournal.replay(self.directory, dict(meta, Points=[]))
+        self.sendBatch(journaled.pop('Points'), size, size)
+        self.finished.emit(journaled)
+
+    def sendBatch(self, batch, read, size):
+        if self.cancelEvent.is_set():
+            raise Cancelled()
+
+        if batch:
+            self.pointsLoaded.emit(batch)
+        self.progress.emit(min(1000, read * 1000 // size))
+
+    def cancel(self):
+        '''
+        Stop loading at the next batch, called from the GUI thread
+        '''
+        self.cancelEvent.set()
+
+    def stop(self):
+        '''
+        Cancel loading and wait for the worker thread to finish
+        '''
+        self.cancel()
+        self.thread.quit()
+        self.thread.wait()
+
+class Cancelled(Exception):
+    pass
@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import sqlite3
+from array import array
+from datetime import datetime, timedelta
+
+import ProjectJournal
+
+DATABASE = 'project_data.db'
+
+#Point fields stored in their own column, other fields of a point are kept as JSON in Extra
+FIELDS = ['Latitude', 'Longitude', 'Date', 'Description', 'Distance', 'Bearing', 'Units', 'ReferencePoint', 'Scale']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS Meta (
+    Key TEXT PRIMARY KEY,
+    Value TEXT
+);
+CREATE TABLE IF NOT EXISTS Points (
+    Id INTEGER PRIMARY KEY,
+    Latitude REAL,
+    Longitude REAL,
+    Date TEXT,
+    Timestamp TEXT,
+    Description TEXT COLLATE NOCASE,
+    Distance REAL,
+    Bearing REAL,
+    Units TEXT,
+    RefLat REAL,
+    RefLon REAL,
+    Scale REAL,
+    Extra TEXT
+);
+CREATE INDEX IF NOT EXISTS PointsTimestamp ON Points (Timestamp);
+CREATE INDEX IF NOT EXISTS PointsLatLon ON Points (Latitude, Longitude);
+CREATE INDEX IF NOT EXISTS PointsDescription ON Points (Description);
+'''
+
+COLUMNS = 'Latitude, Longitude, Date, Description, Distance, Bearing, Units, RefLat, RefLon, Scale, Extra'
+
+#Optional storage backend keeping project metadata and points in ./Projects/{Project_Name}/project_data.db
+#When the database exists it is used instead of project_data.json and the journal
+class ProjectStore():
+    def __init__(self, directory):
+        self.directory = directory
+        self.db = sqlite3.connect(os.path.join(directory, DATABASE))
+
+        #Every change is committed right away, WAL keeps the commits cheap
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def setMeta(self, key, value):
+        '''
+        Store a project metadata value (ProjectName, Reference, Scale, Units, APIKey, ...)
+        '''
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO Meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def meta(self):
+        '''
+        Returns all project metadata as a dict
+        '''
+        return {key: json.loads(value) for key, value in self.db.execute('SELECT Key, Value FROM Meta')}
+
+    def addPoint(self, point):
+        '''
+        Store a new point after the existing ones, returns its Id
+        '''
+        return self.addPoints([point])[0]
+
+    def addPoints(self, points):
+        '''
+        Store new points in one transaction
+
+        Returns:
+            ids (list): Ids of the new points in point order
+        '''
+        with self.db:
+            self.db.executemany(
+                f'INSERT INTO Points ({COLUMNS}, Timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (toRow(p) for p in points))
+
+            #New rows get the largest Ids, read in the same transaction
+            ids = [pointId for pointId, in self.db.execute('SELECT Id FROM Points ORDER BY Id DESC LIMIT ?', (len(points),))]
+
+        return ids[::-1]
+
+    def updateLocations(self, ids, lat, lon, dist, bearing, reference, scale, units):
+        '''
+        Replace the location of many points in one transaction, see Reprojection
+
+        Args:
+            ids (list): Ids of the points
+            lat, lon, dist, bearing (list): new values of the points
+            reference (list): latitude and longitude of the reference point
+            scale (float): scale of the points
+            units (str): units of dist
+        '''
+        with self.db:
+            self.db.executemany(
+                'UPDATE Points SET Latitude = ?, Longitude = ?, Distance = ?, Bearing = ?, '
+                'Units = ?, RefLat = ?, RefLon = ?, Scale = ? WHERE Id = ?',
+                ((a, b, c, d, units, reference[0], reference[1], scale, i) for a, b, c, d, i in zip(lat, lon, dist, bearing, ids)))
+
+    def count(self):
+        '''
+        Returns the number of points
+        '''
+        return self.db.execute('SELECT COUNT(*) FROM Points').fetchone()[0]
+
+    def select(self, where='', params=(), order='Id', limit=-1):
+        '''
+        Returns list of (Id, point) for the points matching where
+        '''
+        query = f'SELECT Id, {COLUMNS} FROM Points {where} ORDER BY {order} LIMIT ?'
+
+        return [(row[0], fromRow(row[1:])) for row in self.db.execute(query, (*params, limit))]
+
+    def page(self, afterId=0, size=1000):
+        '''
+        Returns list of (Id, point) of the next size points after afterId in point order.
+        Pages by Id so each page costs the same however far in the project it is.
+        '''
+        return self.select('WHERE Id > ?', (afterId,), limit=size)
+
+    def points(self):
+        '''
+        Returns all points in point order
+        '''
+        return [point for _, point in self.select()]
+
+    def pointsBetween(self, start, end):
+        '''
+        Returns points dated between start and end (inclusive) sorted by date
+
+        Args:
+            start (str): date in point format MM-dd-yyyy hh:mm:ss ap
+            end (str): date in point format MM-dd-yyyy hh:mm:ss ap
+        '''
+        where = 'WHERE Timestamp BETWEEN ? AND ?'
+        return [point for _, point in self.select(where, (sortableDate(start), sortableDate(end)), order='Timestamp, Id')]
+
+    def pointsInBox(self, south, west, north, east):
+        '''
+        Returns points inside a latitude/longitude box in point order
+        '''
+        where = 'WHERE Latitude BETWEEN ? AND ? AND Longitude BETWEEN ? AND ?'
+        return [point for _, point in self.select(where, (south, north, west, east))]
+
+    def findDescription(self, text, prefix=True):
+        '''
+        Returns points whose description starts with (or contains if prefix is
+        False) text, ignoring case. Only prefix searches use the index.
+        '''
+        if prefix:
+            where = 'WHERE Description >= ? AND Description < ?'
+            params = (text, text + '\U0010ffff')
+        else:
+            where = 'WHERE instr(lower(Description), lower(?)) > 0'
+            params = (text,)
+
+        return [point for _, point in self.select(where, params)]
+
+    def nextMatch(self, afterId=0, text='', dates=None, lat=None, lon=None):
+        '''
+        Returns the Id of the first point after afterId that may match the criteria
+        of PointModel.setFilter, None if no point can. Words are only looked for
+        anywhere in the description, so some points found don't match the filter
+        but every point matching it is found.
+        '''
+        #SearchIndex needs NumPy which the starter window doesn't load
+        from SearchIndex import tokenize
+
+        where, params = ['Id > ?'], [afterId]
+
+        #SQLite only lowers ASCII letters, other words can't be looked for
+        for token in tokenize(text or ''):
+            if token.isascii():
+                where.append('instr(lower(Description), ?) > 0')
+                params.append(token)
+
+        #Dates are seconds since 1970 like ColumnSnapshot.parseDate, Timestamp has sortableDate
+        first, last = dates or (None, None)
+        for bound, op in [(first, '>='), (last, '<=')]:
+            if bound is not None:
+                where.append(f'Timestamp {op} ?')
+                params.append((datetime(1970, 1, 1) + timedelta(seconds=bound)).strftime('%Y-%m-%d %H:%M:%S'))
+
+        south, north = lat or (None, None)
+        west, east = lon or (None, None)
+        bounds = [('Latitude >= ?', south), ('Latitude <= ?', north)]
+
+        #Range crossing the antimeridian
+        if west is not None and east is not None and west > east:
+            bounds.append(('(Longitude >= ? OR Longitude <= ?)', (west, east)))
+        else:
+            bounds.extend([('Longitude >= ?', west), ('Longitude <= ?', east)])
+
+        for condition, bound in bounds:
+            if bound is not None:
+                where.append(condition)
+                params.extend(bound if isinstance(bound, tuple) else [bound])
+
+        row = self.db.execute(f'SELECT Id FROM Points WHERE {" AND ".join(where)} ORDER BY Id LIMIT 1', params).fetchone()
+
+        return row[0] if row else None
+
+    def pager(self, pageSize=1000):
+        '''
+        Returns a PointPager loading the points of this store
+        '''
+        return PointPager(self, pageSize)
+
+    def projectData(self):
+        '''
+        Returns the project in the project_data.json layout
+        '''
+        data = self.meta()
+        data['Points'] = self.points()
+
+        return data
+
+    def close(self):
+        self.db.close()
+
+#Loads points of a store page by page, MainWindow.openExistingProject uses it
+#with the table model fetching pages as rows are scrolled into view
+class PointPager():
+    def __init__(self, store, pageSize=1000):
+        self.store = store
+        self.pageSize = pageSize
+        self.total = store.count()
+        self.lastId = 0
+
+        #Id of each point loaded so far
+        self.ids = array('q')
+
+        #Criteria, last Id loaded and result of the last nextMatch
+        self.match = None
+
+        #Points loaded so far in point order, PointStore needs NumPy which the
+        #starter window doesn't load, it is imported once a project is opened
+        from PointStore import PointStore
+        self.points = PointStore()
+
+    def done(self):
+        return len(self.points) >= self.total
+
+    def fetch(self):
+        '''
+        Load the next page
+
+        Returns:
+            page (list): points of the page, empty when all points are loaded
+        '''
+        if self.done():
+            return []
+
+        rows = self.store.page(self.lastId, self.pageSize)
+        if not rows:
+            self.total = len(self.points)
+            return []
+
+        self.lastId = rows[-1][0]
+        self.ids.extend(pointId for pointId, _ in rows)
+        page = [point for _, point in rows]
+        self.points.extend(page)
+
+        return page
+
+    def nextMatch(self, **criteria):
+        '''
+        Returns the Id of the first point not loaded yet that may match the criteria
+        (see ProjectStore.nextMatch), None if there is none. The result is kept until
+        another page is loaded or points are added, the view asks for it often.
+        '''
+        key = (criteria, self.lastId, self.total)
+        if self.match is None or self.match[0] != key:
+            self.match = (key, self.store.nextMatch(self.lastId, **criteria))
+
+        return self.match[1]
+
+    def added(self, ids, points):
+        '''
+        Count points added to the store after the pager was opened. They're
+        appended to the loaded points if every page was loaded, otherwise the
+        last page loads them after the other stored points.
+
+        Returns:
+            loaded (bool): the points were appended to points
+        '''
+        loaded = self.done()
+        self.total += len(ids)
+        if loaded:
+            self.ids.extend(ids)
+            self.points.extend(points)
+
+        return loaded
+
+def sortableDate(date):
+    '''
+    Convert a point date (MM-dd-yyyy hh:mm:ss ap) to yyyy-MM-dd HH:mm:ss which
+    sorts in date order, None if date isn't in that format
+    '''
+    try:
+        hour = int(date[11:13]) % 12 + (12 if date[20:22].lower() == 'pm' else 0)
+        return f'{date[6:10]}-{date[0:2]}-{date[3:5]} {hour:02d}{date[13:19]}'
+    except (TypeError, ValueError):
+        return None
+
+def toRow(point):
+    ref = point.get('ReferencePoint') or (None, None)
+    extra = {k: v for k, v in point.items() if k not in FIELDS}
+
+    return (point.get('Latitude'), point.get('Longitude'), point.get('Date'), point.get('Description'),
+            point.get('Distance'), point.get('Bearing'), point.get('Units'), ref[0], ref[1],
+            point.get('Scale'), json.dumps(extra) if extra else None, sortableDate(point.get('Date')))
+
+def fromRow(row):
+    lat, lon, date, desc, dist, bearing, units, refLat, refLon, scale, extra = row
+    point = {
+        'Latitude': lat,
+        'Longitude': lon,
+        'Date': date,
+        'Description': desc,
+        'Distance': dist,
+        'Bearing': bearing,
+        'Units': units,
+        'ReferencePoint': [refLat, refLon] if refLat is not None else None,
+        'Scale': scale
+    }
+    if extra:
+        point.update(json.loads(extra))
+
+    return point
+
+def exists(directory):
+    '''
+    Check if a project uses the SQLite backend
+    '''
+    return os.path.exists(os.path.join(directory, DATABASE))
+
+def importJSON(directory):
+    '''
+    Create project_data.db from project_data.json and the journal of a project.
+    The database is built next to the project and renamed when complete.
+
+    Returns:
+        store (ProjectStore): store of the project
+    '''
+    with open(os.path.join(directory, ProjectJournal.SNAPSHOT), 'r') as f:
+        data = ProjectJournal.replay(directory, json.loads(f.read()))
+
+    path = os.path.join(directory, DATABASE)
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    db = sqlite3.connect(tmp)
+    db.executescript(SCHEMA)
+    with db:
+        db.executemany('INSERT INTO Meta VALUES (?, ?)',
+                       [(k, json.dumps(v)) for k, v in data.items() if k not in ('Points', 'JournalSeq')])
+        db.executemany(f'INSERT INTO Points ({COLUMNS}, Timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                       (toRow(p) for p in data.get('Points') or []))
+    db.close()
+    os.replace(tmp, path)
+
+    return ProjectStore(directory)
+
+def exportJSON(directory):
+    '''
+    Write project_data.json from project_data.db. The snapshot covers the
+    existing journal so old journal records aren't applied again.
+    '''
+    store = ProjectStore(directory)
+    data = store.projectData()
+    store.close()
+
+    data['JournalSeq'] = ProjectJournal.lastSeq(directory)
+    ProjectJournal.atomicWrite(os.path.join(directory, ProjectJournal.SNAPSHOT), json.dumps(data, indent=2))
+
+if __name__ == '__main__':
+    #Convert a project: python ProjectStore.py import|export ./Projects/{Project_Name}
+    if len(sys.argv) != 3 or sys.argv[1] not in ('import', 'export'):
+        sys.exit('usage: ProjectStore.py import|export PROJECT_DIRECTORY')
+
+    if sys.argv[1] == 'import':
+        importJSON(sys.argv[2]).close()
+    else:
+        exportJSON(sys.argv[2])
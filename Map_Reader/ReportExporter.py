@@ -0,0 +1,504 @@
+import os
+import csv
+import json
+import html
+import shutil
+
+from PyQt5.QtCore import QObject, QThread, QMetaObject, Qt, Q_ARG, pyqtSignal, pyqtSlot
+
+import ProjectJournal
+
+#Points written between progress updates
+CHUNK = 5000
+
+#Column kinds, the dtype pandas.DataFrame infers from the values of a column
+INT, FLOAT, BOOL, STR, OBJECT = range(5)
+
+#Python types of column values saved by name in the report state, other types are objects
+TYPES = {t.__name__: t for t in (int, float, bool, str, type(None), object)}
+
+#Columns of a points list with the kind of their values, found in one pass over the
+#points without building a DataFrame, so exports match what pandas wrote
+class Columns():
+    def __init__(self, points=(), state=None):
+        '''
+        Args:
+            points (list): points of the report
+            state (dict): columns of points already written (see state()), points are added to them
+        '''
+        self.names = []
+        self.types = {}
+        self.missing = set()
+        self.count = 0
+
+        if state:
+            self.names = list(state['Names'])
+            self.types = {name: {TYPES.get(t, object) for t in types} for name, types in state['Types'].items()}
+            self.missing = set(state['Missing'])
+            self.count = state['Count']
+
+        self.add(points)
+
+    def add(self, points):
+        '''
+        Add the columns and value types of points written after the others
+        '''
+        #Points of a project share a few layouts, each distinct (keys, value types) is looked at once
+        layouts = {}
+        for point in points:
+            layouts[(tuple(point), tuple(map(type, point.values())))] = None
+
+        for keys, valueTypes in layouts:
+            for key, valueType in zip(keys, valueTypes):
+                if key not in self.types:
+                    self.types[key] = set()
+                    self.names.append(key)
+                    #Points written before don't have the column
+                    if self.count:
+                        self.missing.add(key)
+                self.types[key].add(valueType)
+
+        #A column missing from some points holds NaN for them
+        for key in self.names:
+            if any(key not in keys for keys, _ in layouts):
+                self.missing.add(key)
+
+        #Integers outside int64 are kept as objects
+        for key in self.names:
+            if int in self.types[key] and object not in self.types[key]:
+                if any(type(v) is int and not -2**63 <= v < 2**63 for v in (p.get(key) for p in points)):
+                    self.types[key].add(object)
+
+        self.count += len(points)
+        self.kinds = [columnKind(self.types[key], key in self.missing) for key in self.names]
+
+    def values(self, point):
+        '''
+        Returns (value, kind) of every column of a point, None for a missing value
+        '''
+        return [(point.get(key), kind) for key, kind in zip(self.names, self.kinds)]
+
+    def state(self):
+        '''
+        Returns the columns as JSON data, Columns(state=...) continues from it
+        '''
+        return {
+            'Names': self.names,
+            'Types': {name: sorted(typeName(t) for t in self.types[name]) for name in self.names},
+            'Missing': sorted(self.missing),
+            'Count': self.count
+        }
+
+def typeName(t):
+    return t.__name__ if TYPES.get(t.__name__) is t else 'object'
+
+def columnKind(types, missing):
+    '''
+    Kind pandas gives a column holding values of types, missing is True if
+    the column is absent from some points
+    '''
+    empty = missing or type(None) in types
+    types = types - {type(None)}
+
+    if not types or types <= {int, float}:
+        return INT if types == {int} and not empty else FLOAT
+    if types == {bool}:
+        return OBJECT if empty else BOOL
+    if types == {str}:
+        return STR
+
+    return OBJECT
+
+def isMissing(value):
+    return value is None or (type(value) is float and value != value)
+
+def formatValue(value, kind):
+    '''
+    Format a value like pandas.DataFrame.to_csv, missing values are empty
+    '''
+    if isMissing(value):
+        return ''
+    if kind == FLOAT:
+        return repr(float(value))
+
+    return value if type(value) is str else str(value)
+
+def formatFloat(value):
+    if type(value) is float and value == value:
+        return repr(value)
+
+    return formatValue(value, FLOAT)
+
+def formatStr(value):
+    return value if type(value) is str else formatValue(value, STR)
+
+def formatter(kind):
+    '''
+    Returns the function formatting values of a column kind, the usual
+    float and string values are formatted without further checks
+    '''
+    if kind == FLOAT:
+        return formatFloat
+    if kind == STR:
+        return formatStr
+
+    return lambda value: formatValue(value, kind)
+
+#Writers share open(path, columns), writeRows(points) and close() so one pass over
+#the points can feed several formats, each file is written through a temporary file
+class ReportWriter():
+    extension = ''
+    newline = None
+
+    #Rows can be added to the end of an existing report
+    appendable = False
+
+    #Rows are formatted by the kinds of the columns of every point
+    columnar = False
+
+    def open(self, path, columns, append=False):
+        '''
+        Start the report, if append is True rows are added to the existing report at path
+        '''
+        self.path = path
+        self.columns = columns
+        self.appending = append
+
+        if append:
+            self.size = os.path.getsize(path)
+            self.file = open(path, 'a', newline=self.newline, encoding='utf-8')
+        else:
+            self.file = open(path + '.tmp', 'w', newline=self.newline, encoding='utf-8')
+        self.begin()
+
+    def begin(self):
+        pass
+
+    def writeRows(self, points):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+    def close(self):
+        '''
+        Finish the file and move it to its path
+        '''
+        self.end()
+        self.file.close()
+        if not self.appending:
+            os.replace(self.path + '.tmp', self.path)
+
+    def abort(self):
+        '''
+        Close and remove the unfinished file, rows appended to a report are removed
+        '''
+        self.file.close()
+        try:
+            if self.appending:
+                os.truncate(self.path, self.size)
+            else:
+                os.remove(self.path + '.tmp')
+        except OSError:
+            pass
+
+class CSVWriter(ReportWriter):
+    extension = 'csv'
+    newline = ''
+    appendable = True
+    columnar = True
+
+    def begin(self):
+        #Same dialect as DataFrame.to_csv(index=False)
+        self.writer = csv.writer(self.file, lineterminator='\n', quoting=csv.QUOTE_MINIMAL)
+        if not self.appending:
+            self.writer.writerow(self.columns.names)
+
+    def writeRows(self, points):
+        columns = [(name, formatter(kind)) for name, kind in zip(self.columns.names, self.columns.kinds)]
+        self.writer.writerows([format(p.get(name)) for name, format in columns] for p in points)
+
+class JSONLinesWriter(ReportWriter):
+    extension = 'jsonl'
+    appendable = True
+
+    def writeRows(self, points):
+        #One point per line
+        self.file.write(''.join(json.dumps(point) + '\n' for point in points))
+
+class JSONWriter(ReportWriter):
+    extension = 'json'
+
+    def begin(self):
+        self.encoder = json.JSONEncoder(indent=2)
+        self.count = 0
+
+    def writeRows(self, points):
+        if not points:
+            return
+
+        #Same text as json.dumps(points, indent=2), a chunk is encoded as a list without its brackets
+        text = self.encoder.encode(list(points))[1:-2]
+        self.file.write((',' if self.count else '[') + text)
+        self.count += len(points)
+
+    def end(self):
+        self.file.write('\n]' if self.count else '[]')
+
+class ExcelWriter(ReportWriter):
+    extension = 'xlsx'
+
+    def open(self, path, columns, append=False):
+        #openpyxl is only loaded for Excel exports, write only mode streams rows to disk
+        from openpyxl import Workbook
+
+        self.path = path
+        self.columns = columns
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Sheet1')
+        self.sheet.append(columns.names)
+
+    def writeRows(self, points):
+        for point in points:
+            self.sheet.append([excelValue(v, kind) for v, kind in self.columns.values(point)])
+
+    def close(self):
+        self.workbook.save(self.path + '.tmp')
+        os.replace(self.path + '.tmp', self.path)
+
+    def abort(self):
+        self.workbook = None
+        try:
+            os.remove(self.path + '.tmp')
+        except OSError:
+            pass
+
+def excelValue(value, kind):
+    '''
+    Cell value of a point value, values Excel can't hold are written as text
+    '''
+    if isMissing(value):
+        return None
+    if type(value) in (int, float, bool, str):
+        return value
+
+    return str(value)
+
+class HTMLWriter(ReportWriter):
+    extension = 'html'
+
+    def begin(self):
+        #Same layout as DataFrame.to_html(index=False)
+        header = ''.join(f'      <th>{html.escape(str(name), quote=False)}</th>\n' for name in self.columns.names)
+        self.file.write('<table border="1" class="dataframe">\n  <thead>\n    <tr style="text-align: right;">\n'
+                        f'{header}    </tr>\n  </thead>\n  <tbody>\n')
+
+    def writeRows(self, points):
+        rows = []
+        for point in points:
+            cells = ''.join(f'      <td>{htmlValue(v, kind)}</td>\n' for v, kind in self.columns.values(point))
+            rows.append(f'    <tr>\n{cells}    </tr>\n')
+        self.file.write(''.join(rows))
+
+    def end(self):
+        self.file.write('  </tbody>\n</table>')
+
+def htmlValue(value, kind):
+    if value is None and kind in (STR, OBJECT):
+        return 'None'
+    if isMissing(value):
+        return 'NaN'
+
+    return html.escape(formatValue(value, kind), quote=False)
+
+WRITERS = {'CSV': CSVWriter, 'JSON': JSONWriter, 'JSON Lines': JSONLinesWriter, 'Excel': ExcelWriter, 'HTML': HTMLWriter}
+
+#Report state of a project, kept in its Reports directory
+STATE = 'reports.json'
+
+def loadState(path):
+    '''
+    Returns the report state saved at path, {} if there is none
+
+    The state holds an entry for each appendable format last exported with it:
+    {'Path': report path, 'Count': points written, 'Size': file size, 'First' and
+    'Last': JSON of the first and last point written, 'Columns': CSV columns (see Columns.state())}
+    '''
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return state if isinstance(state, dict) else {}
+
+def removeState(path):
+    '''
+    Remove the report state saved at path, e.g. after points were edited in place,
+    the next incremental export then writes every report again
+    '''
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def resume(entry, points, path):
+    '''
+    Find where a report of the state can be continued, the report is copied
+    to path if it was written to another path (the report of an earlier day)
+
+    Returns:
+        (start, columns): first point to append and columns of the report,
+            None if the report must be written again
+    '''
+    if not entry:
+        return None
+
+    #The report was changed or removed since it was written
+    try:
+        if os.path.getsize(entry['Path']) != entry['Size']:
+            return None
+    except OSError:
+        return None
+
+    #Points written must still be the first points of the project, points are only added
+    #by the application so the first and last point written are compared, not every point.
+    #Edits in place (see Reprojection) remove the state instead (see removeState)
+    count = entry['Count']
+    if count > len(points):
+        return None
+    if count and (json.dumps(dict(points[0])) != entry['First'] or json.dumps(dict(points[count - 1])) != entry['Last']):
+        return None
+
+    columns = None
+    if 'Columns' in entry:
+        columns = Columns(points[count:], entry['Columns'])
+        #New columns or kinds would change the header or the rows already written
+        if columns.names != entry['Columns']['Names'] or columns.kinds != Columns(state=entry['Columns']).kinds:
+            return None
+
+    if os.path.abspath(entry['Path']) != os.path.abspath(path):
+        shutil.copyfile(entry['Path'], path)
+
+    return count, columns
+
+def export(points, targets, progress=None, statePath=None):
+    '''
+    Write points to every target in one pass
+
+    Args:
+        points (list): points to export
+        targets (list): (format, path) pairs, format is a key of WRITERS
+        progress (callable): called with the share of points written (0-1000)
+        statePath (str): report state (see loadState), if given CSV and JSON Lines
+            reports only get the points added since they were last written
+    '''
+    state = loadState(statePath) if statePath else {}
+    total = len(points)
+    columns = None
+    writers = []
+
+    try:
+        for fmt, path in targets:
+            writer = WRITERS[fmt]()
+            resumed = resume(state.get(fmt), points, path) if statePath and writer.appendable else None
+
+            if resumed:
+                start, resumedColumns = resumed
+                writer.open(path, resumedColumns, append=True)
+            else:
+                #Columns of all points are only needed by reports written again
+                if columns is None:
+                    columns = Columns(points)
+                start = 0
+                writer.open(path, columns)
+            writers.append((writer, start))
+
+        #Every writer starts at its first point, the points are read once
+        first = min((start for _, start in writers), default=total)
+        for begin in range(first, total, CHUNK):
+            end = min(total, begin + CHUNK)
+            chunks = {}
+            for writer, start in writers:
+                if start < end:
+                    offset = max(begin, start)
+                    if offset not in chunks:
+                        chunks[offset] = points[offset:end]
+                    writer.writeRows(chunks[offset])
+
+            if progress:
+                progress((end - first) * 1000 // (total - first))
+    except BaseException:
+        for writer, _ in writers:
+            writer.abort()
+        raise
+
+    for writer, _ in writers:
+        writer.close()
+
+    if statePath:
+        for (fmt, path), (writer, _) in zip(targets, writers):
+            if writer.appendable:
+                state[fmt] = {
+                    'Path': path,
+                    'Count': total,
+                    'Size': os.path.getsize(path),
+                    'First': json.dumps(dict(points[0])) if total else None,
+                    'Last': json.dumps(dict(points[-1])) if total else None
+                }
+                if writer.columnar:
+                    state[fmt]['Columns'] = writer.columns.state()
+
+        ProjectJournal.atomicWrite(statePath, json.dumps(state, indent=2))
+
+#Worker writing reports on its own QThread, exports are done in the order they were started
+class ReportExporter(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self):
+        super(ReportExporter, self).__init__()
+
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self.thread.start()
+
+    def start(self, points, targets, statePath=None):
+        '''
+        Queue an export, points must not change while it is written (pass a copy)
+
+        Args:
+            points (list): points to export
+            targets (list): (format, path) pairs
+            statePath (str): report state, CSV and JSON Lines reports are appended to (see export)
+        '''
+        QMetaObject.invokeMethod(self, 'write', Qt.QueuedConnection, Q_ARG(object, points),
+                                 Q_ARG(object, targets), Q_ARG(object, statePath))
+
+    def forget(self, statePath):
+        '''
+        Queue removing a report state after the exports already queued, which would
+        otherwise save it again with points that are out of date
+        '''
+        QMetaObject.invokeMethod(self, 'drop', Qt.QueuedConnection, Q_ARG(object, statePath))
+
+    @pyqtSlot(object)
+    def drop(self, statePath):
+        removeState(statePath)
+
+    @pyqtSlot(object, object, object)
+    def write(self, points, targets, statePath):
+        try:
+            export(points, targets, self.progress.emit, statePath)
+        except Exception as e:
+            self.failed.emit(targets, f'{e.__class__.__name__}: {e}')
+        else:
+            self.finished.emit(targets)
+
+    def stop(self):
+        '''
+        Wait for queued exports and stop the worker thread
+        '''
+        self.thread.quit()
+        self.thread.wait()
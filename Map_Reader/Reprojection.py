@@ -0,0 +1,192 @@
+import numpy as np
+
+import Geodesic
+from ColumnSnapshot import toFloat
+
+#Points located at a time, the temporaries of the geodesic solver for a chunk stay in the CPU cache
+CHUNK = 16384
+
+#Fields of a point changed by a reprojection, compared in the diff
+FIELDS = ('Latitude', 'Longitude', 'Distance', 'Bearing')
+
+#Mean earth radius in meters, only used to show how far points moved
+EARTH_RADIUS = 6371008.8
+
+def roundLike(values, digits):
+    '''
+    Round an array the way round() rounds each value. np.round scales the values
+    first so values within a hair of a tie can round the other way, those few are
+    rounded again with round().
+    '''
+    rounded = np.round(values, digits)
+    scaled = values * 10.0**digits
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), digits)
+
+    return rounded
+
+def pixelDistance(dx, dy):
+    '''
+    Straight line distances in pixels of traced offsets, see Tracker.getDistance
+    '''
+    return roundLike(np.sqrt(dx * dx + dy * dy), 4)
+
+def pixelBearing(dx, dy):
+    '''
+    Bearings in degrees from grid north of traced offsets, see Tracker.getBearing
+    '''
+    return roundLike((360 + (90 - np.degrees(np.arctan2(dy, dx)))) % 360, 4)
+
+def locate(dx, dy, pixels, bearing, reference, scale, units):
+    '''
+    Locations of points from their pixel offsets with the same arithmetic as
+    Tracker, so a point traced again gets exactly the location Tracker gives
+
+    Args:
+        dx, dy (array): traced pixel offsets, NaN for points without one
+        pixels (array): distances in pixels of points without an offset
+        bearing (array): bearings of points without an offset
+        reference (list): latitude and longitude of the reference point
+        scale (float): pixels per unit
+        units (str): one of km, mi, m, ft
+
+    Returns:
+        lat, lon, dist, bearing (array): new values of the points
+    '''
+    traced = ~np.isnan(dx)
+    pixels = np.where(traced, pixelDistance(dx, dy), pixels)
+    bearing = np.where(traced, pixelBearing(dx, dy), bearing)
+    dist = roundLike(pixels / scale, 4)
+
+    lat, lon = Geodesic.destination(reference, dist, bearing, units)
+
+    return roundLike(lat, 5), roundLike(lon, 5), dist, bearing
+
+def shift(lat1, lon1, lat2, lon2):
+    '''
+    Great circle distances in meters between two sets of locations
+    '''
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+def column(points, field):
+    '''
+    Float64 array of a numeric field of every point, NaN where a point has no
+    number. PointStore and SnapshotPoints read their columns, other point
+    lists are read point by point.
+    '''
+    if hasattr(points, 'column'):
+        return points.column(field)
+
+    return np.array([toFloat(p.get(field)) for p in points], dtype=np.float64)
+
+#Locations of points computed again against a new reference point, scale or units, in
+#one vectorized pass. Traced points are located from their stored pixel offsets
+#(PixelDX, PixelDY), points added before offsets were stored from their distance in
+#pixels (Distance * Scale) and bearing. Points with neither can't be recomputed and are
+#skipped. Nothing is changed until apply() is called, the before and after values are
+#kept for the diff.
+class Reprojection():
+    def __init__(self, points, reference, scale, units, rows=None):
+        '''
+        Args:
+            points (list): points of the project (PointStore, SnapshotPoints or list of dicts)
+            reference (list): latitude and longitude of the new reference point
+            scale (float): new scale in pixels per unit
+            units (str): new units, one of km, mi, m, ft
+            rows (list): indexes of the points to recompute, every point if None
+        '''
+        if not scale or scale <= 0:
+            raise ValueError(f'scale must be positive: {scale}')
+        Geodesic.toMeters(0, units)
+
+        self.reference = [float(reference[0]), float(reference[1])]
+        self.scale = scale
+        self.units = units
+
+        rows = np.arange(len(points), dtype=np.int64) if rows is None else np.unique(np.asarray(rows, dtype=np.int64))
+        values = {field: column(points, field)[rows] for field in FIELDS + ('Scale', 'PixelDX', 'PixelDY')}
+
+        dx, dy = values['PixelDX'], values['PixelDY']
+        traced = ~np.isnan(dx) & ~np.isnan(dy)
+        pixels = values['Distance'] * values['Scale']
+        usable = traced | (np.isfinite(pixels) & (values['Scale'] > 0) & np.isfinite(values['Bearing']))
+
+        #Indexes of the points recomputed and of the points skipped
+        self.rows = rows[usable]
+        self.skipped = rows[~usable]
+        self.traced = traced[usable]
+        self.before = {field: values[field][usable] for field in FIELDS}
+
+        dx, dy, pixels, bearing = dx[usable], dy[usable], pixels[usable], values['Bearing'][usable]
+        self.after = {field: np.empty(len(self.rows), dtype=np.float64) for field in FIELDS}
+        self.shift = np.empty(len(self.rows), dtype=np.float64)
+        for start in range(0, len(self.rows), CHUNK):
+            chunk = slice(start, start + CHUNK)
+            located = locate(dx[chunk], dy[chunk], pixels[chunk], bearing[chunk], self.reference, scale, units)
+            for field, result in zip(FIELDS, located):
+                self.after[field][chunk] = result
+
+            #Meters each point moved, NaN if it had no location
+            with np.errstate(invalid='ignore'):
+                self.shift[chunk] = shift(self.before['Latitude'][chunk], self.before['Longitude'][chunk],
+                                          located[0], located[1])
+
+        #NaN before, e.g. a Bearing of None, counts as changed
+        self.changed = np.zeros(len(self.rows), dtype=bool)
+        for field in FIELDS:
+            self.changed |= self.before[field] != self.after[field]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def summary(self):
+        '''
+        Returns counts of the points recomputed, changed and skipped and the
+        largest and mean move in meters of the changed points
+        '''
+        moved = self.shift[self.changed & ~np.isnan(self.shift)]
+
+        return {
+            'Points': len(self.rows),
+            'Changed': int(self.changed.sum()),
+            'Skipped': len(self.skipped),
+            'MaxShift': float(moved.max()) if len(moved) else 0.0,
+            'MeanShift': float(moved.mean()) if len(moved) else 0.0
+        }
+
+    def diff(self, limit=None):
+        '''
+        Before and after values of the changed points, the points that moved
+        the most first
+
+        Args:
+            limit (int): max number of points, all changed points if None
+
+        Returns:
+            list of dicts: {'Point': point ID, 'Before': {field: value}, 'After': {field: value}, 'Shift': meters}
+        '''
+        changed = np.flatnonzero(self.changed)
+        keys = -np.nan_to_num(self.shift[changed], nan=np.inf)
+
+        #Only the points shown are sorted
+        if limit is not None and limit < len(changed):
+            top = np.sort(np.argpartition(keys, limit)[:limit])
+            changed, keys = changed[top], keys[top]
+        order = changed[np.argsort(keys, kind='stable')]
+
+        return [{
+            'Point': int(self.rows[i]) + 1,
+            'Before': {field: float(self.before[field][i]) for field in FIELDS},
+            'After': {field: float(self.after[field][i]) for field in FIELDS},
+            'Shift': float(self.shift[i])
+        } for i in order]
+
+    def apply(self, points):
+        '''
+        Write the new locations, reference point, scale and units to the
+        recomputed points of a PointStore
+        '''
+        points.setLocations(self.rows, *(self.after[field] for field in FIELDS), self.reference, self.scale, self.units)
@@ -0,0 +1,114 @@
+import time
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+#Class to merge bursts of save requests into one write done on a worker thread
+class SaveScheduler(QObject):
+    failed = pyqtSignal(str)
+
+    def __init__(self, capture, write, delay=500, maxDelay=5000, parent=None):
+        '''
+        Args:
+            capture (callable): called on the GUI thread when a save starts, returns
+                a copy of the data to save that isn't changed afterwards
+            write (callable): called on the worker thread with the captured data,
+                serializes it and writes it to disk
+            delay (int): ms without new requests before saving
+            maxDelay (int): max ms a request waits while requests keep coming
+        '''
+        super(SaveScheduler, self).__init__(parent)
+
+        self.capture = capture
+        self.write = write
+        self.maxDelay = maxDelay
+        self.firstRequest = None
+
+        #Worker thread writing captured data, it exits when nothing is left to write.
+        #Data captured while a write is in progress replaces data still waiting,
+        #every capture holds the whole project so only the latest one is written.
+        self.worker = None
+        self.queued = None
+        self.condition = threading.Condition()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.start)
+
+    def schedule(self):
+        '''
+        Request a save. Restarts the delay so a burst of requests becomes one
+        write, unless the first request of the burst waited maxDelay already.
+        '''
+        now = time.monotonic()
+
+        if self.firstRequest is None:
+            self.firstRequest = now
+
+        if (now - self.firstRequest) * 1000 >= self.maxDelay:
+            self.start()
+        else:
+            self.timer.start()
+
+    def pending(self):
+        '''
+        Check if a requested save hasn't started yet
+        '''
+        return self.firstRequest is not None
+
+    def start(self):
+        '''
+        Capture data on the GUI thread and write it on the worker thread. Never
+        waits for the write in progress, writes are done in order.
+        '''
+        self.timer.stop()
+        self.firstRequest = None
+
+        self.submit(self.capture())
+
+    def submit(self, data):
+        '''
+        Hand captured data to the worker thread, starting it if it isn't running
+        '''
+        with self.condition:
+            self.queued = (data,)
+
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.queued is None:
+                    self.worker = None
+                    self.condition.notify_all()
+                    return
+
+                (data,), self.queued = self.queued, None
+
+            try:
+                self.write(data)
+            except Exception as e:
+                self.failed.emit(f'{e.__class__.__name__}: {e}')
+
+    def wait(self):
+        '''
+        Wait for the write in progress and captured data still waiting to be written
+        '''
+        with self.condition:
+            while self.worker is not None:
+                self.condition.wait()
+
+    def flush(self):
+        '''
+        Write a pending save now and wait until everything is on disk.
+        Hook for closing the project or exiting the application.
+        '''
+        if self.pending():
+            self.timer.stop()
+            self.firstRequest = None
+            self.submit(self.capture())
+
+        self.wait()
@@ -0,0 +1,530 @@
+import string
+import threading
+from bisect import bisect_left
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ColumnSnapshot import NO_TIME
+
+#Punctuation separates tokens like spaces, tokens are compared in lower case
+SEPARATORS = str.maketrans({c: ' ' for c in string.punctuation})
+
+#Token put between descriptions when a batch is split in one pass, it can't be a token itself
+MARK = '\x00'
+
+#Rows appended to a sorted column before it is sorted again, relative to its sorted rows
+TAIL = 8
+MIN_TAIL = 4096
+
+#Rows of the biggest description segment. A segment is built by a few long calls that
+#hold the GIL, small segments keep the GUI thread running while a worker builds them
+SEGMENT = 8192
+
+#Rows read from the model at once when a column is sorted, for the same reason
+CHUNK = 8192
+
+#Rows not indexed yet that a query indexes itself when indexes are built on a worker
+#thread (see IndexWorker), with more rows than that the query waits for the worker
+SYNC = 8192
+
+def tokenize(text):
+    '''
+    Lower case tokens of a text, split at spaces and punctuation
+    '''
+    return text.lower().translate(SEPARATORS).split()
+
+def sortedUnique(values):
+    '''
+    Sorted distinct values of an int64 array, sorting and comparing neighbours
+    is much faster than np.unique for the large arrays of an index
+    '''
+    values = np.sort(values)
+    if len(values):
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+    return values
+
+def inRange(value, bounds):
+    '''
+    Whether value is from the smallest to the largest of bounds, either can be None
+    '''
+    lo, hi = bounds
+
+    return (lo is None or value >= lo) and (hi is None or value <= hi)
+
+#Inverted index of the descriptions of a run of rows. Tokens are kept sorted so every
+#token starting with a prefix is a contiguous run, and the rows of each token are
+#stored one token after the other (offsets give where the rows of a token start), so
+#the rows of a prefix are one slice. Built once, rows added later go in a new segment.
+class TokenSegment():
+    def __init__(self, start, texts):
+        '''
+        Args:
+            start (int): row of the first text
+            texts (list): descriptions of rows start, start+1, ...
+        '''
+        self.start = start
+        self.stop = start + len(texts)
+
+        #Split the whole batch in one pass, each MARK ends the tokens of a row
+        words = f' {MARK} '.join(texts).lower().translate(SEPARATORS).split()
+        ids = {}
+        first = np.fromiter(map(ids.setdefault, words, range(len(words))), dtype=np.int64, count=len(words))
+        marks = first == ids.get(MARK, -1)
+
+        if int(marks.sum()) == len(texts) - 1:
+            rows = np.cumsum(marks)[~marks]
+            first = first[~marks]
+            ids.pop(MARK, None)
+        else:
+            #A description containing MARK would shift the rows, those batches are split text by text
+            words, rows = [], []
+            for row, text in enumerate(texts):
+                tokens = tokenize(text)
+                words.extend(tokens)
+                rows.extend([row] * len(tokens))
+            rows = np.array(rows, dtype=np.int64)
+            ids = {}
+            first = np.fromiter(map(ids.setdefault, words, range(len(words))), dtype=np.int64, count=len(words))
+
+        self.tokens = sorted(ids)
+
+        #Rank of each token in sorted order, indexed by the position it was first seen at
+        rank = np.empty(len(words), dtype=np.int64)
+        rank[np.fromiter((ids[token] for token in self.tokens), dtype=np.int64, count=len(self.tokens))] = np.arange(len(self.tokens))
+
+        #Pairs of (token rank, row) sorted and without repeats, packed in one int64
+        width = len(texts) + 1
+        keys = sortedUnique(rank[first] * width + rows)
+        self.rows = keys % width + start
+        self.offsets = np.searchsorted(keys // width, np.arange(len(self.tokens) + 1))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def match(self, prefix):
+        '''
+        Rows with a token starting with prefix, a row with several such tokens
+        is repeated. Rows are only used to fill masks, they aren't made unique.
+        '''
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + '\U0010ffff', lo)
+
+        return self.rows[self.offsets[lo]:self.offsets[hi]]
+
+#Descriptions of every row as segments that double in size up to SEGMENT rows, rows
+#appended since the last query are indexed in new segments and small segments are
+#merged into bigger ones, so appending rows one at a time costs a few segment builds
+#per row overall
+class TokenIndex():
+    def __init__(self, texts):
+        '''
+        Args:
+            texts (function): texts(start, stop) returns the descriptions of rows start to stop
+        '''
+        self.texts = texts
+        self.segments = []
+        self.count = 0
+
+    def sync(self, count):
+        '''
+        Index rows appended up to count
+        '''
+        for start in range(self.count, count, SEGMENT):
+            self.segments.append(TokenSegment(start, self.texts(start, min(count, start + SEGMENT))))
+            self.count = self.segments[-1].stop
+
+            while len(self.segments) > 1 and len(self.segments[-2]) <= 2 * len(self.segments[-1]) \
+                    and self.segments[-1].stop - self.segments[-2].start <= SEGMENT:
+                last = self.segments.pop()
+                first = self.segments.pop().start
+                self.segments.append(TokenSegment(first, self.texts(first, last.stop)))
+
+    def copy(self):
+        '''
+        Index sharing the segments built so far, segments aren't changed once built
+        '''
+        index = TokenIndex(self.texts)
+        index.segments = list(self.segments)
+        index.count = self.count
+
+        return index
+
+    def match(self, prefix):
+        '''
+        Rows with a token starting with prefix, see TokenSegment.match
+        '''
+        found = [segment.match(prefix) for segment in self.segments]
+
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+#Values of a numeric column sorted with their rows, rows appended since the column was
+#sorted are compared directly until there are enough of them to sort and merge in
+class SortedColumn():
+    def __init__(self, keys, missing=None):
+        '''
+        Args:
+            keys (function): keys(start, stop) returns the values of rows start to stop
+            missing: value of rows without a value (NaN if None), never in a range
+        '''
+        self.keys = keys
+        self.missing = missing
+        self.values = np.empty(0)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.count = 0
+
+    def sync(self, count, force=False):
+        '''
+        Sort the rows appended up to count and merge them in if there are enough
+        of them, or any with force. Rows with equal values can be in any order.
+        '''
+        if count > self.count and (force or count - self.count > max(MIN_TAIL, self.count // TAIL)):
+            values = np.concatenate([self.keys(start, min(count, start + CHUNK)) for start in range(self.count, count, CHUNK)])
+            rows = np.argsort(values, kind='stable')
+            rows = rows[~self.isMissing(values[rows])]
+            values = values[rows]
+            rows += self.count
+
+            if len(self.values):
+                at = np.searchsorted(self.values, values, 'right')
+                values = np.insert(self.values, at, values)
+                rows = np.insert(self.rows, at, rows)
+            self.values, self.rows = values, rows
+            self.count = count
+
+    def copy(self):
+        '''
+        Column sharing the sorted values, they're replaced when sorted again, never changed
+        '''
+        column = SortedColumn(self.keys, self.missing)
+        column.values, column.rows, column.count = self.values, self.rows, self.count
+
+        return column
+
+    def isMissing(self, values):
+        return np.isnan(values) if self.missing is None else values == self.missing
+
+    def range(self, count, lo=None, hi=None, sort=True):
+        '''
+        Rows with a value from lo to hi (inclusive), either end can be open
+
+        Args:
+            sort (bool): sort again if enough rows were appended, otherwise rows
+                appended since the column was sorted are compared directly
+
+        Returns:
+            rows (array): rows of the sorted values first, unsorted
+        '''
+        if sort:
+            self.sync(count)
+
+        a = np.searchsorted(self.values, lo, 'left') if lo is not None else 0
+        b = np.searchsorted(self.values, hi, 'right') if hi is not None else len(self.values)
+        rows = self.rows[a:b]
+
+        if count > self.count:
+            tail = self.keys(self.count, count)
+            inside = ~self.isMissing(tail)
+            if lo is not None:
+                inside &= tail >= lo
+            if hi is not None:
+                inside &= tail <= hi
+            rows = np.concatenate((rows, np.flatnonzero(inside) + self.count))
+
+        return rows
+
+#Indexes used by the filter bar of the points table (see PointModel.setFilter). Every
+#index is built the first time it's queried and brought up to date with rows appended
+#since at each query. Rows edited in place are checked directly until there are
+#enough of them to build the indexes again.
+#With a worker (see IndexWorker) the indexes are built on its thread as rows are
+#added instead, queries only index the last few rows themselves (see ready).
+class SearchIndex():
+    NAMES = ('text', 'date', 'lat', 'lon')
+
+    def __init__(self, model, worker=None):
+        '''
+        Args:
+            model (PointModel): columns of the points, rows are storage rows
+            worker (IndexWorker): builds the indexes on its thread, None to build them when queried
+        '''
+        self.model = model
+        self.worker = worker
+
+        #Builds started before the indexes were dropped are ignored
+        self.generation = 0
+        self.building = False
+        self.reset()
+
+    def reset(self, *names):
+        '''
+        Drop the indexes with names (text, date, lat, lon), every index if none are given
+        '''
+        for name in names or self.NAMES:
+            setattr(self, name, None)
+
+        if not names:
+            self.dirty = set()
+
+        self.generation += 1
+        self.building = False
+        self.schedule()
+
+    def create(self, name):
+        '''
+        Empty index of name reading the model columns, called on the worker thread too.
+        Columns are read by slicing, which copies them at once, so rows appended on the
+        GUI thread meanwhile can't resize an array while it's being read.
+        '''
+        model = self.model
+
+        if name == 'text':
+            return TokenIndex(model.descriptions)
+        if name == 'date':
+            return SortedColumn(model.timestamps, NO_TIME)
+
+        return SortedColumn(lambda start, stop: np.frombuffer(getattr(model, name)[start:stop], dtype=np.float64))
+
+    def needed(self, text='', dates=None, lat=None, lon=None):
+        '''
+        Names of the indexes a query of the criteria reads
+        '''
+        criteria = [tokenize(text or ''), dates, lat, lon]
+
+        return [name for name, value in zip(self.NAMES, criteria) if value and value != (None, None)]
+
+    def ready(self, text='', dates=None, lat=None, lon=None):
+        '''
+        Whether a query of the criteria indexes at most SYNC rows itself, always
+        True without a worker. A build is started if one is needed.
+        '''
+        if self.worker is None:
+            return True
+
+        if self.behind(*self.needed(text, dates, lat, lon)) <= SYNC:
+            return True
+
+        self.schedule()
+        return False
+
+    def behind(self, *names):
+        '''
+        Most rows not indexed yet by the indexes with names, rows of an index not built count too
+        '''
+        count = len(self.model.pid)
+
+        return max([count - (getattr(self, name).count if getattr(self, name) else 0) for name in names], default=0)
+
+    def schedule(self):
+        '''
+        Start building the indexes on the worker thread if any of them is more
+        than SYNC rows behind. Indexes built so far are copied and extended.
+        '''
+        if self.worker is None or self.building or self.behind(*self.NAMES) <= SYNC:
+            return
+
+        self.building = True
+        indexes = {name: getattr(self, name) and getattr(self, name).copy() for name in self.NAMES}
+        self.worker.submit(self, self.generation, indexes, len(self.model.pid))
+
+    def install(self, generation, indexes):
+        '''
+        Use indexes built by the worker, called on the GUI thread
+
+        Returns:
+            installed (bool): False if the indexes were dropped since the build started
+        '''
+        if generation != self.generation:
+            return False
+
+        self.building = False
+
+        #The build failed, indexes are built when queried from now on
+        if indexes is None:
+            self.worker = None
+            return False
+
+        #Rows a query indexed itself meanwhile may be missing from the build
+        for name, index in indexes.items():
+            current = getattr(self, name)
+            if current is None or index.count >= current.count:
+                setattr(self, name, index)
+
+        #Rows added while the indexes were built
+        self.schedule()
+        return True
+
+    def changed(self, row):
+        '''
+        Check storage row directly from now on, its fields were edited
+        '''
+        self.dirty.add(row)
+        if len(self.dirty) > MIN_TAIL:
+            self.reset()
+
+    def matches(self, row, text='', dates=None, lat=None, lon=None):
+        '''
+        Whether storage row matches every criterion (see query), read from the
+        model columns. Checking one row costs the same however many rows there are.
+        '''
+        model = self.model
+        prefixes = tokenize(text or '')
+        dates, lat, lon = (None if bounds == (None, None) else bounds for bounds in (dates, lat, lon))
+
+        if prefixes:
+            tokens = tokenize(model.descriptions(row, row + 1)[0])
+            if not all(any(t.startswith(p) for t in tokens) for p in prefixes):
+                return False
+
+        if dates:
+            timestamp = int(model.timestamps(row, row + 1)[0])
+            if timestamp == NO_TIME or not inRange(timestamp, dates):
+                return False
+
+        if lat and not inRange(model.lat[row], lat):
+            return False
+
+        if lon:
+            west, east = lon
+            if west is not None and east is not None and west > east:
+                return model.lon[row] >= west or model.lon[row] <= east
+            return inRange(model.lon[row], lon)
+
+        return True
+
+    def query(self, text='', dates=None, lat=None, lon=None):
+        '''
+        Rows matching every given criterion
+
+        Args:
+            text (str): every token must start a token of the description
+            dates (tuple): first and last date in seconds since 1970, either can be None
+            lat (tuple): smallest and largest latitude, either can be None
+            lon (tuple): smallest and largest longitude, either can be None. The
+                range crosses the antimeridian when the smallest is larger.
+
+        Returns:
+            mask (array): bool of every storage row, None if no criterion was given
+        '''
+        model = self.model
+        count = len(model.pid)
+        prefixes = tokenize(text or '')
+        dates, lat, lon = (None if bounds == (None, None) else bounds for bounds in (dates, lat, lon))
+        found = []
+
+        #Columns are sorted again by the worker if there is one
+        sort = self.worker is None
+        for name in self.needed(text, dates, lat, lon):
+            if getattr(self, name) is None:
+                setattr(self, name, self.create(name))
+
+        for token in prefixes:
+            self.text.sync(count)
+            found.append(self.text.match(token))
+
+        if dates:
+            found.append(self.date.range(count, *dates, sort=sort))
+
+        if lat:
+            found.append(self.lat.range(count, *lat, sort=sort))
+
+        if lon:
+            west, east = lon
+            if west is not None and east is not None and west > east:
+                found.append(np.concatenate((self.lon.range(count, west, None, sort), self.lon.range(count, None, east, sort))))
+            else:
+                found.append(self.lon.range(count, west, east, sort))
+
+        if not found:
+            return None
+
+        #Rows of the smallest result are checked against the others
+        found.sort(key=len)
+        rows = found[0]
+        for other in found[1:]:
+            if not len(rows):
+                break
+            mask = np.zeros(count, dtype=bool)
+            mask[other] = True
+            rows = rows[mask[rows]]
+
+        mask = np.zeros(count, dtype=bool)
+        mask[rows] = True
+
+        for row in self.dirty:
+            if row < count:
+                mask[row] = self.matches(row, text, dates, lat, lon)
+
+        return mask
+
+#Worker building the indexes of a SearchIndex (see SearchIndex.schedule) on a thread
+#that exits when nothing is left to build, built indexes are sent back with the built
+#signal and installed on the GUI thread. A build replaces the one still waiting, it's
+#only requested once the earlier one was installed or its indexes were dropped.
+class IndexWorker(QObject):
+    built = pyqtSignal(object, int, object)
+
+    def __init__(self, parent=None):
+        super(IndexWorker, self).__init__(parent)
+
+        self.worker = None
+        self.queued = None
+        self.condition = threading.Condition()
+
+    def submit(self, search, generation, indexes, count):
+        '''
+        Queue a build of indexes up to count rows, starting the thread if it isn't running
+
+        Args:
+            search (SearchIndex): index the build is for, passed back with the result
+            generation (int): generation of search when the build started
+            indexes (dict): copies of the indexes built so far by name, None to build one from scratch
+            count (int): rows to index
+        '''
+        with self.condition:
+            self.queued = (search, generation, indexes, count)
+
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.queued is None:
+                    self.worker = None
+                    self.condition.notify_all()
+                    return
+
+                (search, generation, indexes, count), self.queued = self.queued, None
+
+            self.built.emit(search, generation, self.build(search, indexes, count))
+
+    def build(self, search, indexes, count):
+        '''
+        Returns:
+            indexes (dict): indexes brought up to count rows, None if a build failed
+        '''
+        #Rows removed on the GUI thread while they're read, the result is ignored
+        #anyway (see SearchIndex.reset), None also stops later builds
+        try:
+            for name, index in indexes.items():
+                index = index or search.create(name)
+                if isinstance(index, TokenIndex):
+                    index.sync(count)
+                else:
+                    index.sync(count, force=True)
+                indexes[name] = index
+        except Exception:
+            return None
+
+        return indexes
+
+    def wait(self):
+        '''
+        Wait for the build in progress and the build still waiting
+        '''
+        with self.condition:
+            while self.worker is not None:
+                self.condition.wait()
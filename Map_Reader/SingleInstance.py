@@ -0,0 +1,131 @@
+import os
+import json
+import getpass
+import hashlib
+from functools import partial
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+def serverName(projects='./Projects'):
+    '''
+    Name of the local server of the instance using a projects directory,
+    instances of other users or other projects directories don't share it
+    '''
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = ''
+
+    digest = hashlib.sha1(os.path.abspath(projects).encode('utf-8')).hexdigest()[:12]
+
+    return f'MapReader-{user}-{digest}'
+
+def makeRequest(project=None, new=False):
+    '''
+    Returns the request of a command line, project paths are made absolute
+    because the running instance may have another working directory
+
+    Returns:
+        request (dict): {'Open': project directory}, {'New': True} or {} to show the application
+    '''
+    if project:
+        return {'Open': os.path.abspath(project)}
+    if new:
+        return {'New': True}
+
+    return {}
+
+def sendRequest(request, name=None, timeout=1000):
+    '''
+    Pass a request to the running instance, works without a QApplication
+
+    Returns:
+        (bool): True if an instance accepted the request, False if none is running
+    '''
+    socket = QLocalSocket()
+    socket.connectToServer(name or serverName())
+    if not socket.waitForConnected(timeout):
+        return False
+
+    socket.write((json.dumps(request) + '\n').encode('utf-8'))
+    if not socket.waitForBytesWritten(timeout):
+        return False
+
+    #The instance answers once it took the request, a hung instance doesn't
+    reply = b''
+    while b'\n' not in reply:
+        if not socket.waitForReadyRead(timeout):
+            return False
+        reply += bytes(socket.readAll())
+
+    socket.disconnectFromServer()
+
+    return reply.strip() == b'ok'
+
+#Local server of the running instance, requests sent by later launches are emitted
+#with the requested signal. Every request is one JSON line answered with ok.
+class InstanceServer(QObject):
+    requested = pyqtSignal(object)
+
+    def __init__(self, name=None, parent=None):
+        super(InstanceServer, self).__init__(parent)
+
+        self.name = name or serverName()
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.connection)
+        self.buffers = {}
+
+    def listen(self):
+        '''
+        Start listening for later launches
+
+        Returns:
+            (bool): False if another instance is already listening
+        '''
+        if self.server.listen(self.name):
+            return True
+
+        #Remove the server of an instance that crashed, never the one of a running instance
+        socket = QLocalSocket()
+        socket.connectToServer(self.name)
+        if socket.waitForConnected(100):
+            socket.disconnectFromServer()
+            return False
+
+        QLocalServer.removeServer(self.name)
+
+        return self.server.listen(self.name)
+
+    def connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b''
+            socket.readyRead.connect(partial(self.read, socket))
+            socket.disconnected.connect(partial(self.disconnected, socket))
+
+    def read(self, socket):
+        '''
+        Read a request once its line is complete
+        '''
+        self.buffers[socket] += bytes(socket.readAll())
+        if b'\n' not in self.buffers[socket]:
+            return
+
+        line = self.buffers[socket].split(b'\n', 1)[0]
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError:
+            socket.disconnectFromServer()
+            return
+
+        socket.write(b'ok\n')
+        socket.flush()
+        self.requested.emit(request if isinstance(request, dict) else {})
+
+    def disconnected(self, socket):
+        self.buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def close(self):
+        self.server.close()
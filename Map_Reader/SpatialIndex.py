@@ -0,0 +1,237 @@
+import math
+from array import array
+
+import numpy as np
+
+from ColumnSnapshot import toFloat
+from Reprojection import column
+
+#Mean earth radius in meters, distances are great circle distances on a sphere of this radius
+EARTH_RADIUS = 6371008.8
+
+#Default edge of a grid cell in meters
+CELL = 1000
+
+#Bits of each axis in a cell key, cells can't be smaller than 2 / 2**BITS of the radius (~6 m)
+BITS = 21
+OFFSET = 1 << (BITS - 1)
+MIN_CELL = 10
+
+def toUnit(lat, lon):
+    '''
+    Coordinates on the unit sphere (earth centered, earth fixed) of latitudes
+    and longitudes in degrees, NaN where a point has no location
+    '''
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos = np.cos(lat)
+
+    return cos * np.cos(lon), cos * np.sin(lon), np.sin(lat)
+
+def toChord(meters):
+    '''
+    Straight line distance on the unit sphere of a great circle distance in meters
+    '''
+    return 2 * math.sin(min(max(meters, 0) / EARTH_RADIUS, math.pi) / 2)
+
+def toMeters(chord):
+    '''
+    Great circle distances in meters of straight line distances on the unit sphere
+    '''
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(chord / 2, 1))
+
+def interval(lo, hi, values):
+    '''
+    Smallest and largest product of a value in [lo, hi] and a value of values,
+    the range of the product of two independent intervals is at their ends
+    '''
+    products = [lo * v for v in values] + [hi * v for v in values]
+
+    return min(products), max(products)
+
+#Grid over the unit sphere coordinates of project points. Each point is put in the
+#cube shaped cell it falls in, cells are kept in a dict keyed by their packed integer
+#coordinates so points are added one at a time or in batches without rebuilding.
+#Radius and nearest queries only read the cells around the query point, box queries
+#the cells around the box. A query touching more cells than are occupied scans the
+#coordinate columns instead. Points are indexed by their index in the points list,
+#points without a location keep their index but are never found.
+class SpatialIndex():
+    def __init__(self, cell=CELL):
+        '''
+        Args:
+            cell (float): edge of a grid cell in meters, about the radius of the usual query
+        '''
+        if cell < MIN_CELL:
+            raise ValueError(f'cell must be at least {MIN_CELL} m: {cell}')
+
+        self.cell = cell / EARTH_RADIUS
+        self.cells = {}
+        self.lat = array('d')
+        self.lon = array('d')
+        self.xyz = (array('d'), array('d'), array('d'))
+
+    @classmethod
+    def fromPoints(cls, points, cell=CELL):
+        '''
+        Index of every point of a project (PointStore, SnapshotPoints or list of dicts)
+        '''
+        index = cls(cell)
+        index.extend(column(points, 'Latitude'), column(points, 'Longitude'))
+
+        return index
+
+    def __len__(self):
+        return len(self.lat)
+
+    def addPoints(self, points):
+        '''
+        Index points added after the ones already indexed
+        '''
+        self.extend([toFloat(p.get('Latitude')) for p in points], [toFloat(p.get('Longitude')) for p in points])
+
+    def extend(self, lat, lon):
+        '''
+        Index locations added after the ones already indexed
+
+        Args:
+            lat, lon (array): degrees, NaN for points without a location
+        '''
+        start = len(self)
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        xyz = toUnit(lat, lon)
+
+        self.lat.frombytes(lat.tobytes())
+        self.lon.frombytes(lon.tobytes())
+        for axis, values in zip(self.xyz, xyz):
+            axis.frombytes(values.tobytes())
+
+        valid = np.flatnonzero(~np.isnan(xyz[0]))
+        if not len(valid):
+            return
+
+        #Points of a batch are grouped by cell, each cell is extended once
+        keys = self.keys(*(values[valid] for values in xyz))
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        rows = valid[order] + start
+
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], bounds)).tolist()
+        ends = np.concatenate((bounds, [len(keys)])).tolist()
+        for key, s, e in zip(keys[starts].tolist(), starts, ends):
+            self.cells.setdefault(key, array('q')).frombytes(rows[s:e].tobytes())
+
+    def coordinates(self, x, y, z):
+        '''
+        Integer grid coordinates of unit sphere coordinates
+        '''
+        return [np.floor(np.asarray(v) / self.cell).astype(np.int64) + OFFSET for v in (x, y, z)]
+
+    def keys(self, x, y, z):
+        '''
+        Packed cell keys of unit sphere coordinates
+        '''
+        ix, iy, iz = self.coordinates(x, y, z)
+
+        return (ix << 2 * BITS) | (iy << BITS) | iz
+
+    def candidates(self, lo, hi):
+        '''
+        Indexes of the points in the cells overlapping the cube from lo to hi
+        (unit sphere coordinates), every index if that's more cells than are occupied
+        '''
+        #Points are on the unit sphere, the cube is clipped to it
+        lo, hi = np.clip(lo, -1, 1), np.clip(hi, -1, 1)
+        (x0, y0, z0), (x1, y1, z1) = ([int(v) for v in c] for c in (self.coordinates(*lo), self.coordinates(*hi)))
+
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1) > len(self.cells):
+            return np.arange(len(self), dtype=np.int64)
+
+        found = []
+        for ix in range(x0, x1 + 1):
+            for iy in range(y0, y1 + 1):
+                for iz in range(z0, z1 + 1):
+                    rows = self.cells.get((ix << 2 * BITS) | (iy << BITS) | iz)
+                    if rows is not None:
+                        found.append(np.frombuffer(rows, dtype=np.int64))
+
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def radius(self, lat, lon, meters):
+        '''
+        Points within a distance of a location, nearest first
+
+        Args:
+            lat, lon (float): location in degrees
+            meters (float): great circle distance
+
+        Returns:
+            rows (array): indexes of the points
+            distances (array): distances in meters of the points
+        '''
+        center = np.array(toUnit(lat, lon))
+        chord = toChord(meters)
+        rows = self.candidates(center - chord, center + chord)
+
+        #Points without a location are NaN and never within the distance
+        squared = sum((np.frombuffer(axis, dtype=np.float64)[rows] - c)**2 for axis, c in zip(self.xyz, center))
+        within = squared <= chord * chord
+        rows = rows[within]
+        distances = toMeters(np.sqrt(squared[within]))
+
+        order = np.lexsort((rows, distances))
+
+        return rows[order], distances[order]
+
+    def nearest(self, lat, lon, k=1):
+        '''
+        The k points nearest to a location, nearest first. Radius queries are
+        repeated with a doubling distance until k points are found.
+
+        Returns:
+            rows (array): indexes of the points, fewer than k if the index has fewer
+            distances (array): distances in meters of the points
+        '''
+        meters = self.cell * EARTH_RADIUS
+        while True:
+            rows, distances = self.radius(lat, lon, meters)
+            if len(rows) >= k or meters >= math.pi * EARTH_RADIUS:
+                return rows[:k], distances[:k]
+            meters *= 2
+
+    def box(self, south, west, north, east):
+        '''
+        Points inside a latitude/longitude box, in point order. The box crosses
+        the antimeridian when west is greater than east.
+
+        Returns:
+            rows (array): indexes of the points
+        '''
+        south, north = min(south, north), max(south, north)
+        span = (east - west) % 360 or (360 if east != west else 0)
+
+        #Range of each unit sphere coordinate over the box, cos and sin of the longitude
+        #are at their extremes at the ends of the range or at a multiple of 90 degrees in it
+        lons = [west, west + span] + [90 * q for q in range(math.ceil(west / 90), math.floor((west + span) / 90) + 1)]
+        cosLon = [math.cos(math.radians(v)) for v in lons]
+        sinLon = [math.sin(math.radians(v)) for v in lons]
+        cosLat = [math.cos(math.radians(v)) for v in (south, north)]
+        cosLo, cosHi = min(cosLat), (1.0 if south <= 0 <= north else max(cosLat))
+
+        (x0, x1), (y0, y1) = interval(cosLo, cosHi, cosLon), interval(cosLo, cosHi, sinLon)
+        z0, z1 = math.sin(math.radians(south)), math.sin(math.radians(north))
+
+        pad = 1e-12
+        rows = self.candidates((x0 - pad, y0 - pad, z0 - pad), (x1 + pad, y1 + pad, z1 + pad))
+
+        lat = np.frombuffer(self.lat, dtype=np.float64)[rows]
+        lon = np.frombuffer(self.lon, dtype=np.float64)[rows]
+        inside = (lat >= south) & (lat <= north)
+        if west <= east:
+            inside &= (lon >= west) & (lon <= east)
+        else:
+            inside &= (lon >= west) | (lon <= east)
+
+        return np.sort(rows[inside])
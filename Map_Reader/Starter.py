@@ -1,12 +1,14 @@
 import os
 
-from PyQt5.QtCore import Qt, QDateTime, QStringListModel
+from PyQt5.QtCore import Qt, QDateTime, QStringListModel, QCoreApplication
 from PyQt5.QtWidgets import *
 from PyQt5 import QtGui
 from StarterTable import StarterTable
 import json
+import ProjectJournal
+import ProjectStore
+from ProjectCatalog import ProjectCatalog
 
-from MainWindow import MainWindow
 from NewProjectWizard import NewProjectWizard
 
 '''
@@ -42,9 +44,15 @@ class StarterWindow(QDialog):
         self.newProjectWizard = None
         self.aboutWindow = None
 
+        #Write scheduled saves of the open project before the application quits
+        QApplication.instance().aboutToQuit.connect(self.flushProject)
+
         #Create main projects directory
         if not os.path.exists('./Projects'):
             os.mkdir('./Projects')
+
+        #Index of the projects shown in the table, kept up to date by a watcher
+        self.catalog = ProjectCatalog('./Projects')
         
         self.initUI()
 
@@ -56,7 +64,7 @@ class StarterWindow(QDialog):
 
         #horizontal layout containing new and open buttons
         hLayout = QHBoxLayout()
-        self.projectTable = StarterTable(self)
+        self.projectTable = StarterTable(self, self.catalog)
         
 
         self.newButton = QPushButton('New')
@@ -123,9 +131,10 @@ class StarterWindow(QDialog):
                 'Points': []
             }
 
-            with open(f'./Projects/{projectName}/project_data.json', 'w+') as f:
-                f.write(json.dumps(defaultData, indent=2))
+            ProjectJournal.atomicWrite(f'./Projects/{projectName}/project_data.json', json.dumps(defaultData, indent=2))
+            self.updateCatalog(projectName, dict(defaultData, Points=0))
 
+            from MainWindow import MainWindow
             self.mw = MainWindow(
                 projectName, 
                 reference=refPoint, 
@@ -142,26 +151,53 @@ class StarterWindow(QDialog):
         
         #If a valid path is returned from file dialog screen
         if fileDialog.exec_():
-            filename = fileDialog.selectedFiles()[0]
-            #Check if json data file is in selected folder
-            if os.path.exists(f'{filename}/project_data.json'):
-                self.hide()
-
-                if self.mw:
-                    if self.mw.projectName == filename.split('/')[-1]:
-                        return
-                    else:
-                        self.mw.close()
-
-                self.mw = MainWindow(filename, self, openExisting=True)
-
-            #alert for invalid project and return to main window or starter screen
-            else:
-                QMessageBox.critical(
-                    self,
-                    'Invalid Project',
-                    f'{filename} is an invalid project')
-        
+            self.openProjectDirectory(fileDialog.selectedFiles()[0])
+
+    def openProjectDirectory(self, filename):
+        '''
+        Launch main window with the project in directory filename
+        '''
+        #Check if json data file or SQLite database is in selected folder
+        if os.path.exists(f'{filename}/project_data.json') or ProjectStore.exists(filename):
+            self.hide()
+
+            if self.mw:
+                if self.mw.projectName == os.path.basename(os.path.normpath(filename)):
+                    return
+                else:
+                    self.mw.close()
+
+            #MainWindow and the modules it uses are loaded when the first project is opened
+            from MainWindow import MainWindow
+            self.mw = MainWindow(filename, self, openExisting=True)
+
+        #alert for invalid project and return to main window or starter screen
+        else:
+            QMessageBox.critical(
+                self,
+                'Invalid Project',
+                f'{filename} is an invalid project')
+
+    def handleRequest(self, request):
+        '''
+        Handle the command line request of this launch or of a later one
+        passed on by SingleInstance
+
+        Args:
+            request (dict): {'Open': project directory}, {'New': True} or {} to show the application
+        '''
+        if request.get('Open'):
+            self.openProjectDirectory(request['Open'])
+        elif request.get('New'):
+            self.newProject()
+
+        #Bring the open project, or the starter window, to the front
+        window = self.mw if self.mw and self.mw.isVisible() else self
+        if request.get('New') and self.newProjectWizard:
+            window = self.newProjectWizard
+        window.show()
+        window.raise_()
+        window.activateWindow()
 
     def starterScreen(self, closeMW=False):
         '''
@@ -176,6 +212,27 @@ class StarterWindow(QDialog):
 
         self.show()
 
+    def updateCatalog(self, projectName, values):
+        '''
+        Update the catalog entry of a project created or saved by this application
+        '''
+        self.catalog.update(projectName, values)
+
+    def flushProject(self):
+        '''
+        Flush-on-exit hook, compacts and closes the open project
+        '''
+        if self.mw:
+            self.mw.closeProject()
+
+    def closeEvent(self, e):
+        '''
+        Save the open project when the starter window closes the application
+        '''
+        if self.mw and not self.mw.isVisible():
+            self.flushProject()
+        super(StarterWindow, self).closeEvent(e)
+
     def aboutProject(self):
         '''
         Show About Screen
@@ -185,7 +242,28 @@ class StarterWindow(QDialog):
 if __name__ == '__main__':
 
     import sys
-
-    app = QApplication(sys.argv)
+    import argparse
+    import SingleInstance
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('project', nargs='?', help='Project directory to open')
+    parser.add_argument('--new', action='store_true', help='Create a new project')
+    parser.add_argument('--new-instance', action='store_true', help='Start even if Map Reader is already running')
+    args, qtArgs = parser.parse_known_args()
+
+    #A running instance opens the project right away, no need to start another one
+    request = SingleInstance.makeRequest(args.project, args.new)
+    if not args.new_instance and SingleInstance.sendRequest(request):
+        sys.exit()
+
+    #Lets QtWebEngineWidgets be imported after the application is created (see MapWindow)
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1] + qtArgs)
     window = StarterWindow()
-    sys.exit(app.exec_())
\ No newline at end of file
+
+    server = SingleInstance.InstanceServer()
+    server.requested.connect(window.handleRequest)
+    server.listen()
+
+    window.handleRequest(request)
+    sys.exit(app.exec_())
@@ -1,29 +1,46 @@
 from PyQt5.QtCore import (QDate, QDateTime, QRegExp, QSortFilterProxyModel, Qt,
         QTime)
-from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
 from PyQt5.QtWidgets import *
 import random
 import os
-PName = range(1)
+
+import ProjectStore
+
+NAME, CREATED, ACCESSED, POINTS, REFERENCE = range(5)
+HEADERS = ['Project Name', 'Created', 'Last Accessed', 'Points', 'Reference']
+
+#Role holding the value columns are sorted by, dates are sorted as yyyy-MM-dd
+SORT_ROLE = Qt.UserRole + 1
+
 class StarterTable(QWidget):
-    def __init__(self, parent):
+    def __init__(self, parent, catalog):
+        '''
+        Args:
+            parent (StarterWindow): starter window
+            catalog (ProjectCatalog): catalog of the projects listed
+        '''
         super(StarterTable, self).__init__(parent)
 
+        self.catalog = catalog
+
         self.model = QSortFilterProxyModel()
         self.model.setDynamicSortFilter(True)
-        
+        self.model.setSortRole(SORT_ROLE)
+
         #Create and define columns in table
-        model = QStandardItemModel(0, 1, self)
-        model.setHeaderData(0, Qt.Horizontal, "Project Name")
+        self.sourceModel = QStandardItemModel(0, len(HEADERS), self)
+        for column, header in enumerate(HEADERS):
+            self.sourceModel.setHeaderData(column, Qt.Horizontal, header)
+
+        #Rows are filled from the catalog, projects aren't read on startup
+        for name in catalog.names():
+            self.setProject(name)
 
-        subfolders = [f.name for f in os.scandir('./Projects') if f.is_dir() ]
-        #subfolders = ['a', 'b', 'c']
-        #lengthS = len(subfolders)
-        for i in range(len(subfolders)):
-            model.insertRow(i)
-            model.setData(model.index(i,0), subfolders[i])
+        catalog.changed.connect(self.setProject)
+        catalog.removed.connect(self.removeProject)
 
-        self.model.setSourceModel(model)
+        self.model.setSourceModel(self.sourceModel)
 
         self.proxyGroupBox = QGroupBox("Projects")
 
@@ -37,29 +54,54 @@ class StarterTable(QWidget):
         proxyLayout.addWidget(self.proxyView, 0, 0, 1, 3)
         self.proxyGroupBox.setLayout(proxyLayout)
 
-        #create horizontal window for storing buttons
-       
-
         mainLayout = QVBoxLayout()
         mainLayout.addWidget(self.proxyGroupBox)
-        #mainLayout.addLayout(hLayout)
         self.setLayout(mainLayout)
-        #Sort able by point ID
-        self.proxyView.sortByColumn(0, Qt.AscendingOrder)
 
-    def setSourceModel(self, model):
-        self.proxyModel.setSourceModel(model)
+        #Sort by project name
+        self.proxyView.sortByColumn(NAME, Qt.AscendingOrder)
+
+    def findRow(self, name):
+        '''
+        Returns the row of a project in the source model, None if it isn't listed
+        '''
+        items = self.sourceModel.findItems(name, Qt.MatchExactly, NAME)
+        return items[0].row() if items else None
 
-    def update(self, points):
+    def setProject(self, name):
         '''
-        Update table with points list passed from main window
-        Iterate over list and add all data from each dictionary
+        Add the row of a project or update it from its catalog entry
         '''
-        self.model.removeRows(0, self.model.rowCount())
-        for i, data in enumerate(points):
-            self.model.insertRow(i)
-            self.model.setData(self.model.index(i, PID), i+1)
-            self.model.setData(self.model.index(i, LAT), data['Latitude'])
-            self.model.setData(self.model.index(i, LON), data['Longitude'])
-            self.model.setData(self.model.index(i, DATE), data['Date'])
-            self.model.setData(self.model.index(i, DESC), data['Description'])
\ No newline at end of file
+        entry = self.catalog.entry(name)
+        if entry is None:
+            self.removeProject(name)
+            return
+
+        reference = entry.get('Reference')
+        values = [
+            (name, name),
+            (entry.get('Created') or '', ProjectStore.sortableDate(entry.get('Created')) or ''),
+            (entry.get('LastAccessed') or '', ProjectStore.sortableDate(entry.get('LastAccessed')) or ''),
+            (entry.get('Points'), entry.get('Points') if entry.get('Points') is not None else -1),
+            (', '.join(str(v) for v in reference) if reference else '', str(reference))
+        ]
+
+        items = []
+        for text, key in values:
+            item = QStandardItem()
+            item.setData(text, Qt.DisplayRole)
+            item.setData(key, SORT_ROLE)
+            item.setEditable(False)
+            items.append(item)
+
+        row = self.findRow(name)
+        if row is None:
+            self.sourceModel.appendRow(items)
+        else:
+            for column, item in enumerate(items):
+                self.sourceModel.setItem(row, column, item)
+
+    def removeProject(self, name):
+        row = self.findRow(name)
+        if row is not None:
+            self.sourceModel.removeRow(row)
@@ -1,40 +1,86 @@
-from PyQt5.QtCore import (QDate, QDateTime, QRegExp, QSortFilterProxyModel, Qt,
-        QTime)
-from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtCore import (QDate, QDateTime, QRegExp, Qt,
+        QTime, QTimer, QItemSelection, QItemSelectionModel)
+from PyQt5.QtGui import QDoubleValidator
 from PyQt5.QtWidgets import *
 import random
 
-#Define constants for table columns
-PID, LAT, LON, DATE, DESC = range(5)
+import numpy as np
+
+from PointModel import PointModel, PID, LAT, LON, DATE, DESC
+
+#Milliseconds the filter bar waits after a change before filtering
+FILTER_DELAY = 150
 
 #Class to layout the table and buttons on the main window
 class Table(QWidget):
     def __init__(self, parent):
         super(Table, self).__init__(parent)
 
-        self.model = QSortFilterProxyModel()
-        self.model.setDynamicSortFilter(True)
-        
-        #Create and define columns in table
-        model = QStandardItemModel(0, 5, self)
-        model.setHeaderData(PID, Qt.Horizontal, "Point")
-        model.setHeaderData(LAT, Qt.Horizontal, "Latitude")
-        model.setHeaderData(LON, Qt.Horizontal, "Longitude")
-        model.setHeaderData(DATE, Qt.Horizontal, "Date")
-        model.setHeaderData(DESC, Qt.Horizontal, "Description")
-
-        self.model.setSourceModel(model)
+        #Columnar model sorts itself and only produces data for visible rows,
+        #its search indexes are built on a worker thread as points are loaded
+        self.model = PointModel(self, background=True)
 
         self.proxyGroupBox = QGroupBox("Points")
 
-        self.proxyView = QTreeView()
-        self.proxyView.setRootIsDecorated(False)
+        #QTableView with fixed row heights never lays out every row, a QTreeView
+        #walks all rows after each insert which stalls while a project loads
+        self.proxyView = QTableView()
         self.proxyView.setAlternatingRowColors(True)
+        self.proxyView.setShowGrid(False)
+        self.proxyView.setWordWrap(False)
+        self.proxyView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.proxyView.verticalHeader().hide()
+        self.proxyView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.proxyView.horizontalHeader().setStretchLastSection(True)
+        self.proxyView.horizontalHeader().setDefaultAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         self.proxyView.setModel(self.model)
         self.proxyView.setSortingEnabled(True)
 
+        #Filter bar, rows are filtered by the model with its indexes once typing pauses
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText('Search descriptions')
+
+        self.fromEdit = QLineEdit()
+        self.fromEdit.setPlaceholderText('From MM-dd-yyyy')
+        self.toEdit = QLineEdit()
+        self.toEdit.setPlaceholderText('To MM-dd-yyyy')
+
+        self.boundEdits = []
+        for text, bound in [('Min Latitude', 90), ('Max Latitude', 90), ('Min Longitude', 180), ('Max Longitude', 180)]:
+            edit = QLineEdit()
+            edit.setPlaceholderText(text)
+            edit.setValidator(QDoubleValidator(-bound, bound, 5))
+            self.boundEdits.append(edit)
+
+        self.filterTimer = QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(FILTER_DELAY)
+        self.filterTimer.timeout.connect(self.applyFilter)
+
+        for edit in [self.searchEdit, self.fromEdit, self.toEdit] + self.boundEdits:
+            edit.textChanged.connect(self.filterTimer.start)
+
+        #Rows selected when a filter had to wait for the indexes (see PointModel.setFilter)
+        self.pendingSelection = []
+        self.model.filterApplied.connect(self.filterApplied)
+
+        self.clearButton = QPushButton('Clear')
+        self.clearButton.clicked.connect(self.clearFilter)
+
+        self.countLabel = QLabel()
+        for signal in [self.model.rowsInserted, self.model.rowsRemoved, self.model.modelReset]:
+            signal.connect(self.updateCount)
+
+        filterLayout = QHBoxLayout()
+        filterLayout.addWidget(self.searchEdit, 2)
+        for edit in [self.fromEdit, self.toEdit] + self.boundEdits:
+            filterLayout.addWidget(edit, 1)
+        filterLayout.addWidget(self.clearButton)
+
         proxyLayout = QGridLayout()
-        proxyLayout.addWidget(self.proxyView, 0, 0, 1, 3)
+        proxyLayout.addLayout(filterLayout, 0, 0, 1, 3)
+        proxyLayout.addWidget(self.proxyView, 1, 0, 1, 3)
+        proxyLayout.addWidget(self.countLabel, 2, 0, 1, 3)
         self.proxyGroupBox.setLayout(proxyLayout)
 
         #create horizontal window for storing buttons
@@ -52,15 +98,30 @@ class Table(QWidget):
         self.locateButton = QPushButton('Locate Point')
         self.locateButton.clicked.connect(self.parent().locationTracker)
 
+        #Add traverse button and connect it to traverseTracker() in MainWindow to launch window
+        self.traverseButton = QPushButton('Traverse')
+        self.traverseButton.clicked.connect(self.parent().traverseTracker)
+
+        #Add nearby button and connect it to spatialQueryWindow() in MainWindow to launch window
+        self.nearbyButton = QPushButton('Nearby')
+        self.nearbyButton.clicked.connect(self.parent().spatialQueryWindow)
+
         #Add Plot button and connect it to plotPoints() in MainWindow to launch window
         self.plotButton = QPushButton('Plot')
         self.plotButton.clicked.connect(self.parent().plotPoints)
 
+        #Add recompute button and connect it to recomputeWindow() in MainWindow to launch window
+        self.recomputeButton = QPushButton('Recompute')
+        self.recomputeButton.clicked.connect(self.parent().recomputeWindow)
+
         #Add all button to horizontal layout
         hLayout.addWidget(self.addRefButton)
         hLayout.addWidget(self.setScaleButton)
         hLayout.addWidget(self.locateButton)
+        hLayout.addWidget(self.traverseButton)
+        hLayout.addWidget(self.nearbyButton)
         hLayout.addWidget(self.plotButton)
+        hLayout.addWidget(self.recomputeButton)
 
         #Create main layout and add all table and button sublayouts
         mainLayout = QVBoxLayout()
@@ -70,20 +131,150 @@ class Table(QWidget):
 
         #Sort able by point ID
         self.proxyView.sortByColumn(PID, Qt.AscendingOrder)
+        self.updateCount()
 
-    def setSourceModel(self, model):
-        self.proxyModel.setSourceModel(model)
+    def filterCriteria(self):
+        '''
+        Returns the criteria of the filter bar as keyword arguments of
+        PointModel.setFilter, fields that can't be read yet are left out
+        '''
+        def day(edit):
+            date = QDate.fromString(edit.text().strip(), 'MM-dd-yyyy')
+            return QDate(1970, 1, 1).daysTo(date) * 86400 if date.isValid() else None
+
+        def number(edit):
+            try:
+                return float(edit.text())
+            except ValueError:
+                return None
+
+        #The last date includes its whole day
+        last = day(self.toEdit)
+        latMin, latMax, lonMin, lonMax = map(number, self.boundEdits)
+
+        return {
+            'text': self.searchEdit.text(),
+            'dates': (day(self.fromEdit), last + 86399 if last is not None else None),
+            'lat': (latMin, latMax),
+            'lon': (lonMin, lonMax)
+        }
+
+    def applyFilter(self):
+        '''
+        Show only the points matching the filter bar, selected points stay
+        selected if they're still shown
+        '''
+        self.filterTimer.stop()
+        selected = self.selectedRows()
+
+        #Points not loaded from a project database yet are loaded by the model as
+        #the view needs them, only pages with matching points are loaded
+        self.model.setFilter(**self.filterCriteria())
+        if self.model.pendingFilter is not None:
+            self.pendingSelection = selected
+        elif selected:
+            self.selectRows(selected)
+        self.updateCount()
+
+    def filterApplied(self):
+        '''
+        Select the rows selected before a filter waiting for the indexes was applied
+        '''
+        if self.pendingSelection:
+            self.selectRows(self.pendingSelection)
+            self.pendingSelection = []
+        self.updateCount()
+
+    def clearFilter(self):
+        '''
+        Empty the filter bar, every point is shown again
+        '''
+        for edit in [self.searchEdit, self.fromEdit, self.toEdit] + self.boundEdits:
+            edit.blockSignals(True)
+            edit.clear()
+            edit.blockSignals(False)
+
+        self.applyFilter()
+
+    def updateCount(self, *args):
+        '''
+        Show how many points the table shows out of the points loaded
+        '''
+        shown, total = self.model.rowCount(), len(self.model.pid)
+        if self.model.pendingFilter is not None:
+            self.countLabel.setText(f'Indexing {total:,} points...')
+        else:
+            self.countLabel.setText(f'{shown:,} of {total:,} points' if self.model.filter is not None else f'{total:,} points')
 
     def update(self, points):
         '''
-        Update table with points list passed from main window
-        Iterate over list and add all data from each dictionary
-        '''
-        self.model.removeRows(0, self.model.rowCount())
-        for i, data in enumerate(points):
-            self.model.insertRow(i)
-            self.model.setData(self.model.index(i, PID), i+1)
-            self.model.setData(self.model.index(i, LAT), data['Latitude'])
-            self.model.setData(self.model.index(i, LON), data['Longitude'])
-            self.model.setData(self.model.index(i, DATE), data['Date'])
-            self.model.setData(self.model.index(i, DESC), data['Description'])
\ No newline at end of file
+        Update table with points list passed from main window.
+        Rebuilds the whole table, only used when a project is opened.
+        '''
+        self.model.setPoints(points)
+
+    def setPager(self, pager):
+        '''
+        Show points of a ProjectStore.PointPager, pages are loaded as the table is scrolled
+        '''
+        self.model.setPager(pager)
+
+    def fetchAll(self):
+        '''
+        Load all pages not shown yet
+        '''
+        self.model.fetchAll()
+
+    def appendRows(self, points):
+        '''
+        Add points to the end of the points list, used while a project is loading
+        '''
+        self.model.appendPoints(points)
+
+    def appendRow(self, data):
+        '''
+        Add a single point to the end of the points list without touching the other rows
+        '''
+        self.model.appendPoint(data)
+
+    def updateRow(self, row, data):
+        '''
+        Replace displayed data of the point at row (index in points list)
+        '''
+        self.model.updatePoint(row, data)
+
+    def setLocations(self, rows, lat, lon, dist, bearing, scale):
+        '''
+        Replace latitude, longitude, distance, bearing and scale of many rows
+        (indexes in points list) at once
+        '''
+        self.model.setLocations(rows, lat, lon, dist, bearing, scale)
+
+    def selectedRows(self):
+        '''
+        Returns the selected rows as indexes in points list, in point order
+        '''
+        return sorted(self.model.order[i.row()] for i in self.proxyView.selectionModel().selectedRows())
+
+    def selectRows(self, rows):
+        '''
+        Select rows (indexes in points list) and scroll to the first one in view order
+        '''
+        selection = QItemSelection()
+        positions = self.model.positions(rows)
+
+        #Runs of neighbouring rows are selected as one range
+        runs = np.split(positions, np.flatnonzero(np.diff(positions) != 1) + 1) if len(positions) else []
+        for run in runs:
+            selection.select(self.model.index(int(run[0]), PID), self.model.index(int(run[-1]), DESC))
+
+        self.proxyView.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+        if len(positions):
+            self.proxyView.scrollTo(self.model.index(int(positions[0]), PID))
+
+    def removeRow(self, row):
+        '''
+        Remove the point at row (index in points list). Point IDs of the
+        other rows are kept.
+        '''
+        self.model.removePoint(row)
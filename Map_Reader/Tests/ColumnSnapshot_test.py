@@ -0,0 +1,146 @@
+from Map_Reader import ColumnSnapshot, ProjectJournal
+from Map_Reader.PointModel import PointModel, LAT, DATE, DESC
+import json
+import numpy as np
+import os
+import pytest
+
+def makePoint(i):
+    return {
+        'Latitude': 38.0 + i * 0.01,
+        'Longitude': -120.0 - i * 0.01,
+        'Date': f'01-0{i % 3 + 1}-2020 {i % 12 + 1:02d}:0{i % 10}:00 {"pm" if i % 2 else "am"}',
+        'Description': f'Point {i} é',
+        'Distance': i * 1.5,
+        'Bearing': 90.0,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    }
+
+@pytest.fixture
+def state():
+    points = [makePoint(i) for i in range(20)]
+
+    #Values that don't fit the columns
+    points[3]['Longitude'] = -120
+    points[4]['ReferencePoint'] = None
+    points[5]['Date'] = 'yesterday'
+    points[6]['Units'] = None
+    points[7]['Note'] = {'Color': 'red'}
+
+    return {'ProjectName': 'Test', 'Reference': [38.0, -120.0], 'Scale': 131.5, 'Units': 'km', 'Points': points}
+
+def test_1(tmp_path, state):
+    '''
+    Test snapshot keeps metadata and every point value exactly
+    '''
+    path = ColumnSnapshot.write(str(tmp_path), state, 7)
+    data = ColumnSnapshot.Snapshot(path).projectData()
+
+    assert os.path.basename(path) == 'project_data.7.bin'
+    assert data['JournalSeq'] == 7
+    assert data['ProjectName'] == 'Test'
+    assert len(data['Points']) == 20
+    assert list(data['Points']) == state['Points']
+
+def test_2(tmp_path, state):
+    '''
+    Test converting JSON to the snapshot and back gives the same project
+    '''
+    state['JournalSeq'] = 3
+    (tmp_path / ProjectJournal.SNAPSHOT).write_text(json.dumps(state))
+    path = ColumnSnapshot.fromJSON(str(tmp_path))
+    os.remove(tmp_path / ProjectJournal.SNAPSHOT)
+
+    ColumnSnapshot.toJSON(path, str(tmp_path / ProjectJournal.SNAPSHOT))
+
+    assert json.loads((tmp_path / ProjectJournal.SNAPSHOT).read_text()) == state
+
+def test_3(tmp_path, state):
+    '''
+    Test newest snapshot is used unless project_data.json is newer
+    '''
+    ColumnSnapshot.write(str(tmp_path), state, 1)
+    state['Points'].append(makePoint(20))
+    path = ColumnSnapshot.write(str(tmp_path), state, 2)
+
+    assert [name for name, _ in ColumnSnapshot.snapshots(str(tmp_path))] == ['project_data.2.bin']
+    assert len(ColumnSnapshot.latest(str(tmp_path)).projectData()['Points']) == 21
+
+    (tmp_path / ProjectJournal.SNAPSHOT).write_text(json.dumps(state))
+    os.utime(path, (0, 0))
+
+    assert ColumnSnapshot.latest(str(tmp_path)) is None
+
+def test_4(tmp_path, state):
+    '''
+    Test journal compaction writes the snapshot and replayed points are appended
+    '''
+    journal = ProjectJournal.ProjectJournal(str(tmp_path))
+    for point in state['Points']:
+        journal.addPoint(point)
+    journal.compact(state)
+    journal.addPoint(makePoint(20))
+    journal.close()
+
+    data = ProjectJournal.replay(str(tmp_path), ColumnSnapshot.latest(str(tmp_path)).projectData())
+    copy = data['Points'].copy()
+    copy.append(makePoint(21))
+
+    assert isinstance(data['Points'], ColumnSnapshot.SnapshotPoints)
+    assert list(data['Points']) == state['Points'] + [makePoint(20)]
+    assert len(data['Points']) == 21 and len(copy) == 22
+
+def test_5(qapp, tmp_path, state):
+    '''
+    Test table model is filled from the snapshot columns
+    '''
+    path = ColumnSnapshot.write(str(tmp_path), state, 0)
+    points = ColumnSnapshot.Snapshot(path).projectData()['Points']
+    points.append(makePoint(20))
+
+    model = PointModel()
+    model.setPoints(points)
+
+    assert model.rowCount() == 21
+    assert model.data(model.index(5, DATE)) == 'yesterday'
+    assert model.data(model.index(20, DESC)) == 'Point 20 é'
+
+    model.removePoint(0)
+    model.sort(LAT, 1)
+
+    assert model.data(model.index(0, DESC)) == 'Point 20 é'
+    assert model.rowCount() == 20
+
+def test_6(tmp_path, state):
+    '''
+    Test traced pixel offsets are kept and snapshots written before they were stored are still read
+    '''
+    path = ColumnSnapshot.write(str(tmp_path), state, 0)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+
+    #Version 1 snapshot: the same file without the pixel offset columns
+    magic, version, flags, metaLen, count, heapLen = ColumnSnapshot.HEADER.unpack_from(data)
+    start = ColumnSnapshot.HEADER.size + ColumnSnapshot.align(metaLen) + (len(ColumnSnapshot.FLOATS) + 1) * count * 8
+    del data[start:start + len(ColumnSnapshot.PIXELS) * count * 8]
+    ColumnSnapshot.HEADER.pack_into(data, 0, magic, 1, flags, metaLen, count, heapLen)
+    (tmp_path / 'old.bin').write_bytes(bytes(data))
+
+    assert list(ColumnSnapshot.Snapshot(str(tmp_path / 'old.bin')).projectData()['Points']) == state['Points']
+
+    for i, point in enumerate(state['Points']):
+        if 'Note' not in point:
+            point['PixelDX'] = i * 10
+            point['PixelDY'] = -i
+    state['Points'][2]['PixelDX'] = 2.5
+    state['Points'][8]['PixelDY'] = 2**70
+
+    path = ColumnSnapshot.write(str(tmp_path), state, 1)
+    points = ColumnSnapshot.Snapshot(path).projectData()['Points']
+
+    assert version == ColumnSnapshot.VERSION
+    assert list(points) == state['Points']
+    assert [list(p) for p in points] == [list(p) for p in state['Points']]
+    assert points.column('PixelDX')[2] == 2.5 and points.column('PixelDY')[8] == 2.0**70 and np.isnan(points.column('PixelDX')[7])
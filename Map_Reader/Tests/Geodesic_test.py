@@ -0,0 +1,70 @@
+from Map_Reader import Geodesic
+from geopy.distance import geodesic
+import numpy as np
+import pytest
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 1000, 200), rng.uniform(0, 360, 200)
+
+@pytest.mark.parametrize('units, kwarg', [('km', 'kilometers'), ('mi', 'miles'), ('m', 'meters'), ('ft', 'feet')])
+def test_1(samples, units, kwarg):
+    '''
+    Test batch results match geopy to sub-millimetre in every unit
+    '''
+    ref = (38.12345, -121.12345)
+    dist, bearing = samples
+    lat, lon = Geodesic.destination(ref, dist, bearing, units)
+
+    for i in range(len(dist)):
+        p = geodesic(**{kwarg: dist[i]}).destination(ref, bearing[i])
+        assert geodesic((lat[i], lon[i]), (p.latitude, p.longitude)).meters < 0.001
+
+def test_2():
+    '''
+    Test scalar input and zero distance returns the reference point
+    '''
+    lat, lon = Geodesic.destination((38.0, -120.0), 0, 90)
+
+    assert float(lat) == pytest.approx(38.0)
+    assert float(lon) == pytest.approx(-120.0)
+
+def test_3():
+    '''
+    Test longitude is wrapped when crossing the antimeridian
+    '''
+    lat, lon = Geodesic.destination((0, 179.99), 10, 90)
+
+    assert -180 <= float(lon) < -179.9
+
+def test_4():
+    '''
+    Test invalid units raise ValueError
+    '''
+    with pytest.raises(ValueError):
+        Geodesic.destination((0, 0), 1, 0, 'yd')
+
+@pytest.mark.parametrize('lat', [-80, 0, 38.12345, 60, 89])
+def test_5(lat):
+    '''
+    Test local projection error stays within its estimated bound
+    '''
+    projection = Geodesic.LocalProjection((lat, -121.12345))
+    bearing = np.linspace(0, 360, 73)
+
+    for dist in [0.1, 1, 5, 20]:
+        lat1, lon1 = projection.destination(dist, bearing, 'km')
+        lat2, lon2 = Geodesic.destination(projection.ref, dist, bearing, 'km')
+        bound = projection.errorBound(dist * 1000)
+
+        for i in range(len(bearing)):
+            assert geodesic((lat1[i], lon1[i]), (lat2[i], lon2[i])).meters <= bound
+
+def test_6():
+    '''
+    Test error bound is infinite far from the reference point
+    '''
+    projection = Geodesic.LocalProjection((38.0, -120.0))
+
+    assert projection.errorBound(100000) == np.inf
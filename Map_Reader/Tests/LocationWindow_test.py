@@ -1,7 +1,12 @@
 from Map_Reader.Windows import LocationWindow
 from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
 import pytest
 
+class Parent(QWidget):
+    def setLocation(self, *values, dx=None, dy=None):
+        self.saved = values, dx, dy
+
 @pytest.fixture
 def window():
     window = LocationWindow(38.12345, -121.12345, 100, 95, 'km')
@@ -170,4 +175,19 @@ def test_15(qtbot, window):
     '''
     qtbot.mouseClick(window.cancelButton, QtCore.Qt.LeftButton)
 
-    assert window.isActiveWindow() == False  
\ No newline at end of file
+    assert window.isActiveWindow() == False
+
+def test_16(qtbot):
+    '''
+    Test the traced pixel offset is only saved with the location it gives
+    '''
+    parent = Parent()
+    qtbot.addWidget(parent)
+
+    LocationWindow(38.12345, -121.12345, 100, 95, 'km', parent, dx=40, dy=-7).save()
+    assert parent.saved == ((38.12345, -121.12345, '', 100, 95, 'km'), 40, -7)
+
+    window = LocationWindow(38.12345, -121.12345, 100, 95, 'km', parent, dx=40, dy=-7)
+    window.bearingEdit.setText('96')
+    window.save()
+    assert parent.saved == ((38.12345, -121.12345, '', 100, 96, 'km'), None, None)
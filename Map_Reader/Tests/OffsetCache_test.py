@@ -0,0 +1,75 @@
+from Map_Reader.OffsetCache import OffsetCache
+import pytest
+
+@pytest.fixture
+def cache():
+    cache = OffsetCache(maxSize=2)
+    cache.setContext((38.0, -120.0), 131.5, 'km')
+    return cache
+
+def test_1(cache):
+    '''
+    Test hits and misses are counted
+    '''
+    assert cache.get(1, 2) is None
+    cache.put(1, 2, 'a')
+
+    assert cache.get(1, 2) == 'a'
+    assert cache.stats() == {'Hits': 1, 'Misses': 1, 'Size': 1, 'HitRate': 0.5}
+
+def test_2(cache):
+    '''
+    Test least recently used entry is evicted when full
+    '''
+    cache.put(0, 0, 'a')
+    cache.put(0, 1, 'b')
+    cache.get(0, 0)
+    cache.put(0, 2, 'c')
+
+    assert cache.get(0, 1) is None
+    assert cache.get(0, 0) == 'a'
+    assert cache.get(0, 2) == 'c'
+
+def test_3(cache):
+    '''
+    Test entries are kept when context is unchanged
+    '''
+    cache.put(3, 4, 'a')
+    cache.setContext([38.0, -120.0], 131.5, 'km')
+
+    assert cache.get(3, 4) == 'a'
+
+@pytest.mark.parametrize('ref, scale, units', [
+    ((37.0, -120.0), 131.5, 'km'),
+    ((38.0, -120.0), 100, 'km'),
+    ((38.0, -120.0), 131.5, 'mi')])
+def test_4(cache, ref, scale, units):
+    '''
+    Test entries are dropped when ref, scale or units change
+    '''
+    cache.put(3, 4, 'a')
+    cache.setContext(ref, scale, units)
+
+    assert cache.get(3, 4) is None
+
+def test_5():
+    '''
+    Test invalid size raises ValueError
+    '''
+    with pytest.raises(ValueError):
+        OffsetCache(0)
+
+def test_6(cache):
+    '''
+    Test values of a context set by another user of the cache are neither found nor stored
+    '''
+    first = cache.setContext((38.0, -120.0), 131.5, 'km')
+    cache.put(3, 4, 'a', first)
+
+    second = cache.setContext((37.0, -120.0), 131.5, 'km')
+    cache.put(3, 4, 'b', first)
+    assert cache.get(3, 4, second) is None
+
+    cache.put(3, 4, 'c', second)
+    assert cache.get(3, 4, first) is None
+    assert cache.get(3, 4, second) == 'c'
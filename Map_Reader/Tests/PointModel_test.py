@@ -0,0 +1,201 @@
+from Map_Reader.PointModel import PointModel, PID, LAT, LON, DATE, DESC
+from Map_Reader.SearchIndex import SYNC
+from PyQt5 import QtCore
+import pytest
+
+def makePoint(lat, desc=''):
+    return {
+        'Latitude': lat,
+        'Longitude': -120.0,
+        'Date': '01-01-2020 12:00:00 pm',
+        'Description': desc,
+        'Distance': 1.0,
+        'Bearing': 90.0,
+        'Units': 'km',
+        'ReferencePoint': (38.0, -120.0),
+        'Scale': 131.5
+    }
+
+def column(model, col):
+    return [model.data(model.index(row, col)) for row in range(model.rowCount())]
+
+@pytest.fixture
+def model(qapp):
+    model = PointModel()
+    model.setPoints([makePoint(38.3, 'c'), makePoint(38.1, 'a'), makePoint(38.2, 'b')])
+    return model
+
+def test_1(model):
+    '''
+    Test points are shown in point order with ids starting at 1
+    '''
+    assert model.rowCount() == 3
+    assert model.columnCount() == 5
+    assert column(model, PID) == [1, 2, 3]
+    assert column(model, LAT) == [38.3, 38.1, 38.2]
+    assert model.headerData(DESC, QtCore.Qt.Horizontal) == 'Description'
+
+@pytest.mark.parametrize('col, order, expected', [
+    (LAT, QtCore.Qt.AscendingOrder, ['a', 'b', 'c']),
+    (LAT, QtCore.Qt.DescendingOrder, ['c', 'b', 'a']),
+    (DESC, QtCore.Qt.AscendingOrder, ['a', 'b', 'c']),
+    (PID, QtCore.Qt.DescendingOrder, ['b', 'a', 'c'])])
+def test_2(model, col, order, expected):
+    '''
+    Test sorting numeric and text columns
+    '''
+    model.sort(col, order)
+
+    assert column(model, DESC) == expected
+
+@pytest.mark.parametrize('order', [QtCore.Qt.AscendingOrder, QtCore.Qt.DescendingOrder])
+def test_3(model, order):
+    '''
+    Test appended point is inserted at its sorted position
+    '''
+    model.sort(LAT, order)
+    model.appendPoint(makePoint(38.15, 'ab'))
+
+    assert column(model, PID)[column(model, DESC).index('ab')] == 4
+    assert column(model, LAT) == sorted(column(model, LAT), reverse=order == QtCore.Qt.DescendingOrder)
+
+def test_4(model):
+    '''
+    Test updated point is moved when its sort key changes
+    '''
+    model.sort(LAT, QtCore.Qt.AscendingOrder)
+    model.updatePoint(0, makePoint(38.0, 'c'))
+
+    assert column(model, DESC) == ['c', 'a', 'b']
+    assert column(model, LAT) == [38.0, 38.1, 38.2]
+
+def test_5(model):
+    '''
+    Test removed point leaves the other rows and ids untouched
+    '''
+    model.removePoint(1)
+    model.appendPoint(makePoint(38.4, 'd'))
+
+    assert column(model, DESC) == ['c', 'b', 'd']
+    assert column(model, PID) == [1, 3, 4]
+
+def test_6(qapp, tmp_path):
+    '''
+    Test points of a pager are fetched page by page and keep the sort order
+    '''
+    from Map_Reader import ProjectStore
+    store = ProjectStore.ProjectStore(str(tmp_path))
+    store.addPoints([makePoint(38.0 + i / 100, str(i)) for i in range(5)])
+
+    model = PointModel()
+    model.sort(LAT, QtCore.Qt.DescendingOrder)
+    model.setPager(store.pager(pageSize=2))
+
+    assert model.rowCount() == 2
+    assert model.canFetchMore()
+
+    model.fetchAll()
+
+    assert not model.canFetchMore()
+    assert column(model, DESC) == ['4', '3', '2', '1', '0']
+    assert column(model, PID) == [5, 4, 3, 2, 1]
+    store.close()
+
+def test_7(model):
+    '''
+    Test view positions of storage rows follow the sort order
+    '''
+    assert model.positions([2, 0]).tolist() == [0, 2]
+
+    model.sort(LAT, QtCore.Qt.AscendingOrder)
+    assert model.positions([0]).tolist() == [2]
+    assert model.positions([2, 1]).tolist() == [0, 1]
+
+def test_8(model):
+    '''
+    Test the filter shows matching rows in sort order, also rows added or edited later
+    '''
+    model.sort(LAT, QtCore.Qt.DescendingOrder)
+    model.setFilter('b')
+    assert column(model, DESC) == ['b']
+
+    model.setFilter('', lat=(38.15, None))
+    assert column(model, DESC) == ['c', 'b']
+    assert model.positions([1, 2]).tolist() == [1]
+
+    model.appendPoints([makePoint(38.25, 'e'), makePoint(38.0, 'f')])
+    model.appendPoint(makePoint(38.4, 'g'))
+    assert column(model, DESC) == ['g', 'c', 'e', 'b']
+
+    model.updatePoint(1, makePoint(38.5, 'a'))
+    model.updatePoint(0, makePoint(38.0, 'c'))
+    assert column(model, DESC) == ['a', 'g', 'e', 'b']
+
+    model.setFilter('', dates=(None, None))
+    assert column(model, DESC) == ['a', 'g', 'e', 'b', 'c', 'f']
+    assert model.filter is None
+
+def test_9(model):
+    '''
+    Test text columns with missing values are sorted and rows inserted like empty text
+    '''
+    model.appendPoint(dict(makePoint(38.4), Description=None))
+    model.sort(DESC, QtCore.Qt.AscendingOrder)
+    assert column(model, DESC) == [None, 'a', 'b', 'c']
+
+    model.appendPoint(makePoint(38.5, 'bb'))
+    model.appendPoint(dict(makePoint(38.6), Description=None))
+    assert column(model, DESC) == [None, None, 'a', 'b', 'bb', 'c']
+    assert column(model, PID) == [4, 6, 2, 3, 5, 1]
+
+    model.sort(DESC, QtCore.Qt.DescendingOrder)
+    model.appendPoint(makePoint(38.7, 'b'))
+    assert column(model, DESC) == ['c', 'bb', 'b', 'b', 'a', None, None]
+    assert column(model, PID)[2:4] == [7, 3]
+
+def test_10(qapp):
+    '''
+    Test coordinates that are missing or aren't numbers are shown empty and sorted last
+    '''
+    model = PointModel()
+    model.setPoints([makePoint(None, 'a'), makePoint(38.2, 'b'), dict(makePoint('38.1', 'c'), Distance=None)])
+    assert column(model, LAT) == [None, 38.2, None]
+    assert column(model, LON) == [-120.0, -120.0, -120.0]
+
+    model.sort(LAT, QtCore.Qt.AscendingOrder)
+    model.appendPoint(makePoint(38.3, 'd'))
+    model.appendPoint(makePoint(None, 'e'))
+    assert column(model, DESC) == ['b', 'd', 'a', 'c', 'e']
+
+    model.sort(LAT, QtCore.Qt.DescendingOrder)
+    model.appendPoint(makePoint(38.25, 'f'))
+    assert column(model, DESC) == ['e', 'c', 'a', 'd', 'f', 'b']
+
+    #An edited row moves among the empty coordinates
+    model.updatePoint(1, makePoint('x', 'b'))
+    assert column(model, DESC) == ['b', 'e', 'c', 'a', 'd', 'f']
+    assert column(model, LAT) == [None, None, None, None, 38.3, 38.25]
+
+def test_11(qtbot):
+    '''
+    Test a filter set while the worker builds the indexes is applied once they're built,
+    rows appended meanwhile are shown once they're indexed
+    '''
+    model = PointModel(background=True)
+    model.setPoints([makePoint(38.0, 'rock' if i % 2 else 'tree') for i in range(SYNC + 1)])
+    assert model.search.building
+
+    with qtbot.waitSignal(model.filterApplied):
+        model.setFilter('ro')
+        assert model.pendingFilter is not None and model.filter is None
+        assert model.rowCount() == SYNC + 1
+    assert model.pendingFilter is None
+    assert model.rowCount() == SYNC // 2
+    assert set(column(model, DESC)) == {'rock'}
+
+    #A batch too big to index on the GUI thread
+    with qtbot.waitSignal(model.filterApplied):
+        model.appendPoints([makePoint(38.0, 'rock') for i in range(SYNC + 1)])
+        assert model.pendingFilter == model.filter
+        assert model.rowCount() == SYNC // 2
+    assert model.rowCount() == SYNC // 2 + SYNC + 1
@@ -0,0 +1,116 @@
+from Map_Reader.PointStore import PointStore, PointRow
+from Map_Reader.PointModel import PointModel, LAT, DESC
+import json
+import numpy as np
+import pytest
+
+def makePoint(i):
+    return {
+        'Latitude': 38.0 + i * 0.01,
+        'Longitude': -120.0 - i * 0.01,
+        'Date': f'01-0{i % 3 + 1}-2020 {i % 12 + 1:02d}:0{i % 10}:00 {"pm" if i % 2 else "am"}',
+        'Description': f'Point {i} é',
+        'Distance': i * 1.5,
+        'Bearing': 90.0,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    }
+
+@pytest.fixture
+def points():
+    points = [makePoint(i) for i in range(2500)]
+
+    #Values that don't fit the columns
+    points[3]['Longitude'] = -120
+    points[4]['ReferencePoint'] = (38.0, -120.0)
+    points[5]['Date'] = 'yesterday'
+    points[6]['Units'] = None
+    points[7]['Description'] = None
+    points[8]['Bearing'] = None
+    points[1500]['Note'] = {'Color': 'red'}
+    points[1501] = {'Description': 'Other order', 'Latitude': 38.0, 'Longitude': -120.0, 'Date': ''}
+
+    return points
+
+def test_1(points):
+    '''
+    Test points read back exactly as they were added, as views, slices and when iterated
+    '''
+    store = PointStore(points[:1000])
+    store.extend(points[1000:2000])
+    for point in points[2000:]:
+        store.append(point)
+
+    assert len(store) == len(points)
+    assert store == points
+    assert list(store) == points
+    assert store[990:1600] == points[990:1600] and store[::7] == points[::7]
+    assert json.dumps(store[:]) == json.dumps(points)
+
+    assert isinstance(store[3], PointRow)
+    assert all(store[i] == points[i] and list(store[i]) == list(points[i]) for i in range(len(points)))
+    assert store[4]['ReferencePoint'] == (38.0, -120.0) and type(store[3]['Longitude']) is int
+    assert store[1500]['Note'] == {'Color': 'red'} and 'Note' not in store[0]
+    assert store[-1] == points[-1] and store[0].get('Missing') is None
+    with pytest.raises(IndexError):
+        store[len(points)]
+
+def test_2(points):
+    '''
+    Test units and reference points are stored once, copies don't change with the store
+    '''
+    store = PointStore(points)
+
+    assert store.unitValues == ['km', None]
+    assert store.refValues == [[38.0, -120.0], (38.0, -120.0), None]
+
+    copy = store.copy()
+    store.append(makePoint(0))
+
+    assert len(copy) == len(points) and copy == points
+    assert store[-1] == makePoint(0)
+    assert store.nbytes() < len(points) * 100
+
+def test_3(qapp, points):
+    '''
+    Test the table model shows points of a store
+    '''
+    store = PointStore(points)
+    model = PointModel()
+    model.setPoints(store)
+
+    assert model.rowCount() == len(points)
+    assert model.data(model.index(0, LAT)) == points[0]['Latitude']
+    assert model.data(model.index(2, DESC)) == 'Point 2 é'
+
+def test_4(tmp_path, points):
+    '''
+    Test traced pixel offsets are stored, read as columns and kept when copied from a snapshot
+    '''
+    from Map_Reader import ColumnSnapshot
+
+    for i, point in enumerate(points[:2000]):
+        if i % 3 and 'Note' not in point:
+            point['PixelDX'] = i
+            point['PixelDY'] = -i
+    points[10]['PixelDX'] = 1.5
+    points[11]['PixelDY'] = None
+
+    store = PointStore(points)
+
+    assert store == points
+    assert list(store[10]) == list(points[10]) and store[10]['PixelDX'] == 1.5
+    assert list(store[0]) == list(points[0]) and 'PixelDX' not in store[0]
+
+    dx = store.column('PixelDX')
+    assert dx[1] == 1 and np.isnan(dx[0]) and dx[10] == 1.5 and np.isnan(dx[1500]) and dx[1501] == 1501
+    assert np.isnan(store.column('Bearing')[8]) and store.column('Longitude')[3] == -120
+
+    path = ColumnSnapshot.write(str(tmp_path), {'Points': points}, 0)
+    snapshot = ColumnSnapshot.Snapshot(path).projectData()['Points']
+    snapshot.append(makePoint(0))
+    copy = PointStore.fromSnapshot(snapshot)
+
+    assert copy == list(snapshot) and copy[:4] == points[:4] and copy[-1] == makePoint(0)
+    assert np.array_equal(snapshot.column('PixelDY'), copy.column('PixelDY'), equal_nan=True)
@@ -0,0 +1,121 @@
+from Map_Reader import ProjectCatalog, ProjectJournal, ProjectStore
+import json
+import os
+import pytest
+
+def makeProject(projects, name, points=0, created='01-01-2020 01:00:00 am'):
+    os.makedirs(projects / name)
+    data = {'ProjectName': name, 'Created': created, 'LastAccessed': created, 'Reference': [38.0, -120.0],
+            'Scale': 0, 'Units': '', 'Points': [{'Latitude': 38.0 + i} for i in range(points)]}
+    (projects / name / ProjectJournal.SNAPSHOT).write_text(json.dumps(data))
+
+def setMtime(path, ns):
+    os.utime(path, ns=(ns, ns))
+
+@pytest.fixture
+def projects(tmp_path):
+    makeProject(tmp_path, 'A', points=3)
+    makeProject(tmp_path, 'B')
+    return tmp_path
+
+@pytest.fixture
+def reads(monkeypatch):
+    names = []
+    readEntry = ProjectCatalog.readEntry
+
+    def counted(directory):
+        names.append(os.path.basename(directory))
+        return readEntry(directory)
+
+    monkeypatch.setattr(ProjectCatalog, 'readEntry', counted)
+    return names
+
+def test_1(qapp, projects, reads):
+    '''
+    Test projects are read once and the catalog is used on the next start
+    '''
+    catalog = ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+
+    assert catalog.names() == ['A', 'B']
+    assert catalog.entry('A')['Points'] == 3
+    assert catalog.entry('A')['Reference'] == [38.0, -120.0]
+    assert catalog.entry('B')['Created'] == '01-01-2020 01:00:00 am'
+    assert sorted(reads) == ['A', 'B']
+
+    reads.clear()
+    catalog = ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+
+    assert reads == []
+    assert catalog.entry('A')['Points'] == 3
+
+def test_2(qapp, projects, reads):
+    '''
+    Test only projects whose data files changed are read again and removed projects are dropped
+    '''
+    journal = ProjectJournal.ProjectJournal(str(projects / 'B'))
+    journal.addPoint({'Latitude': 39.0})
+    ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+    reads.clear()
+
+    #Appending to the journal doesn't change the directory mtime
+    mtime = os.stat(projects / 'B').st_mtime_ns
+    journal.addPoint({'Latitude': 40.0})
+    journal.close()
+    setMtime(projects / 'B', mtime)
+    os.rename(projects / 'A', projects / 'C')
+
+    catalog = ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+
+    assert sorted(reads) == ['B', 'C']
+    assert catalog.names() == ['B', 'C']
+    assert catalog.entry('B')['Points'] == 2
+
+def test_3(qapp, qtbot, projects, reads):
+    '''
+    Test saved projects are updated without reading them and the watcher refreshes changed projects
+    '''
+    catalog = ProjectCatalog.ProjectCatalog(str(projects), delay=10)
+    reads.clear()
+
+    catalog.update('A', {'Created': 'c', 'LastAccessed': 'l', 'Points': 10, 'Reference': [1.0, 2.0]})
+
+    assert reads == []
+    assert catalog.entry('A')['Points'] == 10
+    assert json.loads((projects / ProjectCatalog.CATALOG).read_text())['A']['Points'] == 10
+
+    with qtbot.waitSignal(catalog.changed, timeout=5000) as blocker:
+        makeProject(projects, 'D', points=2)
+
+    assert blocker.args == ['D']
+    assert catalog.entry('D')['Points'] == 2
+
+    with qtbot.waitSignal(catalog.removed, timeout=5000) as blocker:
+        os.remove(projects / 'D' / ProjectJournal.SNAPSHOT)
+        os.rmdir(projects / 'D')
+
+    assert blocker.args == ['D']
+    assert 'D' not in catalog.names()
+
+def test_4(qapp, projects, reads):
+    '''
+    Test a database written outside the application is read again, temporary files are ignored
+    '''
+    ProjectStore.importJSON(str(projects / 'A'))
+    store = ProjectStore.ProjectStore(str(projects / 'A'))
+    ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+    reads.clear()
+
+    mtime = os.stat(projects / 'A').st_mtime_ns
+    store.addPoint({'Latitude': 40.0, 'Longitude': -120.0, 'Date': '', 'Description': ''})
+    store.close()
+    setMtime(projects / 'A', mtime)
+
+    catalog = ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+
+    assert reads == ['A']
+    assert catalog.entry('A')['Points'] == 4
+
+    reads.clear()
+    (projects / 'B' / (ProjectJournal.SNAPSHOT + '.tmp')).write_text('')
+    ProjectCatalog.ProjectCatalog(str(projects), watch=False)
+    assert reads == []
@@ -0,0 +1,100 @@
+from Map_Reader import ProjectJournal
+import json
+import os
+import pytest
+
+@pytest.fixture
+def project(tmp_path):
+    data = {'ProjectName': 'Test', 'Reference': [38.0, -120.0], 'Scale': 0, 'Units': '', 'Points': []}
+    (tmp_path / ProjectJournal.SNAPSHOT).write_text(json.dumps(data))
+    return tmp_path
+
+def load(project):
+    data = json.loads((project / ProjectJournal.SNAPSHOT).read_text())
+    return ProjectJournal.replay(str(project), data)
+
+def test_1(project):
+    '''
+    Test journaled points and metadata are replayed over the snapshot
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.setMeta('Scale', 131.5)
+    journal.addPoint({'Latitude': 38.1})
+    journal.addPoint({'Latitude': 38.2})
+    journal.close()
+
+    data = load(project)
+
+    assert data['Scale'] == 131.5
+    assert [p['Latitude'] for p in data['Points']] == [38.1, 38.2]
+    assert data['JournalSeq'] == 3
+
+def test_2(project):
+    '''
+    Test compaction writes the snapshot and removes the journal it contains
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.addPoint({'Latitude': 38.1})
+    journal.compact({'ProjectName': 'Test', 'Points': [{'Latitude': 38.1}]})
+    journal.addPoint({'Latitude': 38.2})
+    journal.close()
+
+    snapshot = json.loads((project / ProjectJournal.SNAPSHOT).read_text())
+
+    assert snapshot['JournalSeq'] == 1
+    assert ProjectJournal.segments(str(project)) == []
+    assert [p['Latitude'] for p in load(project)['Points']] == [38.1, 38.2]
+
+def test_3(project):
+    '''
+    Test records journaled between rotation and the snapshot write are kept
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project), compactEvery=2)
+    journal.addPoint({'Latitude': 38.1})
+    journal.addPoint({'Latitude': 38.2})
+
+    assert journal.needsCompaction()
+
+    seq = journal.rotate()
+    journal.addPoint({'Latitude': 38.3})
+    journal.writeSnapshot({'ProjectName': 'Test', 'Points': [{'Latitude': 38.1}, {'Latitude': 38.2}]}, seq)
+    journal.close()
+
+    assert not journal.needsCompaction()
+    assert [p['Latitude'] for p in load(project)['Points']] == [38.1, 38.2, 38.3]
+
+def test_4(project):
+    '''
+    Test numbering continues after reopening and a partially written record is skipped
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.addPoint({'Latitude': 38.1})
+    journal.close()
+
+    with open(project / ProjectJournal.JOURNAL, 'a') as f:
+        f.write('{"Seq": 2, "Op": "AddPo')
+
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.addPoint({'Latitude': 38.2})
+    journal.close()
+
+    data = load(project)
+
+    assert [p['Latitude'] for p in data['Points']] == [38.1, 38.2]
+    assert data['JournalSeq'] == 2
+
+def test_5(project):
+    '''
+    Test points journaled together get one record each in order
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project), compactEvery=3)
+    journal.addPoint({'Latitude': 38.1})
+    journal.addPoints([{'Latitude': 38.2}, {'Latitude': 38.3}])
+    journal.close()
+
+    assert journal.needsCompaction()
+
+    data = load(project)
+
+    assert [p['Latitude'] for p in data['Points']] == [38.1, 38.2, 38.3]
+    assert data['JournalSeq'] == 3
@@ -0,0 +1,87 @@
+from Map_Reader import ProjectJournal
+from Map_Reader.ProjectLoader import ProjectLoader, JSONStream
+import io
+import json
+import pytest
+
+POINTS = [{'Latitude': 38.0 + i / 1000, 'Longitude': -120.125, 'Description': f'Point {i}'} for i in range(50)]
+
+@pytest.fixture
+def project(tmp_path):
+    data = {'ProjectName': 'Test', 'Reference': [38.0, -120.0], 'Scale': 131.25, 'Units': 'km', 'Points': POINTS}
+    (tmp_path / ProjectJournal.SNAPSHOT).write_text(json.dumps(data, indent=2))
+    return tmp_path
+
+def run(qtbot, loader, signal):
+    events = []
+    loader.metadataLoaded.connect(lambda meta: events.append(('meta', meta)))
+    loader.pointsLoaded.connect(lambda points: events.append(('points', points)))
+    loader.failed.connect(lambda message: events.append(('failed', message)))
+
+    with qtbot.waitSignal(signal, timeout=5000):
+        loader.start()
+    loader.stop()
+
+    return events
+
+def test_1():
+    '''
+    Test values split across chunks of any size are decoded
+    '''
+    text = json.dumps({'Scale': 131.25, 'Name': 'a "b"', 'Points': POINTS, 'Units': 'km'}, indent=2)
+
+    for chunkSize in (1, 3, 7, 64, 1 << 20):
+        stream = JSONStream(io.StringIO(text), chunkSize)
+        data = {}
+        for key, value in stream.items():
+            data[key] = list(value.elements()) if key == 'Points' else value.value()
+
+        assert data == json.loads(text)
+
+def test_2(qtbot, project):
+    '''
+    Test metadata is loaded before the points which arrive in batches
+    '''
+    loader = ProjectLoader(str(project), batchSize=4, maxBatchSize=16)
+    finished = []
+    loader.finished.connect(finished.append)
+    events = run(qtbot, loader, loader.finished)
+
+    assert events[0] == ('meta', {'ProjectName': 'Test', 'Reference': [38.0, -120.0], 'Scale': 131.25, 'Units': 'km'})
+    assert [len(points) for kind, points in events[1:]] == [4, 8, 16, 16, 6]
+    assert [p for _, points in events[1:] for p in points] == POINTS
+    assert finished[0]['JournalSeq'] == 0
+
+def test_3(qtbot, project):
+    '''
+    Test journaled points and metadata are loaded after the snapshot
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.addPoint({'Latitude': 39.0})
+    journal.setMeta('Units', 'ft')
+    journal.close()
+
+    loader = ProjectLoader(str(project))
+    finished = []
+    loader.finished.connect(finished.append)
+    events = run(qtbot, loader, loader.finished)
+
+    assert events[-1] == ('points', [{'Latitude': 39.0}])
+    assert finished[0]['Units'] == 'ft'
+    assert finished[0]['JournalSeq'] == 2
+
+def test_4(qtbot, project):
+    '''
+    Test a cancelled load stops before sending points and a broken file fails
+    '''
+    loader = ProjectLoader(str(project))
+    loader.cancel()
+    events = run(qtbot, loader, loader.cancelled)
+
+    assert [kind for kind, _ in events] == ['meta']
+
+    (project / ProjectJournal.SNAPSHOT).write_text('{"ProjectName": "Test", "Points": [{"Latitude": 38.0},')
+    loader = ProjectLoader(str(project))
+    events = run(qtbot, loader, loader.failed)
+
+    assert events[-1][0] == 'failed'
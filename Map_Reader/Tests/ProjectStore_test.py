@@ -0,0 +1,133 @@
+from Map_Reader import ProjectStore, ProjectJournal
+from Map_Reader.ColumnSnapshot import parseDate
+import json
+import pytest
+
+def makePoint(i):
+    return {
+        'Latitude': 38.0 + i * 0.01,
+        'Longitude': -120.0 - i * 0.01,
+        'Date': f'01-0{i % 3 + 1}-2020 0{i % 9 + 1}:00:00 {"pm" if i % 2 else "am"}',
+        'Description': f'Point {i}',
+        'Distance': i * 1.5,
+        'Bearing': 90.0,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    }
+
+@pytest.fixture
+def project(tmp_path):
+    data = {'ProjectName': 'Test', 'Created': 'c', 'Reference': [38.0, -120.0], 'Scale': 131.5,
+            'Units': 'km', 'Points': [makePoint(i) for i in range(10)]}
+    (tmp_path / ProjectJournal.SNAPSHOT).write_text(json.dumps(data))
+    return tmp_path
+
+def test_1(project):
+    '''
+    Test importing and exporting keeps the JSON layout, journal records and unknown point fields
+    '''
+    journal = ProjectJournal.ProjectJournal(str(project))
+    journal.addPoint(dict(makePoint(10), Note='extra'))
+    journal.setMeta('Scale', 200.0)
+    journal.close()
+    expected = ProjectJournal.replay(str(project), json.loads((project / ProjectJournal.SNAPSHOT).read_text()))
+
+    store = ProjectStore.importJSON(str(project))
+    assert store.count() == 11
+    assert store.meta()['Scale'] == 200.0
+    store.close()
+
+    ProjectStore.exportJSON(str(project))
+    data = ProjectJournal.replay(str(project), json.loads((project / ProjectJournal.SNAPSHOT).read_text()))
+
+    assert data == expected
+    assert data['Points'][-1]['Note'] == 'extra'
+
+def test_2(project):
+    '''
+    Test pager loads points page by page in point order
+    '''
+    store = ProjectStore.importJSON(str(project))
+    pager = store.pager(pageSize=4)
+
+    assert [len(pager.fetch()) for _ in range(4)] == [4, 4, 2, 0]
+    assert pager.done()
+    assert pager.points == store.points()
+
+    #Points added after loading keep their Ids in step with the pager
+    points = [makePoint(10), makePoint(11)]
+    assert pager.added(store.addPoints(points), points)
+    assert pager.total == 12 and pager.done()
+    assert list(pager.ids) == [pointId for pointId, _ in store.page(0, 20)]
+
+    #Points added before every page is loaded come with the last page
+    pager = store.pager(pageSize=5)
+    pager.fetch()
+    assert not pager.added([store.addPoint(makePoint(12))], [makePoint(12)])
+    assert len(pager.points) == 5 and pager.total == 13
+    assert [len(pager.fetch()) for _ in range(3)] == [5, 3, 0]
+    assert pager.points == store.points()
+    assert list(pager.ids) == [pointId for pointId, _ in store.page(0, 20)]
+    store.close()
+
+def test_3(project):
+    '''
+    Test date, box and description queries
+    '''
+    store = ProjectStore.importJSON(str(project))
+
+    between = store.pointsBetween('01-01-2020 12:00:00 am', '01-01-2020 11:59:59 pm')
+    assert [p['Description'] for p in between] == ['Point 0', 'Point 6', 'Point 9', 'Point 3']
+    assert [p['Description'] for p in store.pointsInBox(38.015, -120.065, 38.045, -120.0)] == ['Point 2', 'Point 3', 'Point 4']
+    assert len(store.findDescription('point 1')) == 1
+    assert len(store.findDescription('INT', prefix=False)) == 10
+    store.close()
+
+@pytest.mark.parametrize('where, params, index', [
+    ('WHERE Timestamp BETWEEN ? AND ?', ('a', 'b'), 'PointsTimestamp'),
+    ('WHERE Latitude BETWEEN ? AND ? AND Longitude BETWEEN ? AND ?', (0, 1, 0, 1), 'PointsLatLon'),
+    ('WHERE Description >= ? AND Description < ?', ('a', 'b'), 'PointsDescription')])
+def test_4(project, where, params, index):
+    '''
+    Test queries are answered with the indexes
+    '''
+    store = ProjectStore.importJSON(str(project))
+    plan = store.db.execute(f'EXPLAIN QUERY PLAN SELECT * FROM Points {where}', params).fetchall()
+
+    assert index in str(plan)
+    store.close()
+
+def test_5():
+    '''
+    Test point dates are converted to a sortable format
+    '''
+    assert ProjectStore.sortableDate('12-31-2020 12:05:09 am') == '2020-12-31 00:05:09'
+    assert ProjectStore.sortableDate('12-31-2020 01:05:09 PM') == '2020-12-31 13:05:09'
+    assert ProjectStore.sortableDate('') is None
+
+def test_6(project):
+    '''
+    Test the next point that may match a table filter is found after an Id, also by a pager
+    '''
+    store = ProjectStore.importJSON(str(project))
+
+    assert store.nextMatch(0, 'point 3') == 4
+    assert store.nextMatch(4, 'POINT 3') is None
+    assert store.nextMatch(0, dates=(parseDate('01-03-2020 12:00:00 am'), None)) == 3
+    assert store.nextMatch(0, dates=(None, parseDate('01-01-2020 06:00:00 am'))) == 1
+    assert store.nextMatch(1, dates=(None, parseDate('01-01-2020 06:00:00 am'))) is None
+    assert store.nextMatch(0, lat=(38.045, None)) == 6
+    assert store.nextMatch(0, lon=(170.0, -120.035)) == 5
+    assert store.nextMatch(0, 'poi', lat=(None, 38.02), lon=(-120.015, -120.005)) == 2
+
+    #Words SQLite can't lower aren't looked for
+    assert store.nextMatch(0, 'Épi') == 1
+
+    pager = store.pager(pageSize=3)
+    pager.fetch()
+    assert pager.nextMatch(text='point 7') == 8
+    pager.fetch()
+    pager.fetch()
+    assert pager.nextMatch(text='point 7') is None
+    store.close()
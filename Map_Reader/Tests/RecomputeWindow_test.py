@@ -0,0 +1,83 @@
+from Map_Reader.Windows import RecomputeWindow
+from Map_Reader.Reprojection import Reprojection
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
+import pytest
+
+POINTS = [
+    {'Latitude': 38.0, 'Longitude': -120.0, 'Date': '01-01-2020 01:00:00 am', 'Description': 'a', 'Distance': 0.0,
+     'Bearing': 0.0, 'Units': 'km', 'ReferencePoint': [38.0, -120.0], 'Scale': 100.0, 'PixelDX': 0, 'PixelDY': 0},
+    {'Latitude': 38.0, 'Longitude': -120.0, 'Date': '01-01-2020 01:00:00 am', 'Description': 'b', 'Distance': 1.0,
+     'Bearing': 90.0, 'Units': 'km', 'ReferencePoint': [38.0, -120.0], 'Scale': 100.0}
+]
+
+class Parent(QWidget):
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.applied = None
+
+    def previewRecompute(self, reference, scale, units, rows=None):
+        return Reprojection(POINTS, reference, scale, units, rows)
+
+    def applyRecompute(self, reprojection):
+        self.applied = reprojection
+
+@pytest.fixture
+def parent(qtbot):
+    parent = Parent()
+    qtbot.addWidget(parent)
+    return parent
+
+def test_1(qtbot, parent):
+    '''
+    Test fields are filled with the project values and apply needs a preview
+    '''
+    window = RecomputeWindow([38.0, -120.0], 100.0, 'mi', [1], parent)
+
+    assert window.latEdit.text() == '38.0' and window.scaleEdit.text() == '100.0'
+    assert window.comboBox.currentText() == 'mi'
+    assert window.selectedBox.isEnabled() and not window.selectedBox.isChecked()
+    assert window.previewButton.isEnabled() and not window.saveButton.isEnabled()
+
+    window.scaleEdit.setText('')
+    assert not window.previewButton.isEnabled()
+
+    assert not RecomputeWindow(None, None, None, parent=parent).selectedBox.isEnabled()
+
+def test_2(qtbot, parent):
+    '''
+    Test the diff of the changed points is shown and the previewed result is applied
+    '''
+    window = RecomputeWindow([38.0, -120.0], 100.0, 'km', [1], parent)
+    window.latEdit.setText('39.0')
+    qtbot.mouseClick(window.previewButton, QtCore.Qt.LeftButton)
+
+    assert window.diffTable.rowCount() == 2
+    assert window.diffTable.item(0, 0).text() == '2'
+    assert window.diffTable.item(1, 2).text() == '39.0, -120.0'
+    assert window.saveButton.isEnabled()
+
+    #Changing a value after the preview needs another preview
+    window.selectedBox.setChecked(True)
+    assert not window.saveButton.isEnabled()
+
+    qtbot.mouseClick(window.previewButton, QtCore.Qt.LeftButton)
+    assert window.diffTable.rowCount() == 1
+    qtbot.mouseClick(window.saveButton, QtCore.Qt.LeftButton)
+
+    assert parent.applied.rows.tolist() == [1]
+    assert window.isVisible() == False
+
+def test_3(qtbot, parent):
+    '''
+    Test a preview of a number still being typed does nothing
+    '''
+    window = RecomputeWindow([38.0, -120.0], 100.0, 'km', [1], parent)
+
+    for text in ['-', '.', '-.']:
+        window.latEdit.setText(text)
+        assert window.previewButton.isEnabled()
+        qtbot.mouseClick(window.previewButton, QtCore.Qt.LeftButton)
+
+        assert window.diffTable.rowCount() == 0
+        assert not window.saveButton.isEnabled()
@@ -0,0 +1,197 @@
+from Map_Reader import ReportExporter
+import json
+import os
+import pandas as pd
+import pytest
+
+POINTS = [
+    {'Latitude': 38.1, 'Longitude': -120.25, 'Date': '01-01-2020 01:00:00 am', 'Description': 'Tree, "big"',
+     'Distance': 1, 'Bearing': 90.0, 'Units': 'km', 'ReferencePoint': [38.0, -120.0], 'Scale': 131.5},
+    {'Latitude': 38.2, 'Longitude': -120.5, 'Date': '01-02-2020 01:00:00 pm', 'Description': 'Line\nbreak',
+     'Distance': 2.5, 'Bearing': None, 'Units': 'mi', 'ReferencePoint': None, 'Scale': 0},
+    {'Latitude': 38.3, 'Longitude': -120.75, 'Date': '01-03-2020 01:00:00 pm', 'Description': '',
+     'Distance': 3, 'Units': 'ft', 'ReferencePoint': [38.0, -120.0], 'Scale': 131.5, 'Note': True}
+]
+
+def read(path, mode='r'):
+    with open(path, mode) as f:
+        return f.read()
+
+def test_1(tmp_path):
+    '''
+    Test CSV and JSON reports are identical to the pandas and json exports
+    '''
+    csvPath = str(tmp_path / 'report.csv')
+    jsonPath = str(tmp_path / 'report.json')
+    ReportExporter.export(POINTS, [('CSV', csvPath), ('JSON', jsonPath)])
+
+    pd.DataFrame(POINTS).to_csv(tmp_path / 'pandas.csv', index=False)
+
+    assert read(csvPath, 'rb') == read(tmp_path / 'pandas.csv', 'rb')
+    assert read(jsonPath) == json.dumps(POINTS, indent=2)
+    assert sorted(os.listdir(tmp_path)) == ['pandas.csv', 'report.csv', 'report.json']
+
+def test_2(tmp_path, monkeypatch):
+    '''
+    Test reports written in several chunks and empty reports
+    '''
+    monkeypatch.setattr(ReportExporter, 'CHUNK', 2)
+    points = POINTS * 3
+    progress = []
+    ReportExporter.export(points, [('JSON', str(tmp_path / 'a.json'))], progress.append)
+
+    assert read(tmp_path / 'a.json') == json.dumps(points, indent=2)
+    assert progress == [222, 444, 666, 888, 1000]
+
+    ReportExporter.export([], [('JSON', str(tmp_path / 'b.json')), ('CSV', str(tmp_path / 'b.csv'))])
+
+    assert read(tmp_path / 'b.json') == '[]'
+    assert read(tmp_path / 'b.csv') == '\n'
+
+def test_3(tmp_path):
+    '''
+    Test Excel and HTML reports hold every point
+    '''
+    from openpyxl import load_workbook
+
+    ReportExporter.export(POINTS, [('Excel', str(tmp_path / 'r.xlsx')), ('HTML', str(tmp_path / 'r.html'))])
+    rows = list(load_workbook(tmp_path / 'r.xlsx').active.values)
+
+    assert list(rows[0]) == list(pd.DataFrame(POINTS).columns)
+    assert rows[1][3] == 'Tree, "big"' and rows[1][7] == '[38.0, -120.0]'
+    assert rows[2][5] is None and rows[3][9] is True
+
+    text = read(tmp_path / 'r.html')
+    assert text.startswith('<table border="1" class="dataframe">') and text.endswith('</table>')
+    assert text.count('<tr>') == 3 and 'Tree, "big"' in text
+
+def test_4(qtbot, tmp_path):
+    '''
+    Test the worker reports progress and finished exports, failed exports leave no file
+    '''
+    exporter = ReportExporter.ReportExporter()
+    progress = []
+    exporter.progress.connect(progress.append)
+
+    targets = [('CSV', str(tmp_path / 'r.csv'))]
+    with qtbot.waitSignal(exporter.finished, timeout=5000) as blocker:
+        exporter.start(list(POINTS), targets)
+
+    assert blocker.args == [targets]
+    assert progress[-1] == 1000
+
+    targets = [('CSV', str(tmp_path / 'missing' / 'r.csv'))]
+    with qtbot.waitSignal(exporter.failed, timeout=5000) as blocker:
+        exporter.start(list(POINTS), targets)
+    exporter.stop()
+
+    assert blocker.args[0] == targets
+    assert blocker.args[1].startswith('FileNotFoundError')
+    assert os.listdir(tmp_path) == ['r.csv']
+
+def test_5(tmp_path):
+    '''
+    Test incremental CSV and JSON Lines reports only append new points and match full exports
+    '''
+    state = str(tmp_path / 'reports.json')
+    targets = [('CSV', str(tmp_path / 'a.csv')), ('JSON Lines', str(tmp_path / 'a.jsonl'))]
+    points = POINTS * 2
+
+    ReportExporter.export(points[:2], targets, statePath=state)
+    csvSize = os.path.getsize(tmp_path / 'a.csv')
+
+    progress = []
+    ReportExporter.export(points, targets, progress.append, state)
+
+    assert read(tmp_path / 'a.csv', 'rb') == pd.DataFrame(points).to_csv(index=False).encode()
+    assert read(tmp_path / 'a.jsonl') == ''.join(json.dumps(p) + '\n' for p in points)
+    assert progress == [1000]
+
+    entry = ReportExporter.loadState(state)['CSV']
+    assert entry['Count'] == 6 and entry['Size'] > csvSize
+
+    #A report of an earlier day is continued from a copy
+    moved = [('CSV', str(tmp_path / 'b.csv')), ('JSON Lines', str(tmp_path / 'b.jsonl'))]
+    ReportExporter.export(points + POINTS[:1], moved, statePath=state)
+
+    assert read(tmp_path / 'b.csv', 'rb') == pd.DataFrame(points + POINTS[:1]).to_csv(index=False).encode()
+    assert read(tmp_path / 'a.jsonl') == ''.join(json.dumps(p) + '\n' for p in points)
+
+def test_6(tmp_path):
+    '''
+    Test reports are written again when the columns, the points or the file changed
+    '''
+    state = str(tmp_path / 'reports.json')
+    path = str(tmp_path / 'a.csv')
+    expected = lambda points: pd.DataFrame(points).to_csv(index=False).encode()
+
+    #Only integer distances, a float distance changes how the column is written
+    points = [dict(p, Distance=1) for p in POINTS]
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    points = points + [dict(POINTS[0], Distance=1.5)]
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    assert read(path, 'rb') == expected(points)
+
+    #A new column
+    points = points + [dict(POINTS[0], Extra='x')]
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    assert read(path, 'rb') == expected(points)
+
+    #Points written before were edited
+    points = [dict(points[0], Description='Edited')] + points[1:-1] + [dict(points[-1], Description='Edited')]
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    assert read(path, 'rb') == expected(points)
+
+    #Points were removed
+    points = points[:2]
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    assert read(path, 'rb') == expected(points)
+
+    #The report was changed outside of the application
+    with open(path, 'a') as f:
+        f.write('edited\n')
+    ReportExporter.export(points, [('CSV', path)], statePath=state)
+    assert read(path, 'rb') == expected(points)
+
+def test_7(tmp_path):
+    '''
+    Test a failed append leaves the report as it was
+    '''
+    state = str(tmp_path / 'reports.json')
+    path = str(tmp_path / 'a.jsonl')
+    ReportExporter.export(POINTS, [('JSON Lines', path)], statePath=state)
+    before = read(path)
+
+    with pytest.raises(TypeError):
+        ReportExporter.export(POINTS + [{'Latitude': object()}], [('JSON Lines', path)], statePath=state)
+
+    assert read(path) == before
+    assert ReportExporter.loadState(state)['JSON Lines']['Count'] == 3
+
+def test_8(qtbot, tmp_path):
+    '''
+    Test points edited in place are written again once the state is forgotten,
+    also when an export queued before the edit saves the state afterwards
+    '''
+    state = str(tmp_path / 'reports.json')
+    targets = [('CSV', str(tmp_path / 'a.csv')), ('JSON Lines', str(tmp_path / 'a.jsonl'))]
+    points = [dict(POINTS[0], Latitude=38.0 + i / 100) for i in range(5)]
+    exporter = ReportExporter.ReportExporter()
+
+    with qtbot.waitSignal(exporter.finished, timeout=5000):
+        exporter.start(list(points), targets, state)
+        points[2] = dict(points[2], Latitude=38.0, Distance=2.0)
+        exporter.forget(state)
+
+    points.append(dict(POINTS[1]))
+    with qtbot.waitSignal(exporter.finished, timeout=5000):
+        exporter.start(list(points), targets, state)
+    exporter.stop()
+
+    assert read(targets[0][1], 'rb') == pd.DataFrame(points).to_csv(index=False).encode()
+    assert [json.loads(line) for line in read(targets[1][1]).splitlines()] == points
+    assert ReportExporter.loadState(state)['CSV']['Count'] == 6
+
+    ReportExporter.removeState(state)
+    ReportExporter.removeState(state)
+    assert not os.path.exists(state)
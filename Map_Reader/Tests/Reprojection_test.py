@@ -0,0 +1,102 @@
+from Map_Reader.Reprojection import Reprojection, roundLike
+from Map_Reader.PointStore import PointStore
+from Map_Reader.Tracker import Tracker
+from Map_Reader import Geodesic
+import numpy as np
+import pytest
+
+def makePoint(i, dx=None, dy=None):
+    point = {
+        'Latitude': 38.0 + i * 0.01,
+        'Longitude': -120.0 - i * 0.01,
+        'Date': '01-01-2020 01:00:00 am',
+        'Description': f'Point {i}',
+        'Distance': 1.5,
+        'Bearing': 90.0,
+        'Units': 'km',
+        'ReferencePoint': [38.0, -120.0],
+        'Scale': 131.5
+    }
+    if dx is not None:
+        point['PixelDX'] = dx
+        point['PixelDY'] = dy
+
+    return point
+
+def traced(dx, dy, ref, scale, units):
+    '''
+    Location Tracker gives a traced pixel offset
+    '''
+    bearing = Tracker.getBearing(None, dx, dy)
+    dist = Tracker.convert(None, Tracker.getDistance(None, dx, dy), scale)
+    lat, lon = Geodesic.destination(ref, dist, bearing, units)
+
+    return round(float(lat), 5), round(float(lon), 5), dist, bearing
+
+def test_1():
+    '''
+    Test traced points get exactly the location Tracker gives the same pixel offset
+    '''
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(-20000, 20000, size=(3000, 2)).tolist() + [[0, 0], [0, -5], [7, 0]]
+    points = [makePoint(i, dx, dy) for i, (dx, dy) in enumerate(offsets)]
+
+    result = Reprojection(points, (37.5, -121.25), 97.3, 'mi')
+
+    for i, (dx, dy) in enumerate(offsets):
+        after = tuple(float(result.after[field][i]) for field in ('Latitude', 'Longitude', 'Distance', 'Bearing'))
+        assert after == traced(dx, dy, [37.5, -121.25], 97.3, 'mi')
+
+    values = np.array([0.125, 2.675, 1.00005, -0.5, 2.5])
+    assert roundLike(values, 2).tolist() == [round(v, 2) for v in values.tolist()]
+
+def test_2():
+    '''
+    Test points without an offset use their pixel distance, points without either are skipped
+    '''
+    points = [makePoint(0, 100, 0), makePoint(1), makePoint(2), makePoint(3, 3, 4)]
+    points[2]['Bearing'] = None
+
+    result = Reprojection(points, (38.0, -120.0), 65.75, 'km', rows=[3, 2, 1])
+
+    assert result.rows.tolist() == [1, 3] and result.skipped.tolist() == [2]
+    assert result.after['Distance'].tolist() == [3.0, 0.076]
+    assert result.after['Bearing'].tolist() == [90.0, 36.8699]
+
+    summary = result.summary()
+    assert summary['Points'] == 2 and summary['Changed'] == 2 and summary['Skipped'] == 1
+
+    diff = result.diff()
+    assert [change['Point'] for change in diff] == [4, 2]
+    assert diff[0]['Before']['Latitude'] == 38.03 and diff[0]['Shift'] == pytest.approx(summary['MaxShift'])
+
+    #Nothing changes against the reference point and scale a point was traced with
+    point = makePoint(4, 250, -40)
+    point['Latitude'], point['Longitude'], point['Distance'], point['Bearing'] = traced(250, -40, [38.0, -120.0], 131.5, 'km')
+    assert Reprojection([point], (38.0, -120.0), 131.5, 'km').summary()['Changed'] == 0
+
+def test_3():
+    '''
+    Test applying the locations changes only the recomputed points of a store
+    '''
+    points = [makePoint(i, i, -i) for i in range(10)] + [makePoint(10)]
+    points[4]['Latitude'] = None
+    points[5]['Note'] = 'irregular'
+    store = PointStore(points)
+
+    result = Reprojection(store, (40.0, -110.0), 50, 'ft', rows=range(3, 11))
+    result.apply(store)
+
+    assert store[:3] == points[:3]
+    for i, row in enumerate(result.rows):
+        assert store[row]['Latitude'] == result.after['Latitude'][i]
+        assert store[row]['Units'] == 'ft' and store[row]['ReferencePoint'] == [40.0, -110.0] and store[row]['Scale'] == 50
+
+    assert store[4]['Latitude'] == result.after['Latitude'][1] and type(store[4]['Latitude']) is float
+    assert store[5]['Note'] == 'irregular' and store[5]['PixelDX'] == 5
+    assert list(store[10]) == list(points[10])
+
+    with pytest.raises(ValueError):
+        Reprojection(store, (40.0, -110.0), 0, 'ft')
+    with pytest.raises(ValueError):
+        Reprojection(store, (40.0, -110.0), 10, 'yards')
@@ -0,0 +1,93 @@
+from Map_Reader.SaveScheduler import SaveScheduler
+import threading
+import pytest
+
+@pytest.fixture
+def writes():
+    return []
+
+@pytest.fixture
+def scheduler(qapp, writes):
+    state = {'Count': 0}
+
+    def capture():
+        state['Count'] += 1
+        return state['Count']
+
+    def write(data):
+        writes.append((data, threading.current_thread()))
+
+    scheduler = SaveScheduler(capture, write, delay=20, maxDelay=10000)
+    yield scheduler
+    scheduler.flush()
+
+def test_1(qtbot, scheduler, writes):
+    '''
+    Test a burst of requests is written once on a worker thread
+    '''
+    for _ in range(10):
+        scheduler.schedule()
+
+    qtbot.waitUntil(lambda: not scheduler.pending())
+    scheduler.wait()
+
+    assert [data for data, _ in writes] == [1]
+    assert writes[0][1] is not threading.main_thread()
+
+def test_2(scheduler, writes):
+    '''
+    Test flush writes a pending request immediately and only once
+    '''
+    scheduler.schedule()
+    scheduler.flush()
+    scheduler.flush()
+
+    assert [data for data, _ in writes] == [1]
+    assert not scheduler.pending()
+
+def test_3(qapp, writes):
+    '''
+    Test requests that keep coming are written after maxDelay and errors are reported
+    '''
+    errors = []
+
+    def write(data):
+        writes.append(data)
+        raise OSError('disk full')
+
+    scheduler = SaveScheduler(lambda: len(writes), write, delay=1000, maxDelay=0)
+    scheduler.failed.connect(errors.append)
+    scheduler.schedule()
+    scheduler.wait()
+    qapp.processEvents()
+
+    assert writes == [0]
+    assert errors == ['OSError: disk full']
+
+def test_4(qapp):
+    '''
+    Test saves started during a slow write don't wait for it and only the latest is written next
+    '''
+    writing = threading.Event()
+    release = threading.Event()
+    writes = []
+
+    def write(data):
+        writing.set()
+        release.wait(5)
+        writes.append(data)
+
+    captured = iter(range(1, 10))
+    scheduler = SaveScheduler(lambda: next(captured), write, delay=1000)
+    scheduler.start()
+    assert writing.wait(5)
+
+    #The GUI thread isn't blocked by the write in progress
+    for _ in range(3):
+        scheduler.start()
+    assert writes == []
+
+    release.set()
+    scheduler.wait()
+    assert writes == [1, 4]
+    assert scheduler.worker is None
@@ -0,0 +1,167 @@
+from Map_Reader.SearchIndex import TokenIndex, SortedColumn, SearchIndex, IndexWorker, tokenize, SEGMENT, SYNC
+from Map_Reader.ColumnSnapshot import NO_TIME
+from array import array
+import numpy as np
+
+WORDS = ['North', 'rock', 'big', 'Bigfoot', 'tree-line', 'east', 'x\x00ray', '\x00']
+
+#Columns of points the way PointModel keeps them
+class Model():
+    def __init__(self, rng, count):
+        self.pid = array('q', range(1, count + 1))
+        self.lat = array('d', rng.uniform(-10, 10, count))
+        self.lon = array('d', rng.uniform(-180, 180, count))
+        self.desc = [' '.join(rng.choice(WORDS, 3)) for _ in range(count)]
+        self.time = np.where(rng.random(count) < 0.1, NO_TIME, rng.integers(0, 1000, count))
+
+    def descriptions(self, start, stop):
+        return self.desc[start:stop]
+
+    def timestamps(self, start, stop):
+        return self.time[start:stop]
+
+def matching(texts, prefix):
+    return [i for i, text in enumerate(texts) if any(t.startswith(prefix) for t in tokenize(text))]
+
+def test_1():
+    '''
+    Test descriptions appended in batches or one at a time are all found by token prefix
+    '''
+    rng = np.random.default_rng(0)
+    texts = [' '.join(rng.choice(WORDS, 2)) for _ in range(500)]
+    index = TokenIndex(lambda start, stop: texts[start:stop])
+
+    for count in [200, 201, 202, 300] + list(range(301, 500, 7)) + [500]:
+        index.sync(count)
+        for prefix in ['big', 'bigf', 'rock', 'tree', 'line', 'x', 'zz']:
+            assert sorted(set(index.match(prefix).tolist())) == matching(texts[:count], prefix)
+
+    #Small segments were merged into bigger ones
+    assert len(index.segments) < 10
+
+def test_2():
+    '''
+    Test value ranges of a sorted column with rows appended since it was sorted
+    '''
+    values = np.array([5.0, np.nan, 1.0, 3.0, 5.0, 2.0])
+    column = SortedColumn(lambda start, stop: values[start:stop])
+
+    column.sync(6)
+    assert sorted(column.range(6, 2.0, 5.0).tolist()) == [0, 3, 4, 5]
+    assert sorted(column.range(6, None, 2.5).tolist()) == [2, 5]
+
+    values = np.concatenate((values, [4.0, np.nan, 0.0]))
+    assert sorted(column.range(9, 2.0, None).tolist()) == [0, 3, 4, 5, 6]
+    assert sorted(column.range(9).tolist()) == [0, 2, 3, 4, 5, 6, 8]
+
+def test_3():
+    '''
+    Test queries combining every criterion match checking each row, also after rows are edited
+    '''
+    rng = np.random.default_rng(1)
+    model = Model(rng, 3000)
+    search = SearchIndex(model)
+
+    assert search.query() is None
+    assert search.query('  ', (None, None)) is None
+
+    def expected(text, dates, lat, lon):
+        rows = set(range(len(model.pid)))
+        for prefix in tokenize(text):
+            rows &= set(matching(model.desc, prefix))
+        time, lats, lons = model.time, np.array(model.lat), np.array(model.lon)
+        rows &= set(np.flatnonzero((time != NO_TIME) & (time >= dates[0]) & (time <= dates[1])).tolist())
+        rows &= set(np.flatnonzero((lats >= lat[0]) & (lats <= lat[1])).tolist())
+        across = (lons >= lon[0]) | (lons <= lon[1]) if lon[0] > lon[1] else (lons >= lon[0]) & (lons <= lon[1])
+        rows &= set(np.flatnonzero(across).tolist())
+        return sorted(rows)
+
+    for criteria in [('big', (100, 900), (-5, 5), (-90, 90)),
+                     ('ROCK bi', (0, 500), (0, 10), (170, -170)),
+                     ('tree-line', (200, 200), (-10, 10), (-180, 180))]:
+        assert np.flatnonzero(search.query(*criteria)).tolist() == expected(*criteria)
+
+    #Edited rows are checked directly, appended rows are indexed at the next query
+    for row in [0, 10, 2000]:
+        model.desc[row] = 'big rock'
+        model.lat[row] = 1.0
+        model.lon[row] = 179.0
+        model.time[row] = 300
+        search.changed(row)
+    more = Model(rng, 100)
+    model.pid.extend(range(3001, 3101))
+    model.lat.extend(more.lat)
+    model.lon.extend(more.lon)
+    model.desc.extend(more.desc)
+    model.time = np.concatenate((model.time, more.time))
+
+    criteria = ('rock big', (0, 500), (0, 10), (170, -170))
+    mask = search.query(*criteria)
+    assert len(mask) == 3100
+    assert np.flatnonzero(mask).tolist() == expected(*criteria)
+    assert {0, 10, 2000} <= set(np.flatnonzero(mask).tolist())
+
+def test_4():
+    '''
+    Test segments stay under SEGMENT rows, copies are extended without changing the original
+    '''
+    rng = np.random.default_rng(2)
+    texts = [' '.join(rng.choice(WORDS, 2)) for _ in range(3 * SEGMENT)]
+    index = TokenIndex(lambda start, stop: texts[start:stop])
+    index.sync(2 * SEGMENT + 10)
+    assert max(len(segment) for segment in index.segments) <= SEGMENT
+
+    copy = index.copy()
+    copy.sync(3 * SEGMENT)
+    assert index.count == 2 * SEGMENT + 10
+    assert sorted(set(copy.match('rock').tolist())) == matching(texts, 'rock')
+
+    #Rows merged in by a forced sort are found like rows of a full sort
+    values = rng.uniform(0, 10, 1000)
+    values[::7] = np.nan
+    column = SortedColumn(lambda start, stop: values[start:stop])
+    for count in [100, 101, 500, 1000]:
+        column.sync(count, force=True)
+    assert column.count == 1000
+    assert np.all(np.diff(column.values) >= 0)
+    assert sorted(column.range(1000, 2.0, 5.0).tolist()) == np.flatnonzero((values >= 2.0) & (values <= 5.0)).tolist()
+
+def test_5(qtbot):
+    '''
+    Test indexes built by a worker are installed and queried like indexes built by queries,
+    builds started before the indexes were dropped are ignored
+    '''
+    rng = np.random.default_rng(3)
+    model = Model(rng, SYNC + 1000)
+    worker = IndexWorker()
+    built = []
+    worker.built.connect(lambda search, generation, indexes: built.append(search.install(generation, indexes)))
+
+    search = SearchIndex(model, worker)
+    assert search.building
+    assert not search.ready('big')
+    assert search.ready()
+
+    qtbot.waitUntil(lambda: built == [True])
+    criteria = ('rock bi', (0, 500), (0, 10), (170, -170))
+    assert search.ready(*criteria)
+    assert search.text.count == len(model.pid)
+    assert np.array_equal(search.query(*criteria), SearchIndex(model).query(*criteria))
+
+    #Rows appended up to SYNC are indexed by the query
+    more = Model(rng, 100)
+    model.pid.extend(range(len(model.pid) + 1, len(model.pid) + 101))
+    model.lat.extend(more.lat)
+    model.lon.extend(more.lon)
+    model.desc.extend(more.desc)
+    model.time = np.concatenate((model.time, more.time))
+    assert search.ready(*criteria) and not search.building
+    assert np.array_equal(search.query(*criteria), SearchIndex(model).query(*criteria))
+
+    search.reset('lat')
+    generation = search.generation
+    assert search.building
+    search.reset()
+    qtbot.waitUntil(lambda: not search.building)
+    assert built[-1] and search.ready(*criteria)
+    assert not search.install(generation, {'lat': None})
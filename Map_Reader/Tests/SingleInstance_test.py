@@ -0,0 +1,63 @@
+from Map_Reader import SingleInstance
+import os
+import threading
+import uuid
+import pytest
+
+@pytest.fixture
+def name():
+    return f'MapReaderTest-{uuid.uuid4().hex[:12]}'
+
+def send(request, name):
+    '''
+    Send request from another thread so the server can answer on this one
+    '''
+    result = []
+    thread = threading.Thread(target=lambda: result.append(SingleInstance.sendRequest(request, name, timeout=5000)))
+    thread.start()
+    return thread, result
+
+def test_1(qapp, name):
+    '''
+    Test a launch without a running instance falls back to a normal start
+    '''
+    assert SingleInstance.sendRequest({}, name, timeout=100) is False
+
+def test_2(qapp, qtbot, name, tmp_path):
+    '''
+    Test requests of later launches are passed to the running instance
+    '''
+    server = SingleInstance.InstanceServer(name)
+    assert server.listen()
+
+    request = SingleInstance.makeRequest(os.path.relpath(tmp_path))
+    assert request == {'Open': str(tmp_path)}
+
+    with qtbot.waitSignal(server.requested, timeout=5000) as blocker:
+        thread, result = send(request, name)
+    qtbot.waitUntil(lambda: not thread.is_alive())
+
+    assert blocker.args == [{'Open': str(tmp_path)}]
+    assert result == [True]
+
+    with qtbot.waitSignal(server.requested, timeout=5000) as blocker:
+        thread, result = send(SingleInstance.makeRequest(new=True), name)
+    qtbot.waitUntil(lambda: not thread.is_alive())
+
+    assert blocker.args == [{'New': True}]
+    assert result == [True]
+    server.close()
+
+def test_3(qapp, name):
+    '''
+    Test a second instance doesn't take over the server of a running one
+    '''
+    server = SingleInstance.InstanceServer(name)
+    assert server.listen()
+
+    other = SingleInstance.InstanceServer(name)
+    assert not other.listen()
+
+    server.close()
+    assert other.listen()
+    other.close()
@@ -0,0 +1,76 @@
+from Map_Reader.SpatialIndex import SpatialIndex, EARTH_RADIUS
+from Map_Reader.PointStore import PointStore
+import numpy as np
+import pytest
+
+def haversine(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2)**2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2)**2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+@pytest.fixture
+def locations():
+    rng = np.random.default_rng(0)
+    lat = 38.0 + rng.random(5000) * 0.2
+    lon = -120.0 + rng.random(5000) * 0.2
+    lat[::100] = np.nan
+    return lat, lon
+
+def test_1(locations):
+    '''
+    Test radius and nearest queries find the same points as measuring every point
+    '''
+    lat, lon = locations
+    index = SpatialIndex(cell=250)
+    index.extend(lat[:3000], lon[:3000])
+    index.extend(lat[3000:], lon[3000:])
+    distances = haversine(38.1, -119.9, lat, lon)
+
+    rows, found = index.radius(38.1, -119.9, 800)
+    assert rows.tolist() == [int(i) for i in np.argsort(distances) if distances[i] <= 800]
+    assert np.allclose(found, distances[rows])
+
+    rows, found = index.nearest(38.1, -119.9, 25)
+    assert rows.tolist() == np.argsort(distances)[:25].tolist()
+    assert np.all(np.diff(found) >= 0)
+
+    #Fewer points than asked for, a query that isn't near any cell scans the points
+    assert len(SpatialIndex().nearest(0, 0, 3)[0]) == 0
+    assert len(index.nearest(-38.0, 60.0, 6000)[0]) == 5000 - 50
+    assert len(index.radius(0, 0, EARTH_RADIUS * np.pi)[0]) == 5000 - 50
+
+def test_2(locations):
+    '''
+    Test box queries, also across the antimeridian and over a pole
+    '''
+    lat, lon = locations
+    index = SpatialIndex()
+    index.extend(lat, lon)
+
+    rows = index.box(38.05, -119.95, 38.1, -119.9)
+    expected = np.flatnonzero((lat >= 38.05) & (lat <= 38.1) & (lon >= -119.95) & (lon <= -119.9))
+    assert rows.tolist() == expected.tolist()
+
+    world = SpatialIndex(cell=100000)
+    world.extend([0.0, 0.5, 10.0, 89.5, 89.5, -20.0], [179.5, -179.5, 179.5, 0.0, 180.0, 0.0])
+    assert world.box(-1, 179, 1, -179).tolist() == [0, 1]
+    assert world.box(89, -180, 90, 180).tolist() == [3, 4]
+    assert world.box(-30, -10, 30, 10).tolist() == [5]
+
+    with pytest.raises(ValueError):
+        SpatialIndex(cell=1)
+
+def test_3():
+    '''
+    Test points of a project are indexed by their index in the points list
+    '''
+    points = [{'Latitude': 38.0 + i / 1000, 'Longitude': -120.0, 'Description': str(i)} for i in range(10)]
+    points[3]['Latitude'] = None
+    index = SpatialIndex.fromPoints(PointStore(points))
+
+    index.addPoints([{'Latitude': 38.0, 'Longitude': -120.0}, {'Latitude': None, 'Longitude': None}])
+
+    assert len(index) == 12
+    assert index.nearest(38.0, -120.0, 2)[0].tolist() == [0, 10]
+    assert index.radius(38.003, -120.0, 1)[0].tolist() == []
+    assert index.box(37, -121, 39, -119).tolist() == [0, 1, 2, 4, 5, 6, 7, 8, 9, 10]
@@ -0,0 +1,93 @@
+from Map_Reader.Windows import SpatialQueryWindow
+from Map_Reader.SpatialIndex import SpatialIndex
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
+import pytest
+
+POINTS = [{'Latitude': 38.0 + i / 1000, 'Longitude': -120.0} for i in range(150)]
+
+class Parent(QWidget):
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.points = POINTS
+        self.index = SpatialIndex.fromPoints(POINTS)
+        self.selected = None
+
+    def pointsNear(self, lat, lon, meters):
+        return self.index.radius(lat, lon, meters)
+
+    def nearestPoints(self, lat, lon, k=1):
+        return self.index.nearest(lat, lon, k)
+
+    def pointsInBox(self, south, west, north, east):
+        return self.index.box(south, west, north, east)
+
+    def selectPoints(self, rows):
+        self.selected = rows
+
+@pytest.fixture
+def parent(qtbot):
+    parent = Parent()
+    qtbot.addWidget(parent)
+    return parent
+
+def test_1(qtbot, parent):
+    '''
+    Test only the fields of the query mode are shown and needed
+    '''
+    window = SpatialQueryWindow((38.0, -120.0), parent)
+
+    assert window.latEdit.text() == '38.0' and window.radiusEdit.isVisibleTo(window)
+    assert not window.countEdit.isVisibleTo(window) and window.searchButton.isEnabled()
+    assert not window.selectButton.isEnabled()
+
+    window.comboBox.setCurrentText('Box')
+    assert window.boxEdits[0].isVisibleTo(window) and not window.latEdit.isVisibleTo(window)
+    assert not window.searchButton.isEnabled()
+
+    assert SpatialQueryWindow(None, parent).latEdit.text() == ''
+
+def test_2(qtbot, parent):
+    '''
+    Test results are listed nearest first and every result can be selected
+    '''
+    window = SpatialQueryWindow((38.01, -120.0), parent)
+    window.radiusEdit.setText('250')
+    qtbot.mouseClick(window.searchButton, QtCore.Qt.LeftButton)
+
+    assert window.resultTable.rowCount() == 5
+    assert window.resultTable.item(0, 0).text() == '11' and window.resultTable.item(0, 3).text() == '0.0'
+    assert window.resultTable.item(1, 1).text() in ('38.009', '38.011')
+
+    window.comboBox.setCurrentText('Nearest')
+    window.countEdit.setText('2')
+    qtbot.mouseClick(window.searchButton, QtCore.Qt.LeftButton)
+    assert window.resultTable.rowCount() == 2
+
+    window.comboBox.setCurrentText('Box')
+    for edit, value in zip(window.boxEdits, ['37', '-121', '39', '-119']):
+        edit.setText(value)
+    qtbot.mouseClick(window.searchButton, QtCore.Qt.LeftButton)
+
+    assert window.resultTable.rowCount() == SpatialQueryWindow.PREVIEW
+    assert window.resultLabel.text() == '150 points found, the first 100 are listed'
+    assert window.resultTable.item(0, 3).text() == ''
+
+    qtbot.mouseClick(window.selectButton, QtCore.Qt.LeftButton)
+    assert parent.selected.tolist() == list(range(150))
+
+def test_3(qtbot, parent):
+    '''
+    Test a search with a number still being typed does nothing
+    '''
+    window = SpatialQueryWindow((38.01, -120.0), parent)
+
+    for mode, edit in [('Radius', window.radiusEdit), ('Radius', window.lonEdit), ('Nearest', window.countEdit), ('Box', window.boxEdits[1])]:
+        window.comboBox.setCurrentText(mode)
+        for other in window.boxEdits:
+            other.setText('38')
+        edit.setText('-' if edit is not window.countEdit else '+')
+        qtbot.mouseClick(window.searchButton, QtCore.Qt.LeftButton)
+
+        assert window.resultTable.rowCount() == 0
+        assert not window.selectButton.isEnabled()
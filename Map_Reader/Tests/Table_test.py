@@ -0,0 +1,110 @@
+from Map_Reader.Table import Table
+from Map_Reader.PointModel import PID, LAT, DESC
+from Map_Reader import ProjectStore
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
+import pytest
+
+#Provides the slots Table connects its buttons to
+class Parent(QWidget):
+    def referenceWindow(self): pass
+    def scaleTracker(self): pass
+    def locationTracker(self): pass
+    def traverseTracker(self): pass
+    def spatialQueryWindow(self): pass
+    def plotPoints(self): pass
+    def recomputeWindow(self): pass
+
+def makePoint(lat, desc=''):
+    return {'Latitude': lat, 'Longitude': -120.0, 'Date': '01-01-2020 12:00:00 pm', 'Description': desc}
+
+def column(table, col):
+    model = table.model
+    return [model.data(model.index(row, col)) for row in range(model.rowCount())]
+
+@pytest.fixture
+def parent(qtbot):
+    parent = Parent()
+    qtbot.addWidget(parent)
+    return parent
+
+@pytest.fixture
+def table(parent):
+    table = Table(parent)
+    table.update([makePoint(38.3, 'c'), makePoint(38.1, 'a'), makePoint(38.2, 'b')])
+    return table
+
+def test_1(qtbot, table):
+    '''
+    Test a single row is inserted at its sorted position without resetting the table
+    '''
+    table.proxyView.sortByColumn(LAT, QtCore.Qt.AscendingOrder)
+    table.selectRows([2])
+    inserted = []
+    resets = []
+    table.model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    table.model.modelReset.connect(lambda: resets.append(True))
+
+    table.appendRow(makePoint(38.15, 'd'))
+
+    assert inserted == [(1, 1)] and resets == []
+    assert column(table, DESC) == ['a', 'd', 'b', 'c']
+    assert column(table, PID) == [2, 4, 3, 1]
+    assert table.selectedRows() == [2]
+    assert table.countLabel.text() == '4 points'
+
+def test_2(qtbot, table):
+    '''
+    Test an updated row moves to its sorted position and removed rows keep the other point IDs
+    '''
+    table.proxyView.sortByColumn(LAT, QtCore.Qt.AscendingOrder)
+    moved = []
+    table.model.rowsMoved.connect(lambda *args: moved.append(args))
+
+    table.updateRow(1, makePoint(38.4, 'a'))
+    assert column(table, DESC) == ['b', 'c', 'a']
+    assert len(moved) == 1
+
+    table.removeRow(0)
+    assert column(table, DESC) == ['b', 'a']
+    assert column(table, PID) == [3, 2]
+    assert table.countLabel.text() == '2 points'
+
+def test_3(qtbot, table):
+    '''
+    Test the filter bar filters once typing pauses, Clear shows every point right away
+    '''
+    resets = []
+    table.model.modelReset.connect(lambda: resets.append(True))
+
+    for n in range(1, 4):
+        table.searchEdit.setText('abc'[:n])
+    assert table.model.filter is None and resets == []
+
+    qtbot.waitUntil(lambda: table.model.filter is not None)
+    assert resets == [True]
+    assert table.countLabel.text() == '0 of 3 points'
+
+    table.clearButton.click()
+    assert table.model.filter is None
+    assert table.countLabel.text() == '3 points'
+
+def test_4(qtbot, table, tmp_path):
+    '''
+    Test filtering a project database only loads pages up to the next matching point
+    '''
+    store = ProjectStore.ProjectStore(str(tmp_path))
+    store.addPoints([makePoint(38.0 + i * 0.01, f'Point {i}') for i in range(10)])
+    table.setPager(store.pager(pageSize=3))
+
+    table.searchEdit.setText('point 7')
+    table.applyFilter()
+    assert len(table.model.pid) == 3 and table.model.rowCount() == 0
+    assert table.model.canFetchMore()
+
+    table.model.fetchMore()
+    assert len(table.model.pid) == 9
+    assert column(table, DESC) == ['Point 7']
+    assert not table.model.canFetchMore()
+    assert table.countLabel.text() == '1 of 9 points'
+    store.close()
@@ -0,0 +1,57 @@
+from Map_Reader.TraceRecorder import TraceRecorder, loadTrace, TRACE_DTYPE, RECENTRE
+import numpy as np
+import pytest
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / 'Traces'), capacity=4)
+    return recorder
+
+def test_1(recorder):
+    '''
+    Test recorded samples are written and loaded in order
+    '''
+    recorder.record(1, -2)
+    recorder.record(3, -4, True)
+    header, records = loadTrace(recorder.save())
+
+    assert header['Count'] == 2
+    assert header['Dropped'] == 0
+    assert records.dtype == TRACE_DTYPE
+    assert records['DX'].tolist() == [1, 3]
+    assert records['DY'].tolist() == [-2, -4]
+    assert records['Flags'].tolist() == [0, RECENTRE]
+    assert np.all(np.diff(records['Time']) >= 0)
+
+def test_2(recorder):
+    '''
+    Test oldest samples are overwritten when the ring buffer is full
+    '''
+    for i in range(6):
+        recorder.record(i, i)
+    header, records = loadTrace(recorder.save())
+
+    assert header['Count'] == 4
+    assert header['Dropped'] == 2
+    assert records['DX'].tolist() == [2, 3, 4, 5]
+
+def test_3(recorder):
+    '''
+    Test starting a new trace clears the buffer
+    '''
+    recorder.record(1, 1)
+    recorder.start()
+    header, records = loadTrace(recorder.save('empty.trace'))
+
+    assert header['Count'] == 0
+    assert len(records) == 0
+
+def test_4(tmp_path):
+    '''
+    Test loading a file that isn't a trace raises ValueError
+    '''
+    path = tmp_path / 'bad.trace'
+    path.write_bytes(b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        loadTrace(str(path))
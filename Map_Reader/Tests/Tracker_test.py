@@ -0,0 +1,229 @@
+from Map_Reader.Tracker import Tracker, Point
+from Map_Reader import Geodesic
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
+import threading
+import pytest
+import gc
+
+class Parent(QWidget):
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.legs = None
+        self.location = None
+
+    def confirmTraverse(self, legs):
+        self.legs = legs
+
+    def confirmLocation(self, lat, lon, dist, bearing, units, dx=None, dy=None):
+        self.location = (lat, lon, dist, bearing, dx, dy)
+
+@pytest.fixture
+def parent(qtbot):
+    parent = Parent()
+    qtbot.addWidget(parent)
+    return parent
+
+@pytest.fixture
+def tracker(qtbot, parent):
+    tracker = Tracker('traverse', parent, ref=(38.0, -120.0), scale=100.0, units='km')
+    qtbot.addWidget(tracker)
+    return tracker
+
+def trace(tracker, dx, dy):
+    '''
+    Trace one leg moving the cursor dx, dy pixels from the center
+    '''
+    tracker.dx_px = dx
+    tracker.dy_px = dy
+    tracker.dirty = True
+    tracker.mouseReleaseEvent(None)
+
+def test_1(qtbot, tracker):
+    '''
+    Test each leg starts at the end of the last one and is located from the reference point
+    '''
+    trace(tracker, 100, 0)
+    trace(tracker, 0, 0)
+    trace(tracker, 0, 50)
+
+    assert len(tracker.legs) == 2
+    first, second = tracker.legs
+
+    assert (first['PixelDX'], first['PixelDY']) == (100, 0)
+    assert (second['PixelDX'], second['PixelDY']) == (100, 50)
+    assert (first['LegDistance'], first['LegBearing']) == (1.0, 90.0)
+    assert (second['LegDistance'], second['LegBearing']) == (0.5, 0.0)
+
+    #Legs are exact locations of their total offset, like a located point
+    lat, lon = Geodesic.destination((38.0, -120.0), second['Distance'], second['Bearing'], 'km')
+    assert (second['Latitude'], second['Longitude']) == (round(float(lat), 5), round(float(lon), 5))
+    assert second['Bearing'] == tracker.getBearing(100, 50)
+
+    #The tracker stays open and keeps the end of the last leg
+    assert (tracker.dx, tracker.dy) == (100, 50)
+
+def test_2(qtbot, tracker):
+    '''
+    Test Backspace removes the last leg and Enter confirms the queued legs
+    '''
+    qtbot.keyClick(tracker, QtCore.Qt.Key_Return)
+    assert tracker.parent().legs is None
+
+    trace(tracker, 30, 40)
+    trace(tracker, -30, 0)
+    qtbot.keyClick(tracker, QtCore.Qt.Key_Backspace)
+
+    assert len(tracker.legs) == 1
+    assert (tracker.dx, tracker.dy) == (30, 40)
+
+    trace(tracker, 0, -40)
+    qtbot.keyClick(tracker, QtCore.Qt.Key_Return)
+
+    legs = tracker.parent().legs
+    assert [(leg['PixelDX'], leg['PixelDY']) for leg in legs] == [(30, 40), (30, 0)]
+    assert legs[1]['LegBearing'] == 180.0
+
+def test_3(qtbot, parent):
+    '''
+    Test async previews drop replaced requests and older results, and a result
+    finishing after release doesn't change the location confirmed on release
+    '''
+    tracker = Tracker('location', parent, ref=(38.0, -120.0), scale=100.0, units='km', asyncPreview=True)
+    qtbot.addWidget(tracker)
+    worker = tracker.previewWorker
+
+    #Hold the worker in compute until the test lets it go
+    computed = []
+    started = threading.Event()
+    gate = threading.Event()
+    compute = worker.compute
+    def gated(dx, dy):
+        computed.append((dx, dy))
+        started.set()
+        gate.wait(5)
+        return compute(dx, dy)
+    worker.compute = gated
+
+    def move(dx, dy):
+        tracker.dx_px, tracker.dy_px = dx, dy
+        tracker.dirty = True
+        tracker.refresh()
+
+    move(10, 0)
+    assert started.wait(5)
+    move(20, 0)
+    move(30, 0)
+    assert worker.dropped == 1
+
+    gate.set()
+    qtbot.waitUntil(lambda: tracker.shownSeq == 3)
+    assert computed == [(10, 0), (30, 0)]
+    assert tracker.newLoc == tracker.computePreview(30, 0)[2]
+
+    #A result older than the one shown is ignored
+    shown = (tracker.bearing, tracker.dist, tracker.newLoc)
+    tracker.showPreview(1, (0.0, 0.0, Point(0, 0)))
+    assert (tracker.bearing, tracker.dist, tracker.newLoc) == shown
+
+    #Release while a preview is being computed
+    gate.clear()
+    started.clear()
+    move(40, 30)
+    assert started.wait(5)
+    with qtbot.waitSignal(worker.finished):
+        tracker.mouseReleaseEvent(None)
+        gate.set()
+
+    bearing = tracker.getBearing(40, 30)
+    dist = tracker.convert(tracker.getDistance(40, 30), 100.0)
+    lat, lon = tracker.newLocation((38.0, -120.0), dist, bearing)
+    assert parent.location == (lat, lon, dist, bearing, 40, 30)
+
+    #The late result is dropped, the tracker was zeroed for the next trace
+    qtbot.wait(50)
+    assert (tracker.bearing, tracker.dist, tracker.newLoc) == (0, 0, Point(0, 0))
+
+    tracker.close()
+    assert not worker.thread.isRunning()
+
+def test_4(qtbot, parent):
+    '''
+    Test the preview thread stops when a tracker is deleted without being closed
+    '''
+    tracker = Tracker('location', parent, ref=(38.0, -120.0), scale=100.0, units='km', asyncPreview=True)
+    worker = tracker.previewWorker
+    assert worker.thread.isRunning()
+
+    with qtbot.waitSignal(tracker.destroyed):
+        tracker.deleteLater()
+    assert not worker.thread.isRunning()
+
+class Move():
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    def globalX(self):
+        return self.x
+
+    def globalY(self):
+        return self.y
+
+def test_5(qtbot, parent):
+    '''
+    Test coalesced motion only updates derived values when the refresh timer
+    fires and locates the same point on release as refreshing every sample
+    '''
+    results = []
+    for coalesce in [True, False]:
+        tracker = Tracker('location', parent, ref=(38.0, -120.0), scale=100.0, units='km', coalesce=coalesce)
+        qtbot.addWidget(tracker)
+        center = tracker.center
+        label = tracker.label.text()
+
+        #The last sample is on the window edge, the cursor is moved back to the center
+        samples = [(center.x + 5, center.y - 3), (center.x + 40, center.y + 12), (max(tracker.xBoundaries), center.y - 7)]
+        for x, y in samples[:2]:
+            tracker.mouseMoveEvent(Move(x, y))
+
+        if coalesce:
+            assert tracker.label.text() == label
+            assert (tracker.dist, tracker.bearing, tracker.newLoc) == (0, 0, Point(0, 0))
+
+            tracker.refreshTimer.timeout.emit()
+            assert tracker.label.text() != label
+            assert tracker.bearing == tracker.getBearing(40, -12)
+
+            label = tracker.label.text()
+            tracker.mouseMoveEvent(Move(*samples[2]))
+            assert tracker.label.text() == label
+        else:
+            tracker.mouseMoveEvent(Move(*samples[2]))
+
+        tracker.mouseReleaseEvent(None)
+        results.append(parent.location)
+
+    dx = max(tracker.xBoundaries) - center.x
+    assert results[0] == results[1]
+    assert results[0][4:] == (dx, 7)
+
+def test_6(qtbot):
+    '''
+    Test a request queued for a tracker that was collected is skipped without a result
+    '''
+    tracker = Tracker('location', None, ref=(38.0, -120.0), scale=100.0, units='km', asyncPreview=True)
+    worker = tracker.previewWorker
+    compute = worker.compute
+    results = []
+    worker.finished.connect(lambda seq, result: results.append(result))
+
+    assert compute(10, 5) is not None
+    tracker.close()
+    del tracker
+    gc.collect()
+
+    assert compute(10, 5) is None
+    worker.pending = (1, 10, 5)
+    worker.process()
+    assert results == []
+    worker.stop()
@@ -0,0 +1,50 @@
+from Map_Reader.Windows import TraverseWindow
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget
+import pytest
+
+LEGS = [
+    {'Latitude': 38.0, 'Longitude': -119.98859, 'Distance': 1.0, 'Bearing': 90.0, 'Units': 'km',
+     'PixelDX': 100, 'PixelDY': 0, 'LegDistance': 1.0, 'LegBearing': 90.0},
+    {'Latitude': 38.0045, 'Longitude': -119.98859, 'Distance': 1.118, 'Bearing': 63.4349, 'Units': 'km',
+     'PixelDX': 100, 'PixelDY': 50, 'LegDistance': 0.5, 'LegBearing': 0.0}
+]
+
+class Parent(QWidget):
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.added = None
+
+    def addTraverse(self, legs, descs):
+        self.added = (legs, descs)
+
+@pytest.fixture
+def parent(qtbot):
+    parent = Parent()
+    qtbot.addWidget(parent)
+    return parent
+
+def test_1(qtbot, parent):
+    '''
+    Test every leg is listed with its own distance and bearing
+    '''
+    window = TraverseWindow(LEGS, parent)
+
+    assert window.legTable.rowCount() == 2
+    assert window.legTable.item(1, 1).text() == '38.0045, -119.98859'
+    assert window.legTable.item(1, 2).text() == '0.5' and window.legTable.item(1, 3).text() == '0.0'
+    assert window.summaryLabel.text() == '2 legs, 1.5000 km in total'
+    assert not window.legTable.item(0, 1).flags() & QtCore.Qt.ItemIsEditable
+
+    assert not TraverseWindow([], parent).saveButton.isEnabled()
+
+def test_2(qtbot, parent):
+    '''
+    Test all legs are saved together with their descriptions
+    '''
+    window = TraverseWindow(LEGS, parent)
+    window.legTable.item(0, 4).setText('Gate')
+    qtbot.mouseClick(window.saveButton, QtCore.Qt.LeftButton)
+
+    assert parent.added == (LEGS, ['Gate', 'Leg 2'])
+    assert window.isVisible() == False
@@ -0,0 +1,141 @@
+import os
+import time
+import struct
+
+import numpy as np
+
+#Binary trace file layout (little endian):
+#   Header (40 bytes):
+#       magic       8s  b'MRTRACE\0'
+#       version     u2  file format version
+#       recordSize  u2  size in bytes of one record
+#       reserved    u4  always 0
+#       count       u8  number of records in file
+#       dropped     u8  number of oldest samples overwritten in the ring buffer
+#       startTime   i8  epoch time of the first sample in nanoseconds
+#   Records (17 bytes each, packed):
+#       Time        i8  nanoseconds since startTime
+#       DX          i4  local x offset from center in pixels
+#       DY          i4  local y offset from center in pixels (y up)
+#       Flags       u1  bit 0 set when the cursor was recentred after this sample
+MAGIC = b'MRTRACE\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQQq')
+RECORD = struct.Struct('<qiiB')
+RECORD_SIZE = RECORD.size
+RECENTRE = 1
+
+#NumPy dtype of one record, used to load trace files without copying
+TRACE_DTYPE = np.dtype([
+    ('Time', '<i8'),
+    ('DX', '<i4'),
+    ('DY', '<i4'),
+    ('Flags', 'u1')
+])
+
+#Class to record Tracker motion samples in a preallocated ring buffer
+class TraceRecorder():
+    def __init__(self, directory, capacity=65536):
+        if capacity < 1:
+            raise ValueError(capacity)
+
+        self.directory = directory
+        self.capacity = capacity
+        self.size = capacity * RECORD.size
+        self.buffer = bytearray(self.size)
+
+        #Bound methods kept as attributes to keep record() cheap
+        self.pack = RECORD.pack_into
+        self.clock = time.perf_counter_ns
+        self.start()
+
+    def start(self):
+        '''
+        Reset buffer and start time for a new trace
+        '''
+        self.count = 0
+        self.offset = 0
+        self.startTime = time.time_ns()
+        self.startCounter = time.perf_counter_ns()
+
+    def record(self, dx, dy, recentre=False):
+        '''
+        Store one motion sample, overwriting the oldest when the buffer is full
+
+        Args:
+            dx (int): local x offset from center in pixels
+            dy (int): local y offset from center in pixels
+            recentre (bool): cursor was recentred after this sample
+        '''
+        offset = self.offset
+        self.pack(self.buffer, offset, self.clock() - self.startCounter, dx, dy, recentre)
+
+        offset += RECORD_SIZE
+        self.offset = 0 if offset == self.size else offset
+        self.count += 1
+
+    def records(self):
+        '''
+        Return buffered records in chronological order as a bytes-like object
+        '''
+        if self.count <= self.capacity:
+            return memoryview(self.buffer)[:self.count * RECORD.size]
+
+        return self.buffer[self.offset:] + self.buffer[:self.offset]
+
+    def save(self, filename=None):
+        '''
+        Write buffered trace to a binary file in the trace directory
+
+        Args:
+            filename (str): name of trace file, timestamped name if not given
+
+        Returns:
+            path (str): path of file written
+        '''
+        if filename is None:
+            stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.startTime / 1e9))
+            filename = f'{stamp}_{self.startTime % 10**9:09d}.trace'
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+
+        count = min(self.count, self.capacity)
+        dropped = self.count - count
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, count, dropped, self.startTime))
+            f.write(self.records())
+
+        return path
+
+def loadTrace(path):
+    '''
+    Load trace file as a read only memory mapped NumPy record array
+
+    Args:
+        path (str): path of trace file
+
+    Returns:
+        header (dict): Version, Count, Dropped and StartTime values of the header
+        records (np.memmap): array with fields Time, DX, DY, Flags
+    '''
+    with open(path, 'rb') as f:
+        magic, version, recordSize, _, count, dropped, startTime = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC or recordSize != TRACE_DTYPE.itemsize:
+        raise ValueError(f'{path} is not a trace file')
+
+    header = {
+        'Version': version,
+        'Count': count,
+        'Dropped': dropped,
+        'StartTime': startTime
+    }
+
+    if count == 0:
+        return header, np.zeros(0, dtype=TRACE_DTYPE)
+
+    records = np.memmap(path, dtype=TRACE_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+    return header, records
@@ -1,28 +1,32 @@
 import sys
-from PyQt5.QtCore import Qt, QDateTime
+from PyQt5.QtCore import Qt, QDateTime, QTimer
 from PyQt5.QtWidgets import QGridLayout, QLabel, QApplication, QDialog
 from PyQt5.QtGui import QCursor, QFont
-from geopy.distance import geodesic
 from collections import namedtuple
 import math
+import weakref
 
 from MouseController import MouseController
+import Geodesic
+from OffsetCache import OffsetCache
+from PreviewWorker import PreviewWorker
 
 #Dependencies
 #PyQt5: conda install -c anaconda pyqt 
-#geopy: conda install -c conda-forge geopy
+#numpy: conda install -c anaconda numpy
 
 #Create namedtuple for readability to store point data
 Point = namedtuple('Point', 'x y')
 
 #Tracker class to handle mouse movement for locating point and setting scale
-#Two modes: scale and location
+#Three modes: scale, location and traverse. In traverse mode each press/release is a leg
+#starting where the last one ended, legs are queued until Enter confirms them all at once
 class Tracker(QDialog):
     
-    def __init__(self, mode, parent=None, hidden=True, ref=None, scale=None, units=None):
+    def __init__(self, mode, parent=None, hidden=True, ref=None, scale=None, units=None, coalesce=False, tolerance=0.5, cache=None, asyncPreview=False, recorder=None):
         super(Tracker, self).__init__(parent)
 
-        if mode not in ['scale', 'location']:
+        if mode not in ['scale', 'location', 'traverse']:
             raise ValueError(mode)
 
         self.ref = ref
@@ -30,6 +34,43 @@ class Tracker(QDialog):
         self.hidden = hidden
         self.scale = scale
         self.units = units
+        self.coalesce = coalesce
+        self.tolerance = tolerance
+
+        #Optional TraceRecorder storing every motion sample of a trace
+        self.recorder = recorder
+        self.tracePath = None
+
+        #Cache of preview values keyed by pixel offset, can be shared between traces
+        self.offsetCache = cache if cache is not None else OffsetCache()
+
+        #Precompute local projection around reference for fast live preview
+        self.projection = Geodesic.LocalProjection(ref) if mode != 'scale' else None
+
+        #Optionally compute location previews on a worker thread, only newest result is shown
+        self.previewSeq = 0
+        self.shownSeq = 0
+        self.previewWorker = None
+
+        if asyncPreview and mode != 'scale':
+            #The worker only holds a weak reference so the tracker can be deleted
+            #without being closed, the thread is then stopped when it's destroyed
+            computePreview = weakref.WeakMethod(self.computePreview)
+
+            def compute(dx, dy):
+                #Requests still queued when the tracker is collected are skipped
+                method = computePreview()
+                return method(dx, dy) if method is not None else None
+
+            self.previewWorker = PreviewWorker(compute)
+            self.previewWorker.finished.connect(self.showPreview)
+
+            worker = self.previewWorker
+            self.destroyed.connect(lambda *args: worker.stop())
+
+        #Legs of a traverse and the total pixel offset from ref where the next leg starts
+        self.legs = []
+        self.legStart = Point(0, 0)
 
         self.mouseController = MouseController()
         self.origMouseSpeed = self.mouseController.getSpeed()
@@ -38,6 +79,14 @@ class Tracker(QDialog):
         self.zeroVariables()
            
         self.cursor = QCursor()
+        self.screenConnected = False
+        self.updateGeometry()
+
+        #Timer used in coalesce mode to refresh derived values once per frame
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setInterval(self.getFrameInterval())
+        self.refreshTimer.timeout.connect(self.refresh)
+
         self.initUI()
         
         
@@ -60,14 +109,29 @@ class Tracker(QDialog):
         self.setModal(True)
         self.showFullScreen()
         
-    def getCenter(self):
+    def getFrameInterval(self):
+        '''
+        Return the display frame interval in milliseconds used to throttle
+        label refreshes in coalesce mode. Defaults to 60 Hz if the refresh
+        rate of the screen can't be read.
+        '''
+        screen = QApplication.primaryScreen()
+        rate = screen.refreshRate() if screen else 0
+
+        if rate <= 0:
+            rate = 60
+
+        return max(1, int(1000 // rate))
+
+    def updateGeometry(self):
         '''
         Find the center point of the window by adding half the distance of
         the height and width to the absolute x, y location of the window.
+        Center and boundaries are cached and only refreshed when the window
+        is resized, moved or changes screen.
         '''
-        #Reference to geometry of screen and cursor
+        #Reference to geometry of screen
         geo = self.geometry()
-        cur = self.cursor
         
         #Get x, y coords of the screen, left upper corner
         x_pos = geo.x()
@@ -81,36 +145,47 @@ class Tracker(QDialog):
         x_center = x_pos + (width//2)
         y_center = y_pos + (height//2)
         
-        return Point(x_center, y_center)
+        self.center = Point(x_center, y_center)
+
+        #Global coords of window edges, window isn't always at the screen origin
+        self.xBoundaries = {x_pos, x_pos + width-1}
+        self.yBoundaries = {y_pos, y_pos + height-1}
+
+    def getCenter(self):
+        '''
+        Return the cached center point of the window
+        '''
+        return self.center
     
     def getCursorPos(self):
         '''
         Return the current position of the cursor relative to the upper
         left corner of the window.
         '''
-        x = self.cursor.pos().x()
-        y = self.cursor.pos().y()
+        pos = self.cursor.pos()
         
-        return Point(x, y)
+        return Point(pos.x(), pos.y())
 
-    def getDX(self):
+    def getDX(self, curPos=None):
         '''
-        Calculate distance from center in x direction
+        Calculate distance from center in x direction. Cursor is read if
+        no position is given.
         '''
-        center = self.getCenter()
-        curPos = self.getCursorPos()
+        if curPos is None:
+            curPos = self.getCursorPos()
 
-        return curPos.x - center.x
+        return curPos.x - self.center.x
 
-    def getDY(self):
+    def getDY(self, curPos=None):
         '''
-        Calculate distance from center in y direction
+        Calculate distance from center in y direction. Cursor is read if
+        no position is given.
         '''
-        center = self.getCenter()
-        curPos = self.getCursorPos()
+        if curPos is None:
+            curPos = self.getCursorPos()
 
         #reverse y for inverted y-axis
-        return center.y - curPos.y
+        return self.center.y - curPos.y
 
     def getDistance(self, dx, dy):
         '''
@@ -187,23 +262,37 @@ class Tracker(QDialog):
             bearing (float): bearing in degrees of mouse movement
 
         Returns:
-            coords.latitude (float): latitude of new location
-            coords.longitude(float): longitude of new location
-        '''
-        #kilometers
-        if self.units == 'km':
-            coords = geodesic(kilometers=dist).destination(ref, bearing)
-        #miles    
-        elif self.units == 'mi':
-            coords = geodesic(miles=dist).destination(ref, bearing)
-        #meters        
-        elif self.units == 'm':
-            coords = geodesic(meters=dist).destination(ref, bearing)
-        #feet    
-        elif self.units == 'ft':
-            coords = geodesic(feet=dist).destination(ref, bearing)
-    
-        return Point(round(coords.latitude, 5), round(coords.longitude, 5))
+            Point (lat, lon): latitude and longitude of new location
+        '''
+        lat, lon = Geodesic.destination(ref, dist, bearing, self.units)
+
+        return Point(round(float(lat), 5), round(float(lon), 5))
+
+    def previewLocation(self, ref, dist, bearing):
+        '''
+        Approximates the new location on the local projection around the
+        reference point while tracing. Falls back to the exact solver when
+        the estimated error in meters exceeds the tolerance.
+
+        Args:
+            ref (tuple): latitude and longitude of the reference point
+            dist (float): converted euclidean distance of mouse movement
+            bearing (float): bearing in degrees of mouse movement
+
+        Returns:
+            Point (lat, lon): latitude and longitude of new location
+        '''
+        if self.projection is None or self.projection.ref != ref:
+            return self.newLocation(ref, dist, bearing)
+
+        error = self.projection.errorBound(Geodesic.toMeters(dist, self.units))
+
+        if error > self.tolerance:
+            return self.newLocation(ref, dist, bearing)
+
+        lat, lon = self.projection.destination(dist, bearing, self.units)
+
+        return Point(round(float(lat), 5), round(float(lon), 5))
     
     def zeroVariables(self):
         '''
@@ -211,6 +300,9 @@ class Tracker(QDialog):
         '''
         self.dx = 0
         self.dy = 0
+        self.dx_px = 0
+        self.dy_px = 0
+        self.dirty = False
         self.dist = 0
         self.dist_px = 0
         self.bearing = 0
@@ -224,7 +316,12 @@ class Tracker(QDialog):
         results += f'\tdy_px: {self.dy + dy_px}\n'
         results += f'\tDistance_px: {self.dist_px}\n'
 
-        if self.mode == 'location':
+        if self.mode == 'traverse':
+            start = (self.legs[-1]['Latitude'], self.legs[-1]['Longitude']) if self.legs else self.ref
+            results += f'\n\tLegs: {len(self.legs)} (Enter to confirm, Backspace to undo)\n'
+            results += f'\tLeg start: {start}\n'
+
+        if self.mode != 'scale':
             results += f'\n\tReference: {self.ref}\n'
             results += f'\tBearing: {self.bearing}\n'
             results += f'\tDistance_{self.units}: {self.dist}\n'
@@ -232,35 +329,107 @@ class Tracker(QDialog):
 
         self.label.setText(results)
 
-    def update(self):
+    def trackMotion(self, curPos=None):
         '''
-        Tracks current x and y distance and updates label
+        Fold the current cursor offset into the running dx, dy totals. This
+        is cheap and runs for every motion sample, derived values are left
+        to refresh(). The cursor is read once if no position is given.
+
+        Args:
+            curPos (Point): global cursor position, e.g. from the QMouseEvent
         '''
-        geo = self.geometry()
-        cur = self.cursor
-        center = self.getCenter()
-        
-        #Get current x, y, and straight line distance from center
-        dx_px = self.getDX()
-        dy_px = self.getDY()
-        self.dist_px = self.getDistance(self.dx + dx_px, self.dy + dy_px)
+        if curPos is None:
+            curPos = self.getCursorPos()
+
+        center = self.center
+
+        #Get current x, y distance from center
+        self.dx_px = self.getDX(curPos)
+        self.dy_px = self.getDY(curPos)
+        self.dirty = True
 
-        if self.mode == 'location':
-            self.bearing = self.getBearing(self.dx + dx_px, self.dy + dy_px)
-            self.dist = self.convert(self.dist_px, self.scale)
-            self.newLoc = self.newLocation(self.ref, self.dist, self.bearing)
-            
         #Check if cursor is within window boundaries
         #Only update dx, dy instance variables when border has been reached
-        curLoc = {cur.pos().x(), cur.pos().y()}
-        boundaries = {0, geo.width()-1, geo.height()-1}
+        recentre = curPos.x in self.xBoundaries or curPos.y in self.yBoundaries
+
+        if self.recorder:
+            self.recorder.record(self.dx_px, self.dy_px, recentre)
+
+        if recentre:
+            self.dx += self.dx_px
+            self.dy += self.dy_px
+            self.dx_px = 0
+            self.dy_px = 0
+            self.cursor.setPos(center.x, center.y)
+
+    def computePreview(self, dx, dy):
+        '''
+        Compute bearing, distance in units and preview location for a total
+        pixel offset. Runs on the worker thread when asyncPreview is set.
+
+        Args:
+            dx (int): total distance in pixels traveled in x direction
+            dy (int): total distance in pixels traveled in y direction
+
+        Returns:
+            bearing (float), dist (float), newLoc (Point)
+        '''
+        #Reuse values for pixel offsets already visited with the same ref, scale, units
+        context = self.offsetCache.setContext(self.ref, self.scale, self.units)
+        cached = self.offsetCache.get(dx, dy, context)
+
+        if cached:
+            return cached
+
+        bearing = self.getBearing(dx, dy)
+        dist = self.convert(self.getDistance(dx, dy), self.scale)
+        newLoc = self.previewLocation(self.ref, dist, bearing)
+        self.offsetCache.put(dx, dy, (bearing, dist, newLoc), context)
+
+        return bearing, dist, newLoc
+
+    def showPreview(self, seq, result):
+        '''
+        Show preview computed by the worker thread. Results older than the
+        one already shown, or finished after release, are dropped.
+        '''
+        if seq <= self.shownSeq:
+            return
+
+        self.shownSeq = seq
+        self.bearing, self.dist, self.newLoc = result
+        self.updateLabel(self.dx_px, self.dy_px)
 
-        if curLoc.intersection(boundaries):
-            self.dx += dx_px
-            self.dy += dy_px
-            cur.setPos(center.x, center.y)
+    def refresh(self):
+        '''
+        Recompute distance, bearing and new location from the running totals
+        and update label. Skipped if no motion was tracked since last refresh.
+        '''
+        if not self.dirty:
+            return
+
+        self.dirty = False
+
+        #Get straight line distance from start of trace
+        dx = self.dx + self.dx_px
+        dy = self.dy + self.dy_px
+        self.dist_px = self.getDistance(dx, dy)
 
-        self.updateLabel(dx_px, dy_px)
+        if self.mode != 'scale':
+            if self.previewWorker:
+                self.previewSeq += 1
+                self.previewWorker.submit(self.previewSeq, dx, dy)
+            else:
+                self.bearing, self.dist, self.newLoc = self.computePreview(dx, dy)
+
+        self.updateLabel(self.dx_px, self.dy_px)
+
+    def update(self, curPos=None):
+        '''
+        Tracks current x and y distance and updates label
+        '''
+        self.trackMotion(curPos)
+        self.refresh()
         
     def mousePressEvent(self, e):
         '''
@@ -270,6 +439,13 @@ class Tracker(QDialog):
         center = self.getCenter()
         self.cursor.setPos(center.x, center.y)
 
+        #Refresh derived values at most once per frame while tracing
+        if self.coalesce:
+            self.refreshTimer.start()
+
+        if self.recorder:
+            self.recorder.start()
+
         #Max out mouse pointer speed
         #self.mouseController.setSpeed(20)
 
@@ -289,28 +465,166 @@ class Tracker(QDialog):
         #restore cursor type and zero out variables
         QApplication.restoreOverrideCursor()
 
+        #Stop frame timer and compute exact final values from all tracked motion
+        self.refreshTimer.stop()
+        self.refresh()
+
+        #Location confirmed is always computed on this thread with the exact solver
+        if self.mode != 'scale':
+            dx = self.dx + self.dx_px
+            dy = self.dy + self.dy_px
+            self.bearing = self.getBearing(dx, dy)
+            self.dist = self.convert(self.dist_px, self.scale)
+            self.newLoc = self.newLocation(self.ref, self.dist, self.bearing)
+
+            #Ignore previews still in flight
+            self.shownSeq = self.previewSeq
+
+        #Write recorded motion samples before handing results to the parent
+        if self.recorder:
+            self.tracePath = self.recorder.save()
+
         #Reset mouse speed to original setting
         self.mouseController.setSpeed(self.origMouseSpeed)
 
         #Reset mouse acceleration
         self.mouseController.setAcceleration(self.origAcceleration)
 
+        #Legs are queued, the tracker stays open and the next leg starts at this one's end
+        if self.mode == 'traverse':
+            self.addLeg()
+            return
+
         #Call function to launch windown depending on scale or location mode
         if self.parent():
             if self.mode == 'scale':
                 self.parent().confirmScale(self.dist_px)
             else:
-                self.parent().confirmLocation(self.newLoc.x, self.newLoc.y, self.dist, self.bearing, self.units)
+                #Pixel offset is stored with the point so it can be located again later (see Reprojection)
+                self.parent().confirmLocation(self.newLoc.x, self.newLoc.y, self.dist, self.bearing, self.units,
+                                              dx=self.dx + self.dx_px, dy=self.dy + self.dy_px)
 
         self.zeroVariables()
         
+    def addLeg(self):
+        '''
+        Queue the leg just traced. A leg is stored like a located point, from
+        ref and with the total pixel offset, so legs don't add up rounding and
+        can be recomputed like any other point. The distance and bearing of
+        the leg itself are kept for the confirm window.
+        '''
+        dx = self.dx + self.dx_px
+        dy = self.dy + self.dy_px
+        legDX = dx - self.legStart.x
+        legDY = dy - self.legStart.y
+
+        #Clicks without motion aren't legs
+        if legDX or legDY:
+            legDist = self.getDistance(legDX, legDY)
+            self.legs.append({
+                'Latitude': self.newLoc.x,
+                'Longitude': self.newLoc.y,
+                'Distance': self.dist,
+                'Bearing': self.bearing,
+                'Units': self.units,
+                'PixelDX': dx,
+                'PixelDY': dy,
+                'LegDistance': self.convert(legDist, self.scale),
+                'LegBearing': self.getBearing(legDX, legDY)
+            })
+            self.legStart = Point(dx, dy)
+
+        self.startLeg()
+
+    def undoLeg(self):
+        '''
+        Remove the last queued leg, the next leg starts where the one before ended
+        '''
+        if self.legs:
+            self.legs.pop()
+            last = self.legs[-1] if self.legs else None
+            self.legStart = Point(last['PixelDX'], last['PixelDY']) if last else Point(0, 0)
+
+        self.startLeg()
+
+    def startLeg(self):
+        '''
+        Zero out variables and continue tracking from the end of the last leg
+        '''
+        self.zeroVariables()
+        self.dx, self.dy = self.legStart
+        self.dirty = True
+        self.refresh()
+
+    def keyPressEvent(self, e):
+        '''
+        In traverse mode Enter confirms the queued legs and Backspace removes
+        the last one. Escape closes the tracker in every mode.
+        '''
+        if self.mode == 'traverse' and e.key() in (Qt.Key_Return, Qt.Key_Enter):
+            if self.legs and self.parent():
+                self.parent().confirmTraverse(list(self.legs))
+        elif self.mode == 'traverse' and e.key() == Qt.Key_Backspace:
+            self.undoLeg()
+        else:
+            super(Tracker, self).keyPressEvent(e)
+
+    def showEvent(self, e):
+        '''
+        Refresh cached geometry when shown and whenever the window changes screen
+        '''
+        self.updateGeometry()
+
+        if self.windowHandle() and not self.screenConnected:
+            self.windowHandle().screenChanged.connect(self.changedScreen)
+            self.screenConnected = True
+
+        super(Tracker, self).showEvent(e)
+
+    def changedScreen(self, screen):
+        '''
+        Refresh cached geometry when the window moves to another screen. A
+        method instead of a lambda so the connection doesn't keep the tracker alive.
+        '''
+        self.updateGeometry()
+
+    def resizeEvent(self, e):
+        '''
+        Refresh cached geometry when window is resized
+        '''
+        self.updateGeometry()
+        super(Tracker, self).resizeEvent(e)
+
+    def moveEvent(self, e):
+        '''
+        Refresh cached geometry when window is moved
+        '''
+        self.updateGeometry()
+        super(Tracker, self).moveEvent(e)
+
+    def closeEvent(self, e):
+        '''
+        Stop preview worker thread when the window is closed
+        '''
+        if self.previewWorker:
+            self.previewWorker.stop()
+            self.previewWorker = None
+
+        super(Tracker, self).closeEvent(e)
+
     def mouseMoveEvent(self, e):
         '''
         When mouse button is pressed and moving all fields will be actively updated.
         The current distance x, y, and total from the center will be added to the 
         overall distance to track current bearing, distance, and current location.
+        In coalesce mode only the motion is tracked and the timer refreshes the rest.
         '''
-        self.update()
+        curPos = Point(e.globalX(), e.globalY())
+
+        if self.coalesce:
+            self.trackMotion(curPos)
+        else:
+            self.update(curPos)
 
 if __name__ == '__main__':
     import sys
@@ -1,13 +1,27 @@
 from PyQt5.QtWidgets import *
-from PyQt5.QtGui import QDoubleValidator
+from PyQt5.QtGui import QDoubleValidator, QIntValidator
 from PyQt5.QtCore import Qt
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from geopy.distance import geodesic
 from collections import namedtuple
 import webbrowser
 
 from MouseController import MouseController
 
+def readNumbers(edits, kind=float):
+    '''
+    Read the numbers entered in line edits
+
+    Args:
+        edits (list): line edits to read
+        kind (type): float or int
+
+    Returns:
+        list: numbers of the edits, None while any of them is incomplete like '-' or '.'
+    '''
+    try:
+        return [kind(edit.text()) for edit in edits]
+    except ValueError:
+        return None
+
 #Class to confirm the scale input data
 class ScaleWindow(QDialog):
     def __init__(self, dist_px, parent=None):
@@ -176,7 +190,7 @@ class ReferenceWindow(QDialog):
         
 #Class to confirm lat, lon data
 class LocationWindow(QDialog):
-    def __init__(self, lat, lon, dist, bearing, units, parent=None):
+    def __init__(self, lat, lon, dist, bearing, units, parent=None, dx=None, dy=None):
         super(LocationWindow, self).__init__(parent)
         self.lat = lat
         self.lon = lon
@@ -184,6 +198,10 @@ class LocationWindow(QDialog):
         self.bearing = bearing
         self.units = units
 
+        #Traced pixel offset of the location, None if it wasn't traced
+        self.dx = dx
+        self.dy = dy
+
         #self.setFixedSize(300, 100)
         self.setWindowTitle('Confirm Location')
         self.initUI()
@@ -283,9 +301,13 @@ class LocationWindow(QDialog):
         upperCheck = all(field < limit for field, limit in zip(fieldVals, upperBound))
         lowerCheck = all(field >= limit for field, limit in zip(fieldVals, lowerBound))
 
+        #The pixel offset only gives the location shown if it wasn't edited
+        traced = [t.text() for t in self.mandatoryFields] == [str(v) for v in [self.lat, self.lon, self.dist, self.bearing]]
+        dx, dy = (self.dx, self.dy) if traced else (None, None)
+
         if upperCheck and lowerCheck:
             if self.parent():
-                self.parent().setLocation(lat, lon, desc, dist, bearing, units)
+                self.parent().setLocation(lat, lon, desc, dist, bearing, units, dx=dx, dy=dy)
 
             self.close()
 
@@ -295,6 +317,79 @@ class LocationWindow(QDialog):
         '''
         self.close()
 
+#Class to confirm the queued legs of a traverse together
+class TraverseWindow(QDialog):
+    def __init__(self, legs, parent=None):
+        super(TraverseWindow, self).__init__(parent)
+        self.legs = legs
+
+        self.setFixedSize(560, 360)
+        self.setWindowTitle('Confirm Traverse')
+        self.initUI()
+
+    def initUI(self):
+        '''
+        Setup GUI elements of traverse window
+        '''
+        mainLayout = QVBoxLayout()
+
+        units = self.legs[0]['Units'] if self.legs else ''
+        self.summaryLabel = QLabel(f'{len(self.legs)} legs, {sum(leg["LegDistance"] for leg in self.legs):,.4f} {units} in total')
+
+        #one row per leg, only the description can be edited
+        self.legTable = QTableWidget(len(self.legs), 5)
+        self.legTable.setHorizontalHeaderLabels(['Leg', 'Location', f'Distance ({units})', 'Bearing', 'Description'])
+        self.legTable.horizontalHeader().setStretchLastSection(True)
+        self.legTable.verticalHeader().hide()
+
+        for row, leg in enumerate(self.legs):
+            for column, text in enumerate([
+                    str(row + 1),
+                    f"{leg['Latitude']}, {leg['Longitude']}",
+                    str(leg['LegDistance']),
+                    str(leg['LegBearing'])]):
+                item = QTableWidgetItem(text)
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+                self.legTable.setItem(row, column, item)
+            self.legTable.setItem(row, 4, QTableWidgetItem(f'Leg {row + 1}'))
+
+        #horizontal layout containing save and cancel buttons
+        hLayout = QHBoxLayout()
+        self.saveButton = QPushButton('Save')
+        self.saveButton.clicked.connect(self.save)
+        self.saveButton.setEnabled(bool(self.legs))
+
+        self.cancelButton = QPushButton('Cancel')
+        self.cancelButton.clicked.connect(self.cancel)
+
+        hLayout.addWidget(self.saveButton)
+        hLayout.addWidget(self.cancelButton)
+
+        mainLayout.addWidget(self.summaryLabel)
+        mainLayout.addWidget(self.legTable)
+        mainLayout.addLayout(hLayout)
+
+        self.setLayout(mainLayout)
+        self.setModal(True)
+        self.show()
+
+    def save(self):
+        '''
+        Send the legs and their descriptions back to the main window to be saved together
+        '''
+        descs = [self.legTable.item(row, 4).text() for row in range(len(self.legs))]
+
+        if self.parent():
+            self.parent().addTraverse(self.legs, descs)
+
+        self.close()
+
+    def cancel(self):
+        '''
+        Return to mouse tracker screen to add or undo legs
+        '''
+        self.close()
+
 class MouseSettingsWindow(QDialog):
     def __init__(self, parent=None):
         super(MouseSettingsWindow, self).__init__(parent)
@@ -372,6 +467,418 @@ class MouseSettingsWindow(QDialog):
         self.mc.setAcceleration(self.origAccel)
         self.close()
 
+#Class to choose the reports written by an export of every format
+class ExportWindow(QDialog):
+    FORMATS = ('CSV', 'JSON', 'JSON Lines', 'Excel', 'HTML')
+
+    def __init__(self, parent=None):
+        super(ExportWindow, self).__init__(parent)
+
+        self.setFixedSize(300, 250)
+        self.setWindowTitle('Export All')
+        self.setAttribute(Qt.WA_QuitOnClose, False)
+        self.initUI()
+
+    def initUI(self):
+        '''
+        Setup GUI elements of export window
+        '''
+        mainLayout = QVBoxLayout()
+
+        #one check box per report format
+        self.formatBoxes = {}
+        for filetype in self.FORMATS:
+            self.formatBoxes[filetype] = QCheckBox(filetype)
+            self.formatBoxes[filetype].setChecked(True)
+            self.formatBoxes[filetype].stateChanged.connect(self.checkFields)
+            mainLayout.addWidget(self.formatBoxes[filetype])
+
+        self.incrementalBox = QCheckBox('Only add new points to CSV and JSON Lines')
+        self.incrementalBox.setChecked(True)
+
+        #horizontal layout containing save and cancel buttons
+        hLayout = QHBoxLayout()
+        self.saveButton = QPushButton('Export')
+        self.saveButton.clicked.connect(self.save)
+
+        self.cancelButton = QPushButton('Cancel')
+        self.cancelButton.clicked.connect(self.cancel)
+
+        hLayout.addWidget(self.saveButton)
+        hLayout.addWidget(self.cancelButton)
+
+        mainLayout.addWidget(self.incrementalBox)
+        mainLayout.addLayout(hLayout)
+
+        self.setLayout(mainLayout)
+        self.setModal(True)
+        self.show()
+
+    def checkFields(self):
+        '''
+        Check if a format is selected
+        '''
+        self.saveButton.setEnabled(any(box.isChecked() for box in self.formatBoxes.values()))
+
+    def save(self):
+        '''
+        Send the selected formats back to the main window when export button is clicked
+        '''
+        filetypes = [filetype for filetype, box in self.formatBoxes.items() if box.isChecked()]
+        self.parent().exportReports(filetypes, self.incrementalBox.isChecked())
+        self.close()
+
+    def cancel(self):
+        '''
+        Return to mouse tracker screen if cancel button is clicked
+        '''
+        self.close()
+
+#Class to recompute point locations against a new reference point, scale or units
+#The changes are previewed as a before/after diff and only written when applied
+class RecomputeWindow(QDialog):
+    #Changed points listed in the preview, the points that moved the most
+    PREVIEW = 100
+
+    def __init__(self, reference, scale, units, selected=(), parent=None):
+        super(RecomputeWindow, self).__init__(parent)
+        self.reference = reference or ('', '')
+        self.scale = scale or ''
+        self.units = units
+        self.selected = list(selected)
+        self.reprojection = None
+
+        self.setFixedSize(560, 420)
+        self.setWindowTitle('Recompute Locations')
+        self.setAttribute(Qt.WA_QuitOnClose, False)
+        self.initUI()
+
+    def initUI(self):
+        '''
+        Setup GUI elements of recompute window
+        '''
+        mainLayout = QVBoxLayout()
+
+        #horizontal layout containing reference point, scale and unit selector
+        hLayout = QHBoxLayout()
+        self.latEdit = QLineEdit(str(self.reference[0]))
+        self.latEdit.setValidator(QDoubleValidator(-90, 90, 5))
+        self.latEdit.setPlaceholderText('Latitude')
+        self.latEdit.textChanged.connect(self.checkFields)
+
+        self.lonEdit = QLineEdit(str(self.reference[1]))
+        self.lonEdit.setValidator(QDoubleValidator(-180, 180, 5))
+        self.lonEdit.setPlaceholderText('Longitude')
+        self.lonEdit.textChanged.connect(self.checkFields)
+
+        self.scaleEdit = QLineEdit(str(self.scale))
+        self.scaleEdit.setValidator(QDoubleValidator(0.0001, 1000000, 4))
+        self.scaleEdit.setPlaceholderText('Pixels per unit')
+        self.scaleEdit.textChanged.connect(self.checkFields)
+
+        units = ['km', 'm', 'ft', 'mi']
+        self.comboBox = QComboBox()
+        self.comboBox.addItems(units)
+        if self.units in units:
+            self.comboBox.setCurrentText(self.units)
+        self.comboBox.currentTextChanged.connect(self.checkFields)
+
+        hLayout.addWidget(QLabel('Reference:'))
+        hLayout.addWidget(self.latEdit)
+        hLayout.addWidget(self.lonEdit)
+        hLayout.addWidget(QLabel('Scale:'))
+        hLayout.addWidget(self.scaleEdit)
+        hLayout.addWidget(self.comboBox)
+
+        self.selectedBox = QCheckBox(f'Only the {len(self.selected):,} selected points')
+        self.selectedBox.setEnabled(bool(self.selected))
+        self.selectedBox.stateChanged.connect(self.checkFields)
+
+        #before/after values of the changed points
+        self.summaryLabel = QLabel()
+        self.diffTable = QTableWidget(0, 4)
+        self.diffTable.setHorizontalHeaderLabels(['Point', 'Before', 'After', 'Moved (m)'])
+        self.diffTable.horizontalHeader().setStretchLastSection(True)
+        self.diffTable.verticalHeader().hide()
+        self.diffTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        #horizontal layout containing preview, apply and cancel buttons
+        h2Layout = QHBoxLayout()
+        self.previewButton = QPushButton('Preview')
+        self.previewButton.clicked.connect(self.preview)
+
+        self.saveButton = QPushButton('Apply')
+        self.saveButton.clicked.connect(self.save)
+        self.saveButton.setEnabled(False)
+
+        self.cancelButton = QPushButton('Cancel')
+        self.cancelButton.clicked.connect(self.cancel)
+
+        h2Layout.addWidget(self.previewButton)
+        h2Layout.addWidget(self.saveButton)
+        h2Layout.addWidget(self.cancelButton)
+
+        mainLayout.addLayout(hLayout)
+        mainLayout.addWidget(self.selectedBox)
+        mainLayout.addWidget(self.summaryLabel)
+        mainLayout.addWidget(self.diffTable)
+        mainLayout.addLayout(h2Layout)
+
+        self.mandatoryFields = [self.latEdit, self.lonEdit, self.scaleEdit]
+        self.checkFields()
+
+        self.setLayout(mainLayout)
+        self.setModal(True)
+        self.show()
+
+    def checkFields(self):
+        '''
+        Check if all mandatory fields are entered, a preview of other values can't be applied
+        '''
+        self.previewButton.setEnabled(all(t.text() for t in self.mandatoryFields))
+        self.saveButton.setEnabled(False)
+        self.reprojection = None
+
+    def preview(self):
+        '''
+        Recompute the locations and show the before/after diff, nothing is written yet
+        '''
+        values = readNumbers([self.latEdit, self.lonEdit, self.scaleEdit])
+        if values is None:
+            return
+        lat, lon, scale = values
+
+        #check values entered by user are correct
+        if not (-90 < lat < 90 and -180 < lon < 180 and scale > 0):
+            return
+
+        rows = self.selected if self.selectedBox.isChecked() else None
+        self.reprojection = self.parent().previewRecompute((lat, lon), scale, self.comboBox.currentText(), rows)
+
+        summary = self.reprojection.summary()
+        text = f"{summary['Changed']:,} of {summary['Points']:,} points change, moved up to {summary['MaxShift']:,.1f} m"
+        if summary['Skipped']:
+            text += f"\n{summary['Skipped']:,} points have no traced offset or scale and are left as they are"
+        self.summaryLabel.setText(text)
+
+        diff = self.reprojection.diff(self.PREVIEW)
+        self.diffTable.setRowCount(len(diff))
+        for row, change in enumerate(diff):
+            before = change['Before']
+            after = change['After']
+            for column, text in enumerate([
+                    str(change['Point']),
+                    f"{before['Latitude']}, {before['Longitude']}",
+                    f"{after['Latitude']}, {after['Longitude']}",
+                    f"{change['Shift']:,.1f}"]):
+                self.diffTable.setItem(row, column, QTableWidgetItem(text))
+
+        self.saveButton.setEnabled(bool(summary['Changed']))
+
+    def save(self):
+        '''
+        Send the previewed locations back to the main window to be written
+        '''
+        self.parent().applyRecompute(self.reprojection)
+        self.close()
+
+    def cancel(self):
+        '''
+        Close without changing any point
+        '''
+        self.close()
+
+#Class to find points near a location or inside a box with the spatial index of the points
+class SpatialQueryWindow(QDialog):
+    #Results listed in the window, every result can be selected in the table
+    PREVIEW = 100
+    MODES = ['Radius', 'Nearest', 'Box']
+
+    def __init__(self, center=None, parent=None):
+        super(SpatialQueryWindow, self).__init__(parent)
+        self.center = center or ('', '')
+        self.rows = []
+
+        self.setFixedSize(560, 420)
+        self.setWindowTitle('Nearby Points')
+        self.setAttribute(Qt.WA_QuitOnClose, False)
+        self.initUI()
+
+    def initUI(self):
+        '''
+        Setup GUI elements of spatial query window
+        '''
+        mainLayout = QVBoxLayout()
+
+        #horizontal layout containing query mode, location and radius or number of points
+        hLayout = QHBoxLayout()
+        self.comboBox = QComboBox()
+        self.comboBox.addItems(self.MODES)
+        self.comboBox.currentTextChanged.connect(self.setMode)
+
+        self.latEdit = QLineEdit(str(self.center[0]))
+        self.latEdit.setValidator(QDoubleValidator(-90, 90, 5))
+        self.latEdit.setPlaceholderText('Latitude')
+        self.latEdit.textChanged.connect(self.checkFields)
+
+        self.lonEdit = QLineEdit(str(self.center[1]))
+        self.lonEdit.setValidator(QDoubleValidator(-180, 180, 5))
+        self.lonEdit.setPlaceholderText('Longitude')
+        self.lonEdit.textChanged.connect(self.checkFields)
+
+        self.radiusEdit = QLineEdit('500')
+        self.radiusEdit.setValidator(QDoubleValidator(0, 20100000, 2))
+        self.radiusEdit.setPlaceholderText('Meters')
+        self.radiusEdit.textChanged.connect(self.checkFields)
+
+        self.countEdit = QLineEdit('10')
+        self.countEdit.setValidator(QIntValidator(1, 1000000))
+        self.countEdit.setPlaceholderText('Points')
+        self.countEdit.textChanged.connect(self.checkFields)
+
+        hLayout.addWidget(self.comboBox)
+        hLayout.addWidget(self.latEdit)
+        hLayout.addWidget(self.lonEdit)
+        hLayout.addWidget(self.radiusEdit)
+        hLayout.addWidget(self.countEdit)
+
+        #horizontal layout containing the edges of the box
+        h2Layout = QHBoxLayout()
+        self.boxEdits = []
+        for name, top in [('South', 90), ('West', 180), ('North', 90), ('East', 180)]:
+            edit = QLineEdit()
+            edit.setValidator(QDoubleValidator(-top, top, 5))
+            edit.setPlaceholderText(name)
+            edit.textChanged.connect(self.checkFields)
+            h2Layout.addWidget(edit)
+            self.boxEdits.append(edit)
+
+        #nearest results first
+        self.resultLabel = QLabel()
+        self.resultTable = QTableWidget(0, 4)
+        self.resultTable.setHorizontalHeaderLabels(['Point', 'Latitude', 'Longitude', 'Distance (m)'])
+        self.resultTable.horizontalHeader().setStretchLastSection(True)
+        self.resultTable.verticalHeader().hide()
+        self.resultTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        #horizontal layout containing search, select and close buttons
+        h3Layout = QHBoxLayout()
+        self.searchButton = QPushButton('Search')
+        self.searchButton.clicked.connect(self.search)
+
+        self.selectButton = QPushButton('Select in Table')
+        self.selectButton.clicked.connect(self.select)
+        self.selectButton.setEnabled(False)
+
+        self.cancelButton = QPushButton('Close')
+        self.cancelButton.clicked.connect(self.cancel)
+
+        h3Layout.addWidget(self.searchButton)
+        h3Layout.addWidget(self.selectButton)
+        h3Layout.addWidget(self.cancelButton)
+
+        mainLayout.addLayout(hLayout)
+        mainLayout.addLayout(h2Layout)
+        mainLayout.addWidget(self.resultLabel)
+        mainLayout.addWidget(self.resultTable)
+        mainLayout.addLayout(h3Layout)
+
+        self.setMode(self.comboBox.currentText())
+
+        self.setLayout(mainLayout)
+        self.setModal(True)
+        self.show()
+
+    def setMode(self, mode):
+        '''
+        Show the fields of the query mode
+        '''
+        self.latEdit.setVisible(mode != 'Box')
+        self.lonEdit.setVisible(mode != 'Box')
+        self.radiusEdit.setVisible(mode == 'Radius')
+        self.countEdit.setVisible(mode == 'Nearest')
+        for edit in self.boxEdits:
+            edit.setVisible(mode == 'Box')
+
+        self.checkFields()
+
+    def checkFields(self):
+        '''
+        Check if all mandatory fields of the query mode are entered
+        '''
+        mode = self.comboBox.currentText()
+        if mode == 'Box':
+            fields = self.boxEdits
+        else:
+            fields = [self.latEdit, self.lonEdit, self.radiusEdit if mode == 'Radius' else self.countEdit]
+
+        self.searchButton.setEnabled(all(t.text() for t in fields))
+
+    def search(self):
+        '''
+        Query the points and list the results, nearest first
+        '''
+        mode = self.comboBox.currentText()
+        distances = None
+
+        if mode == 'Box':
+            values = readNumbers(self.boxEdits)
+            if values is None:
+                return
+            south, west, north, east = values
+
+            #check values entered by user are correct
+            if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+                return
+
+            rows = self.parent().pointsInBox(south, west, north, east)
+        else:
+            values = readNumbers([self.latEdit, self.lonEdit])
+            if mode == 'Radius':
+                limit = readNumbers([self.radiusEdit])
+            else:
+                limit = readNumbers([self.countEdit], int)
+
+            if values is None or limit is None:
+                return
+            lat, lon = values
+
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return
+
+            if mode == 'Radius':
+                rows, distances = self.parent().pointsNear(lat, lon, limit[0])
+            else:
+                rows, distances = self.parent().nearestPoints(lat, lon, limit[0])
+
+        self.rows = rows
+        self.resultLabel.setText(f'{len(rows):,} points found' + (f', the first {self.PREVIEW} are listed' if len(rows) > self.PREVIEW else ''))
+
+        shown = rows[:self.PREVIEW]
+        self.resultTable.setRowCount(len(shown))
+        for row, i in enumerate(shown):
+            point = self.parent().points[int(i)]
+            for column, text in enumerate([
+                    str(int(i) + 1),
+                    str(point['Latitude']),
+                    str(point['Longitude']),
+                    f'{distances[row]:,.1f}' if distances is not None else '']):
+                self.resultTable.setItem(row, column, QTableWidgetItem(text))
+
+        self.selectButton.setEnabled(bool(len(rows)))
+
+    def select(self):
+        '''
+        Select every found point in the table of the main window
+        '''
+        self.parent().selectPoints(self.rows)
+
+    def cancel(self):
+        '''
+        Close the window, the selection is kept
+        '''
+        self.close()
+
 class MapWindow(QDialog):
     def __init__(self, api_key, ref, points):
         super(MapWindow, self).__init__()
@@ -406,6 +913,8 @@ class MapWindow(QDialog):
             point = {'lat': p['Latitude'], 'lng': p['Longitude']}
             point_str += self.addMarker(point, 'red')
         
+        #WebEngine takes long to load, it is only imported once a map is shown
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
         mapView = QWebEngineView()
         mapView.setHtml(f'''
         <!DOCTYPE html>